@@ -0,0 +1,256 @@
+"""
+Batch entry point for the chatbot service - answers FAQ and order status
+questions from a JSONL file without the interactive menu.
+
+Usage:
+    python batch.py INPUT.jsonl OUTPUT.jsonl [--workers N] [--checkpoint PATH]
+
+Each input line is a JSON object such as
+    {"intent": "faq", "text": "What are your operating hours?"}
+    {"intent": "order_status", "text": "Where is ORD-12345?"}
+
+Each output line holds the answer text, links, suggestions, the latency
+in milliseconds and whether the answer was served from the cache.
+Results are written in input order as they complete, so memory use stays
+constant no matter how large the input is. If the run is interrupted,
+running the same command again resumes from the last checkpoint.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from src.handlers.faq_handler import FAQHandler
+from src.handlers.order_status_handler import OrderStatusHandler
+
+
+def _load_checkpoint(checkpoint_path: str) -> Tuple[int, int]:
+    """
+    Read how far a previous run got.
+
+    Returns:
+        tuple: (input lines already answered, bytes of output written for them)
+    """
+    try:
+        with open(checkpoint_path, 'r') as f:
+            checkpoint = json.load(f)
+        return checkpoint["lines_done"], checkpoint["output_bytes"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return 0, 0
+
+
+def _save_checkpoint(checkpoint_path: str, lines_done: int, output_bytes: int) -> None:
+    """Write the checkpoint atomically so a crash never leaves half a file."""
+    temp_path = checkpoint_path + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump({"lines_done": lines_done, "output_bytes": output_bytes}, f)
+    os.replace(temp_path, checkpoint_path)
+
+
+def _read_record(handlers: Dict[str, Any], line_number: int, raw_line: str) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Parse an input record and pick the handler that answers it.
+
+    Returns:
+        tuple: (handler, or None if the record cannot be answered,
+                the start of the output record)
+    """
+    try:
+        record = json.loads(raw_line)
+        intent = record["intent"]
+        text = record["text"]
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        return None, {"line": line_number, "error": f"Invalid input record: {str(e)}"}
+
+    handler = handlers.get(intent)
+    if handler is None:
+        return None, {
+            "line": line_number,
+            "intent": intent,
+            "error": f"Unknown intent '{intent}'. Use one of: {', '.join(handlers)}"
+        }
+
+    return handler, {"line": line_number, "intent": intent, "input": text}
+
+
+def _describe(result: Dict[str, Any], response: Any, started: float) -> Dict[str, Any]:
+    """Add the answer and its latency to an output record."""
+    latency_ms = (time.perf_counter() - started) * 1000
+    result.update({
+        "text": response.text,
+        "links": response.links,
+        "suggestions": response.suggestions,
+        "latency_ms": round(latency_ms, 3),
+        "served_by": response.served_by,
+        "served_from_cache": response.served_by == "cache"
+    })
+    return result
+
+
+def answer_record(handlers: Dict[str, Any], line_number: int, raw_line: str) -> Dict[str, Any]:
+    """
+    Answer a single input record and describe the result.
+
+    Returns:
+        dict: The output record for this line.
+    """
+    handler, result = _read_record(handlers, line_number, raw_line)
+    if handler is None:
+        return result
+
+    started = time.perf_counter()
+    return _describe(result, handler.handle(result["input"]), started)
+
+
+async def answer_record_async(handlers: Dict[str, Any], line_number: int, raw_line: str) -> Dict[str, Any]:
+    """
+    Answer a single input record from the batch's event loop.
+
+    Handlers with handle_async (FAQ) are awaited directly, so identical
+    questions in flight at the same time share one Ozwell request. Other
+    handlers run in the loop's worker threads.
+
+    Returns:
+        dict: The output record for this line.
+    """
+    handler, result = _read_record(handlers, line_number, raw_line)
+    if handler is None:
+        return result
+
+    started = time.perf_counter()
+    if hasattr(handler, "handle_async"):
+        response = await handler.handle_async(result["input"])
+    else:
+        response = await asyncio.to_thread(handler.handle, result["input"])
+    return _describe(result, response, started)
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    workers: int = 4,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_every: int = 100
+) -> Dict[str, int]:
+    """
+    Answer every record of a JSONL file and write the results to another.
+
+    Args:
+        input_path (str): JSONL file with {"intent", "text"} records.
+        output_path (str): JSONL file the results are written to.
+        workers (int): Number of records answered in parallel.
+        checkpoint_path (str, optional): Where progress is saved.
+                                         Defaults to OUTPUT.checkpoint.
+        checkpoint_every (int): Save progress after this many records.
+
+    Returns:
+        dict: Number of records answered in this run ("processed") and
+              the last input line handled ("lines").
+    """
+    checkpoint_path = checkpoint_path or output_path + ".checkpoint"
+    lines_done, output_bytes = _load_checkpoint(checkpoint_path)
+
+    handlers = {
+        "faq": FAQHandler(),
+        "order_status": OrderStatusHandler()
+    }
+
+    # Resume: drop any output written after the last checkpoint, then append.
+    if lines_done and os.path.exists(output_path):
+        with open(output_path, 'r+b') as f:
+            f.truncate(output_bytes)
+        output_mode = 'a'
+    else:
+        lines_done = 0
+        output_mode = 'w'
+
+    # Only a few records per worker are held in memory at any time.
+    window = max(1, workers) * 4
+    pending: Deque[Tuple[int, Optional[Future]]] = deque()
+    processed = 0
+
+    with open(input_path, 'r') as source, open(output_path, output_mode) as out:
+        # Records are answered on one event loop, so duplicate FAQ questions
+        # in the window are coalesced; blocking calls use `workers` threads.
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=max(1, workers)))
+        loop_thread = threading.Thread(target=loop.run_forever, name="batch-loop", daemon=True)
+        loop_thread.start()
+
+        def write_oldest() -> None:
+            nonlocal lines_done, processed
+            line_number, future = pending.popleft()
+            if future is not None:
+                out.write(json.dumps(future.result()) + "\n")
+                processed += 1
+            lines_done = line_number
+
+            if processed and processed % checkpoint_every == 0:
+                out.flush()
+                _save_checkpoint(checkpoint_path, lines_done, out.tell())
+
+        try:
+            for line_number, raw_line in enumerate(source, start=1):
+                if line_number <= lines_done:
+                    continue
+
+                if raw_line.strip():
+                    pending.append((line_number, asyncio.run_coroutine_threadsafe(
+                        answer_record_async(handlers, line_number, raw_line), loop
+                    )))
+                else:
+                    pending.append((line_number, None))
+
+                if len(pending) >= window:
+                    write_oldest()
+
+            while pending:
+                write_oldest()
+
+        except BaseException:
+            # Interrupted: remember everything that was fully written.
+            out.flush()
+            _save_checkpoint(checkpoint_path, lines_done, out.tell())
+            raise
+
+        finally:
+            for _, future in pending:
+                if future is not None:
+                    future.cancel()
+            loop.call_soon_threadsafe(loop.stop)
+            loop_thread.join()
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+
+    # The run finished, so a later run should start from scratch.
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    return {"processed": processed, "lines": lines_done}
+
+
+def main():
+    """Parse command line arguments and run the batch."""
+    parser = argparse.ArgumentParser(description="Answer FAQ and order status questions from a JSONL file.")
+    parser.add_argument("input", help="JSONL file with {\"intent\", \"text\"} records")
+    parser.add_argument("output", help="JSONL file to write results to")
+    parser.add_argument("--workers", type=int, default=4, help="records answered in parallel (default 4)")
+    parser.add_argument("--checkpoint", help="progress file (default OUTPUT.checkpoint)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    summary = run_batch(args.input, args.output, workers=args.workers, checkpoint_path=args.checkpoint)
+    elapsed = time.perf_counter() - started
+
+    print(f"Answered {summary['processed']} records in {elapsed:.1f} seconds.")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
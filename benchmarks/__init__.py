@@ -0,0 +1 @@
+# Benchmarks package — mock Ozwell server and load-generation harness.
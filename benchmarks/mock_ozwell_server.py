@@ -0,0 +1,197 @@
+"""
+Mock Ozwell server - A local stand-in for the Ozwell completion API.
+
+It accepts the same request body as https://ai.bluehive.com/api/v1/completion
+and answers in the same shape, with a configurable latency distribution,
+error rate and optional streaming, so handlers can be measured without
+calling the real service.
+
+Usage:
+    python -m benchmarks.mock_ozwell_server --port 8080 --latency-ms 300 --error-rate 0.05
+
+Then point the chatbot at it:
+    OZWELL_URL=http://127.0.0.1:8080/api/v1/completion python main.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+
+class MockSettings:
+    """
+    Behaviour of the mock server.
+
+    latency_distribution can be:
+    - "fixed": every reply takes latency_ms.
+    - "uniform": between latency_ms - jitter_ms and latency_ms + jitter_ms.
+    - "lognormal": median latency_ms with a long tail controlled by sigma,
+      which is closer to how real model latency behaves.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 200.0,
+        latency_distribution: str = "lognormal",
+        jitter_ms: float = 50.0,
+        sigma: float = 0.5,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        token_ms: float = 20.0
+    ):
+        self.latency_ms = latency_ms
+        self.latency_distribution = latency_distribution
+        self.jitter_ms = jitter_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.token_ms = token_ms
+
+    def sample_latency(self) -> float:
+        """Return how long the next reply should take, in seconds."""
+        if self.latency_distribution == "fixed":
+            latency = self.latency_ms
+        elif self.latency_distribution == "uniform":
+            latency = random.uniform(self.latency_ms - self.jitter_ms, self.latency_ms + self.jitter_ms)
+        else:
+            latency = random.lognormvariate(0, self.sigma) * self.latency_ms
+        return max(0.0, latency) / 1000
+
+
+class MockOzwellRequestHandler(BaseHTTPRequestHandler):
+    """Handles POST requests the way the Ozwell completion endpoint does."""
+
+    protocol_version = "HTTP/1.1"
+    settings = MockSettings()
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean.
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError):
+            self._send_json(400, {"error": "Request body must be JSON."})
+            return
+
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self._send_json(401, {"error": "Missing API key."})
+            return
+
+        time.sleep(self.settings.sample_latency())
+
+        if random.random() < self.settings.error_rate:
+            self._send_json(self.settings.error_status, {"error": "Simulated upstream failure."})
+            return
+
+        answer = (
+            "This is a simulated answer to: "
+            + str(payload.get("prompt", ""))[:200]
+        )
+
+        if payload.get("stream"):
+            self._stream(answer)
+            return
+
+        self._send_json(200, {
+            "choices": [{"message": {"role": "assistant", "content": answer}}]
+        })
+
+    def _stream(self, answer: str) -> None:
+        """Send the answer word by word as server-sent events."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        words = answer.split(" ")
+        for position, word in enumerate(words):
+            text = word if position == 0 else " " + word
+            event = {"choices": [{"delta": {"content": text}}]}
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(self.settings.token_ms / 1000)
+
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def start_mock_server(
+    settings: MockSettings,
+    host: str = "127.0.0.1",
+    port: int = 0
+) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the mock server in a background thread.
+
+    Args:
+        settings (MockSettings): Latency, error and streaming behaviour.
+        host (str): Interface to listen on.
+        port (int): Port to listen on. Zero picks a free port.
+
+    Returns:
+        tuple: (server, completion URL). Call server.shutdown() to stop it.
+    """
+    handler_class = type("ConfiguredMockHandler", (MockOzwellRequestHandler,), {"settings": settings})
+    server = ThreadingHTTPServer((host, port), handler_class)
+    server.daemon_threads = True
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    url = f"http://{host}:{server.server_address[1]}/api/v1/completion"
+    return server, url
+
+
+def main():
+    """Run the mock server in the foreground."""
+    parser = argparse.ArgumentParser(description="Local stand-in for the Ozwell completion API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="typical reply time (default 200)")
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--jitter-ms", type=float, default=50.0, help="spread for the uniform distribution")
+    parser.add_argument("--sigma", type=float, default=0.5, help="tail width for the lognormal distribution")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests that fail (0-1)")
+    parser.add_argument("--error-status", type=int, default=503, help="status code for failed requests")
+    parser.add_argument("--token-ms", type=float, default=20.0, help="delay between streamed words")
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        latency_ms=args.latency_ms,
+        latency_distribution=args.latency_dist,
+        jitter_ms=args.jitter_ms,
+        sigma=args.sigma,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        token_ms=args.token_ms
+    )
+    server, url = start_mock_server(settings, host=args.host, port=args.port)
+    print(f"Mock Ozwell server listening at {url}")
+    print("Press Ctrl+C to stop.")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
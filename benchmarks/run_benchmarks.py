@@ -0,0 +1,246 @@
+"""
+Benchmark suite - Measures handler throughput and latency against the mock Ozwell server.
+
+Usage:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --concurrency 1 8 32 --requests 400 --latency-ms 150
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/previous.json
+
+Every scenario is run at each concurrency level, and QPS plus p50, p95
+and p99 latency are reported. Results are saved as JSON (by default in
+benchmarks/results/) so runs from different versions can be compared.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.mock_ozwell_server import MockSettings, start_mock_server
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(rank, len(sorted_values) - 1))]
+
+
+def run_level(call: Callable[[int], Any], concurrency: int, total_requests: int) -> Dict[str, Any]:
+    """
+    Run one scenario at a fixed concurrency.
+
+    Args:
+        call (callable): Makes request number i.
+        concurrency (int): Number of requests in flight at once.
+        total_requests (int): Number of requests to make.
+
+    Returns:
+        dict: Throughput and latency figures for this level.
+    """
+    latencies: List[float] = []
+    errors = 0
+
+    def timed(i: int) -> Optional[float]:
+        started = time.perf_counter()
+        try:
+            call(i)
+        except Exception:
+            return None
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency in pool.map(timed, range(total_requests)):
+            if latency is None:
+                errors += 1
+            else:
+                latencies.append(latency)
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "errors": errors,
+        "duration_s": round(duration, 4),
+        "qps": round(total_requests / duration, 2) if duration else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3)
+    }
+
+
+def build_scenarios(work_dir: str) -> Dict[str, Callable[[int], Any]]:
+    """
+    Create the handlers under test and the call made for each scenario.
+    File-backed handlers write inside work_dir so real data is never touched.
+    """
+    # Imported here so OZWELL_URL is already pointing at the mock server.
+    from src.handlers.escalation_handler import EscalationHandler
+    from src.handlers.faq_handler import FAQHandler
+    from src.handlers.feedback_handler import FeedbackHandler
+    from src.handlers.order_status_handler import OrderStatusHandler
+    from src.handlers.password_reset_handler import PasswordResetHandler
+    from src.handlers.ticket_handler import TicketHandler
+    from src.services.credential_store import CredentialStore
+    from src.services.journal_store import JournalStore
+    from src.services.write_behind import WriteBehindStore
+
+    # Feedback and escalations are stored relative to the working directory.
+    os.chdir(work_dir)
+
+    # Every scenario repeats the same customer, which the rate limits would refuse.
+    os.environ.setdefault("RATE_LIMIT", "0")
+
+    faq = FAQHandler()
+    orders = OrderStatusHandler()
+    feedback = FeedbackHandler()
+    escalations = EscalationHandler()
+    passwords = PasswordResetHandler(credentials=CredentialStore(os.path.join(work_dir, "data", "credentials.db")))
+
+    tickets = TicketHandler(store=JournalStore(os.path.join(work_dir, "data", "tickets.jsonl"), "ticket_id"))
+    queued_tickets = TicketHandler(
+        store=WriteBehindStore(JournalStore(os.path.join(work_dir, "data", "queued-tickets.jsonl"), "ticket_id"))
+    )
+
+    # Numbers questions across all levels, so no two FAQ requests repeat.
+    unique = itertools.count()
+
+    return {
+        # A different question each time, so every request reaches Ozwell.
+        "faq_llm": lambda i: faq.handle(f"Do you ship to Canada? (request {next(unique)})"),
+        "faq_cached": lambda i: faq.handle("Do you ship to Canada?"),
+        "faq_local": lambda i: faq.handle("What are your operating hours?"),
+        "order_status": lambda i: orders.handle("Where is my order ORD-12345?"),
+        "order_status_llm": lambda i: orders.handle("Can I change the delivery address for ORD-12345?"),
+        "ticket_create": lambda i: tickets.handle(f"Benchmark ticket {i}", "Created by the benchmark suite."),
+        "ticket_create_write_behind": lambda i: queued_tickets.handle(f"Benchmark ticket {i}", "Created by the benchmark suite."),
+        "feedback_submit": lambda i: feedback.handle(f"Benchmark {i}", 5, "Created by the benchmark suite."),
+        "escalation_submit": lambda i: escalations.handle(f"Benchmark {i}", "555-123-4567", "Benchmark"),
+        # Hashing runs in worker processes, so this should scale with concurrency up to the core count.
+        "password_reset": lambda i: passwords.reset_password(PasswordResetHandler.USER_ID, f"Benchmark{i}Pass"),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline_path: str) -> None:
+    """Print how QPS and tail latency changed against an earlier result file."""
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+
+    previous = {
+        (row["scenario"], row["concurrency"]): row
+        for row in baseline.get("results", [])
+    }
+
+    print()
+    print(f"Compared with {baseline_path} (commit {baseline.get('commit')}):")
+    for row in current["results"]:
+        old = previous.get((row["scenario"], row["concurrency"]))
+        if not old:
+            continue
+
+        def change(key: str) -> str:
+            if not old[key]:
+                return "n/a"
+            return f"{(row[key] - old[key]) / old[key] * 100:+.1f}%"
+
+        print(
+            f"  {row['scenario']:<26} c={row['concurrency']:<3} "
+            f"qps {change('qps'):>8}  p50 {change('p50_ms'):>8}  p99 {change('p99_ms'):>8}"
+        )
+
+
+def main():
+    """Start the mock server, run every scenario and save the results."""
+    parser = argparse.ArgumentParser(description="Benchmark the chatbot handlers against a mock Ozwell server.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and level")
+    parser.add_argument("--scenarios", nargs="+", help="only run these scenarios")
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="result file (default benchmarks/results/benchmark-<time>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    repo_dir = os.getcwd()
+    settings = MockSettings(
+        latency_ms=args.latency_ms,
+        latency_distribution=args.latency_dist,
+        error_rate=args.error_rate
+    )
+    server, url = start_mock_server(settings)
+    os.environ["OZWELL_URL"] = url
+    os.environ["OZWELL_API_KEY"] = "benchmark-key"
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="chatbot-bench-") as work_dir:
+        os.makedirs(os.path.join(work_dir, "data"), exist_ok=True)
+        scenarios = build_scenarios(work_dir)
+
+        for name, call in scenarios.items():
+            if args.scenarios and name not in args.scenarios:
+                continue
+            for concurrency in args.concurrency:
+                row = {"scenario": name, **run_level(call, concurrency, args.requests)}
+                results.append(row)
+                print(
+                    f"{name:<26} c={concurrency:<3} qps={row['qps']:>9.1f}  "
+                    f"p50={row['p50_ms']:>9.2f}ms  p95={row['p95_ms']:>9.2f}ms  "
+                    f"p99={row['p99_ms']:>9.2f}ms  errors={row['errors']}"
+                )
+
+        os.chdir(repo_dir)
+
+    server.shutdown()
+
+    report = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": _git_commit(),
+        "settings": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "latency_ms": args.latency_ms,
+            "latency_distribution": args.latency_dist,
+            "error_rate": args.error_rate
+        },
+        "results": results
+    }
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print()
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
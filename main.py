@@ -15,6 +15,21 @@ def space():
     print()
 
 
+def print_streamed(stream):
+    """
+    Print an answer chunk by chunk as it is generated,
+    then return the complete response (with links and suggestions).
+    """
+    print("Assistant: ", end="", flush=True)
+    while True:
+        try:
+            chunk = next(stream)
+        except StopIteration as finished:
+            print()
+            return finished.value
+        print(chunk, end="", flush=True)
+
+
 def display_main_menu():
     """Display the main menu."""
     space()
@@ -58,9 +73,8 @@ def run_faq_chatbot():
                 print("Please enter a question.")
                 continue
 
-            response = faq_handler.handle(user_input)
             print()
-            print("Assistant:", response.text)
+            response = print_streamed(faq_handler.handle_stream(user_input))
 
             if response.links:
                 print()
@@ -106,9 +120,8 @@ def run_order_status_chatbot():
                 print("Please enter your order ID or question.")
                 continue
 
-            response = order_handler.handle(user_input)
             print()
-            print("Assistant:", response.text)
+            response = print_streamed(order_handler.handle_stream(user_input))
 
             if response.links:
                 print()
@@ -135,10 +148,43 @@ def run_password_reset():
 
     try:
         reset_handler = PasswordResetHandler()
-        response = reset_handler.handle()
+        user_id = input(f"Enter your user ID (press Enter for {PasswordResetHandler.USER_ID}): ").strip()
+
+        if user_id.lower() == 'back':
+            return 'back'
+
+        if user_id.lower() in ['quit', 'exit']:
+            return 'quit'
+
+        user_id = user_id or PasswordResetHandler.USER_ID
+        space()
+        response = reset_handler.handle(user_id)
         print(response.text)
         space()
 
+        if user_id not in reset_handler.credentials:
+            input("Press Enter to return to the main menu...")
+            return 'back'
+
+        # Changing a known password checks it first; a forgotten one can still be reset.
+        while True:
+            current = input("Enter your current password, or press Enter if you have forgotten it: ").strip()
+
+            if current.lower() == 'back':
+                return 'back'
+
+            if current.lower() in ['quit', 'exit']:
+                return 'quit'
+
+            if not current:
+                break
+
+            if reset_handler.verify_password(user_id, current):
+                print("Current password confirmed.")
+                break
+
+            print("That password is not correct. Try again, or press Enter if you have forgotten it.")
+
         while True:
             space()
             new_password = input("Enter new password (or 'back' to return): ").strip()
@@ -161,7 +207,7 @@ def run_password_reset():
 
             print()
             print("Updating password...")
-            reset_response = reset_handler.reset_password(new_password)
+            reset_response = reset_handler.reset_password(user_id, new_password)
             print(reset_response.text)
 
             if reset_response.suggestions:
@@ -184,6 +230,8 @@ def run_support_ticket():
     space()
     print("Support Ticket Creation")
     space()
+    print("Enter a ticket ID (like TKT-00001) to check its status, 'history' to list your tickets,")
+    print("or 'search' followed by words to find tickets (e.g. search refund).")
     print("Type 'back' to return or 'quit' to exit.")
     space()
 
@@ -204,6 +252,20 @@ def run_support_ticket():
                 print("Subject cannot be empty.")
                 continue
 
+            if TicketHandler.TICKET_ID_PATTERN.fullmatch(subject):
+                print()
+                print(ticket_handler.handle_status(subject).text)
+                continue
+
+            if subject.lower() == 'history':
+                show_ticket_history(ticket_handler)
+                continue
+
+            if subject.lower().startswith('search '):
+                print()
+                print(ticket_handler.handle_search(subject[len('search '):].strip()).text)
+                continue
+
             description = input("Enter detailed description: ").strip()
 
             if description.lower() == 'back':
@@ -239,11 +301,33 @@ def run_support_ticket():
         return 'back'
 
 
+def show_ticket_history(ticket_handler):
+    """List the customer's tickets one page at a time."""
+    email = input("Email used for your tickets (press Enter for ayush@techcareassistant.com): ").strip()
+    email = email or "ayush@techcareassistant.com"
+    status = input("Only show tickets with status (e.g. Open, press Enter for all): ").strip()
+
+    page = 1
+    while True:
+        print()
+        response = ticket_handler.handle_history(email, status or None, page=page)
+        print(response.text)
+
+        if "Next page" not in response.suggestions:
+            return
+        more = input("Show more? (yes/no): ").strip().lower()
+        if more not in ['yes', 'y']:
+            return
+        page += 1
+
+
 def run_escalation():
     """Run escalation to a human agent."""
     space()
     print("Escalation to Human Agent")
     space()
+    print("Enter an escalation ID (like ESC-00001) instead of your name to see where it stands.")
+    print("Agents can type 'resolve' followed by an escalation ID to close it.")
     print("Type 'back' to return or 'quit' to exit.")
     space()
 
@@ -264,6 +348,16 @@ def run_escalation():
                 print("Name cannot be empty.")
                 continue
 
+            if EscalationHandler.ESCALATION_ID_PATTERN.fullmatch(name):
+                print()
+                print(escalation_handler.handle_status(name).text)
+                continue
+
+            if name.lower().startswith('resolve '):
+                print()
+                print(escalation_handler.handle_resolve(name[len('resolve '):]).text)
+                continue
+
             phone = input("Your Phone Number: ").strip()
 
             if phone.lower() == 'back':
@@ -2,11 +2,17 @@
 EscalationHandler - Handles escalation to a human agent.
 """
 
-import json
 import os
+import re
 from datetime import datetime
 from typing import Optional
 from src.models.response import Response
+from src.services.escalation_queue import open_escalation_scheduler
+from src.services.id_allocator import open_sequence, sequence_path
+from src.services.journal_store import JournalStore, open_journal
+from src.services.rate_limiter import check as check_rate_limit
+from src.services.sqlite_service_layer import SQLiteServiceLayer, get_service_layer
+from src.services.write_behind import write_behind
 
 
 class EscalationHandler:
@@ -15,16 +21,30 @@ class EscalationHandler:
     Saves customer information and the reason for escalation.
     """
 
-    def __init__(self):
-        self.escalations_file = "data/escalations.json"
-        self._ensure_data_file()
+    # Escalation IDs look like ESC-00001.
+    ESCALATION_ID_PATTERN = re.compile(r"\bESC-\d+\b", re.IGNORECASE)
 
-    def _ensure_data_file(self) -> None:
-        """Ensure the escalation JSON file exists."""
+    def __init__(self, store: Optional[JournalStore] = None, services: Optional[SQLiteServiceLayer] = None):
+        self.escalations_file = "data/escalations.jsonl"
+        if services is None and store is None:
+            services = get_service_layer()
+        self.services = services
+
+        if self.services is not None:
+            # Saved in the shared SQLite database (CHATBOT_DB_PATH).
+            self.store = write_behind(self.services.escalations)
+            self.ids = self.services.sequence("escalations")
+        else:
+            self.store = write_behind(store if store is not None else self._open_store())
+            self.ids = open_sequence(sequence_path(self.store.path), seed=lambda: len(self.store))
+
+        # Pending escalations wait in a shared priority queue until an agent is free.
+        self.scheduler = open_escalation_scheduler(self.store)
+
+    def _open_store(self) -> JournalStore:
+        """Open the escalation journal, migrating an older escalations.json once."""
         os.makedirs("data", exist_ok=True)
-        if not os.path.exists(self.escalations_file):
-            with open(self.escalations_file, 'w') as f:
-                json.dump([], f)
+        return open_journal(self.escalations_file, "escalation_id", legacy_path="data/escalations.json")
 
     def _generate_escalation_id(self) -> str:
         """
@@ -33,13 +53,8 @@ class EscalationHandler:
         Returns:
             str: Escalation ID in the format ESC-XXXXX
         """
-        try:
-            with open(self.escalations_file, 'r') as f:
-                escalations = json.load(f)
-            next_id = len(escalations) + 1
-            return f"ESC-{next_id:05d}"
-        except Exception:
-            return "ESC-00001"
+        next_id = self.ids.next()
+        return f"ESC-{next_id:05d}"
 
     def _validate_phone_number(self, phone: str) -> bool:
         """
@@ -59,9 +74,10 @@ class EscalationHandler:
 
         return cleaned.isdigit() and 10 <= len(cleaned) <= 15
 
-    def _save_escalation(self, customer_name: str, phone: str, reason: str) -> str:
+    def _save_escalation(self, customer_name: str, phone: str, reason: str, customer_tier: str = "standard") -> str:
         """
-        Save an escalation request in the JSON file.
+        Append an escalation request to the escalation journal and queue it
+        for the next free agent.
 
         Returns:
             str: Generated escalation ID
@@ -73,29 +89,104 @@ class EscalationHandler:
             "customer_name": customer_name,
             "phone_number": phone,
             "reason": reason,
+            "customer_tier": customer_tier,
             "status": "Pending",
             "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
 
         try:
-            with open(self.escalations_file, 'r') as f:
-                escalations = json.load(f)
-
-            escalations.append(escalation)
-
-            with open(self.escalations_file, 'w') as f:
-                json.dump(escalations, f, indent=2)
-
+            self.store.append(escalation)
+            self.scheduler.queue.enqueue(escalation)
+            self.scheduler.dispatch()
             return escalation_id
 
         except Exception as e:
             raise Exception(f"Failed to save escalation: {str(e)}")
 
-    def handle(self, customer_name: str, phone: str, reason: Optional[str] = None) -> Response:
+    def resolve_escalation(self, escalation_id: str) -> bool:
+        """
+        Mark an assigned escalation as resolved and give its agent the next one in the queue.
+
+        Returns:
+            bool: False if the escalation is not assigned to an agent
+        """
+        if self.scheduler.complete(escalation_id) is None:
+            return False
+        self.scheduler.dispatch()
+        return True
+
+    def queue_position(self, escalation_id: str) -> Optional[int]:
+        """
+        Place of a waiting escalation in the queue, counted on request.
+
+        Returns:
+            int: 1 for the next escalation an agent will take, or None if it is not waiting
+        """
+        return self.scheduler.queue.position(escalation_id)
+
+    def handle_status(self, escalation_id: str) -> Response:
+        """
+        Tell the customer where an escalation stands: its agent, or its place in the queue.
+        """
+        match = self.ESCALATION_ID_PATTERN.search(escalation_id)
+        escalation = self.store.get(match.group(0).upper()) if match else None
+
+        if escalation is None:
+            return Response(
+                text="I couldn't find that request. Escalation IDs look like ESC-00001.",
+                suggestions=["Speak with an agent", "Return to the main menu."]
+            )
+
+        escalation_id = escalation["escalation_id"]
+        agent = self.scheduler.assigned_agent(escalation_id)
+        position = self.queue_position(escalation_id) if agent is None else None
+
+        message = f"Escalation ID: {escalation_id}\nStatus: {escalation.get('status', 'Pending')}\n"
+        if agent is not None:
+            message += f"Assigned agent: {agent}"
+        elif position is not None:
+            message += f"Place in the queue: {position}"
+        return Response(text=message.rstrip())
+
+    def handle_resolve(self, escalation_id: str) -> Response:
+        """
+        For agents: mark an assigned escalation as resolved, which frees the
+        agent for the next request in the queue.
+        """
+        match = self.ESCALATION_ID_PATTERN.search(escalation_id)
+        escalation_id = match.group(0).upper() if match else escalation_id.strip()
+
+        if not self.scheduler.dispatching:
+            return Response(
+                text="Agents are assigned by another running copy of the assistant. Please resolve it there."
+            )
+
+        if not self.resolve_escalation(escalation_id):
+            return Response(text=f"{escalation_id} is not assigned to an agent, so it cannot be resolved.")
+
+        message = f"{escalation_id} has been marked as resolved."
+        waiting = len(self.scheduler.queue)
+        if waiting:
+            message += f" Requests still waiting for an agent: {waiting}"
+        return Response(text=message)
+
+    def handle(
+        self,
+        customer_name: str,
+        phone: str,
+        reason: Optional[str] = None,
+        customer_tier: str = "standard"
+    ) -> Response:
         """
         Handle the escalation request and return a confirmation response.
 
+        Args:
+            customer_name (str): Customer's name.
+            phone (str): Number the agent should call.
+            reason (str, optional): Why the customer needs an agent.
+            customer_tier (str): "standard", "gold" or "platinum"; higher tiers are served sooner.
+
         Returns:
             Response: A message confirming the escalation
         """
@@ -108,18 +199,32 @@ class EscalationHandler:
                 )
             )
 
+        # Limit requests per phone number, whatever separators it is written with.
+        limited = check_rate_limit("escalations", "".join(c for c in phone if c.isdigit()))
+        if limited is not None:
+            return limited
+
         if not reason:
             reason = "Customer requested support from a human agent"
 
         try:
-            escalation_id = self._save_escalation(customer_name, phone, reason)
+            escalation_id = self._save_escalation(customer_name, phone, reason, customer_tier)
+            agent = self.scheduler.assigned_agent(escalation_id)
 
             message = (
                 f"Your request has been submitted successfully.\n\n"
                 f"Escalation ID: {escalation_id}\n"
                 f"Name: {customer_name}\n"
-                f"Phone Number: {phone}\n\n"
-                f"A human agent will reach out to you soon using the provided contact details.\n"
+                f"Phone Number: {phone}\n"
+            )
+            if agent is not None:
+                message += f"Assigned agent: {agent}\n"
+            elif not self.scheduler.dispatching:
+                message += "Status: Pending\n"
+            else:
+                message += f"Requests waiting for an agent: {len(self.scheduler.queue)}\n"
+            message += (
+                f"\nA human agent will reach out to you soon using the provided contact details.\n"
                 f"Thank you for your patience."
             )
 
@@ -2,12 +2,19 @@
 FAQHandler - Handles frequently asked questions using Ozwell AI.
 """
 
+import hashlib
 import os
-import requests
-from typing import Any
+import re
+from collections import Counter
+from typing import Any, Dict, Generator, Optional, Tuple
 from dotenv import load_dotenv
 from src.models.context import Context
 from src.models.response import Response
+from src.services.async_completion import get_async_client
+from src.services.kb_index import KnowledgeBaseIndex
+from src.services.ozwell_client import OzwellError, OzwellResponseError, OzwellUnavailableError, get_client
+from src.services.response_cache import ResponseCache
+from src.services.settings import env_float, env_int
 
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
@@ -60,26 +67,192 @@ class FAQHandler:
     - View order history
     """
 
-    def __init__(self):
-        """Initialize FAQ handler and load API key."""
+    FAQ_LINKS = ["https://TechCareassistantbot.com/faq", "https://TechCareassistantbo.com/contact"]
+
+    FAQ_SUGGESTIONS = [
+        "What are your operating hours?",
+        "What is your return policy?",
+        "How can I contact support?"
+    ]
+
+    # Counts how many answers came from each path (cache, local, llm, fallback)
+    # across all handlers, so the share of questions that never reach
+    # Ozwell can be reported.
+    path_counts: Counter = Counter()
+
+    # Answers are shared by every FAQHandler in the process, because the
+    # CLI creates a new handler each time the FAQ menu is opened.
+    _shared_cache: Optional[ResponseCache] = None
+
+    # The section index is built once per knowledge base version and shared.
+    _index: Optional[KnowledgeBaseIndex] = None
+    _index_fingerprint: Optional[str] = None
+
+    def __init__(self, cache: Optional[ResponseCache] = None):
+        """
+        Initialize FAQ handler and load API key.
+
+        Args:
+            cache (ResponseCache, optional): Answer cache to use. By default a
+                cache shared across handlers is created, sized by the
+                FAQ_CACHE_SIZE and FAQ_CACHE_TTL environment variables.
+        """
         self.api_key = os.getenv('OZWELL_API_KEY')
         if not self.api_key:
             raise ValueError("OZWELL_API_KEY is missing in the environment variables.")
-        self.ozwell_url = "https://ai.bluehive.com/api/v1/completion"
+        self.client = get_client(self.api_key)
+        self.async_client = get_async_client(self.api_key)
 
-    def handle(self, question: str) -> Response:
+        if cache is None:
+            if FAQHandler._shared_cache is None:
+                FAQHandler._shared_cache = ResponseCache(
+                    max_entries=env_int('FAQ_CACHE_SIZE', 256),
+                    ttl_seconds=env_float('FAQ_CACHE_TTL', 3600.0)
+                )
+            cache = FAQHandler._shared_cache
+        self.cache = cache
+        self._cached_fingerprint: Optional[str] = None
+
+        # Number of knowledge base sections sent to Ozwell with each question.
+        self.top_k = env_int('FAQ_TOP_K', 3)
+
+        # Questions whose every term appears in one section, matched with more
+        # than this confidence, are answered locally without calling Ozwell.
+        # Set to 1 or above to disable.
+        self.local_threshold = env_float('FAQ_LOCAL_THRESHOLD', 0.6)
+
+        # Build the section index up front so the first question does not pay for it.
+        self._get_index(self._knowledge_base_fingerprint())
+
+    @staticmethod
+    def _normalize_question(question: str) -> str:
         """
-        Process an FAQ question using Ozwell AI.
+        Reduce a question to a canonical form for cache lookups.
+        Case, punctuation and extra whitespace are ignored, so
+        "What are your operating hours?" and "what are your  operating hours"
+        share one entry.
+        """
+        question = re.sub(r"[^\w\s]", " ", question.lower())
+        return " ".join(question.split())
 
-        Args:
-            question (str): The customer's question.
+    def _knowledge_base_fingerprint(self) -> str:
+        """
+        Return a short hash of the knowledge base.
+        When the knowledge base text changes, the fingerprint changes with it
+        and every answer generated from the old text is dropped.
+        """
+        fingerprint = hashlib.sha256(self.FAQ_KNOWLEDGE_BASE.encode()).hexdigest()[:16]
+        if fingerprint != self._cached_fingerprint:
+            if self._cached_fingerprint is not None:
+                self.cache.clear()
+            self._cached_fingerprint = fingerprint
+        return fingerprint
+
+    def _get_index(self, fingerprint: str) -> KnowledgeBaseIndex:
+        """
+        Return the section index for the current knowledge base,
+        rebuilding it only when the knowledge base has changed.
+        """
+        if FAQHandler._index is None or FAQHandler._index_fingerprint != fingerprint:
+            FAQHandler._index = KnowledgeBaseIndex(self.FAQ_KNOWLEDGE_BASE)
+            FAQHandler._index_fingerprint = fingerprint
+        return FAQHandler._index
+
+    def _build_knowledge_context(self, question: str, index: KnowledgeBaseIndex) -> str:
+        """
+        Select only the knowledge base sections relevant to the question.
+        If nothing matches, the list of topics is sent instead so the
+        assistant can tell the customer what it is able to help with.
+        """
+        sections = index.search(question, top_k=self.top_k)
+
+        parts = [index.header] if index.header else []
+        if sections:
+            parts.extend(section.to_text() for section in sections)
+        else:
+            parts.append("Topics covered: " + ", ".join(index.titles()))
+
+        return "\n\n".join(parts)
+
+    def _answer_locally(
+        self,
+        question: str,
+        index: KnowledgeBaseIndex,
+        threshold: Optional[float] = None
+    ) -> Optional[Response]:
+        """
+        Answer directly from the knowledge base when the question clearly
+        maps onto one section. Returns None when the match is not confident
+        enough and the question should go to Ozwell instead.
+        """
+        if threshold is None:
+            threshold = self.local_threshold
+
+        # Partly matching questions go to Ozwell, unless it is unavailable (threshold 0).
+        section, confidence = index.best_match(question, full_coverage=threshold > 0)
+        if section is None or confidence <= 0 or confidence <= threshold:
+            return None
+
+        answer = f"Here is what I can tell you about our {section.title.lower()}:\n"
+        answer += "\n".join(f"- {entry}" for entry in section.entries)
+        answer += "\n\nLet me know if there is anything else I can help you with."
+
+        return Response(
+            text=answer,
+            links=list(self.FAQ_LINKS),
+            suggestions=list(self.FAQ_SUGGESTIONS),
+            served_by="local"
+        )
+
+    @classmethod
+    def path_stats(cls) -> Dict[str, Any]:
+        """
+        Report how many answers were served by each path.
 
         Returns:
-            Response: A structured response containing the answer,
-                      helpful links, and suggested follow-up questions.
+            dict: counts per path and the share of answers that did not
+                  need an Ozwell request.
         """
-        try:
-            system_message = f"""
+        total = sum(cls.path_counts.values())
+        offloaded = total - cls.path_counts["llm"]
+        return {
+            "counts": dict(cls.path_counts),
+            "total": total,
+            "llm_offload_ratio": offloaded / total if total else 0.0
+        }
+
+    def _prepare(self, question: str) -> Tuple[Optional[Response], Any, str]:
+        """
+        Run the steps that come before calling Ozwell.
+
+        Returns:
+            tuple: (ready Response or None, cache key, system message).
+                   When a Response is returned the question was answered
+                   from the cache or the knowledge base and no AI call is needed.
+        """
+        fingerprint = self._knowledge_base_fingerprint()
+        cache_key = (fingerprint, self._normalize_question(question))
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            text, links, suggestions = cached
+            self.path_counts["cache"] += 1
+            return Response(
+                text=text,
+                links=list(links),
+                suggestions=list(suggestions),
+                served_by="cache"
+            ), cache_key, ""
+
+        index = self._get_index(fingerprint)
+
+        local_response = self._answer_locally(question, index)
+        if local_response is not None:
+            self.path_counts["local"] += 1
+            return local_response, cache_key, ""
+
+        knowledge_context = self._build_knowledge_context(question, index)
+
+        system_message = f"""
 You are a customer service assistant for Chatbot Service.
 Use the following knowledge base to answer the customer's question clearly and politely.
 
@@ -88,59 +261,173 @@ let the customer know that you do not have that specific detail,
 and suggest reaching out to support for more help.
 
 Knowledge Base:
-{self.FAQ_KNOWLEDGE_BASE}
+{knowledge_context}
 """
+        return None, cache_key, system_message
 
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-
-            payload = {
-                "prompt": question,
-                "systemMessage": system_message,
-                "temperature": 0.7,
-                "maxTokens": 300
-            }
-
-            response = requests.post(self.ozwell_url, headers=headers, json=payload)
-
-            if response.ok:
-                try:
-                    answer = response.json()["choices"][0]["message"]["content"]
-                except Exception as parsing_error:
-                    answer = (
-                        "I received a response from the service, but I was unable to interpret it. "
-                        f"Details: {str(parsing_error)}"
-                    )
-            else:
-                answer = (
-                    "I could not retrieve a response from the AI service at this time. "
-                    f"The service returned status code {response.status_code}."
-                )
+    @staticmethod
+    def _service_error_message(error: OzwellError) -> str:
+        """Turn an Ozwell failure into a message for the customer."""
+        if isinstance(error, OzwellResponseError):
+            return (
+                "I received a response from the service, but I was unable to interpret it. "
+                f"Details: {str(error)}"
+            )
+        return (
+            "I could not retrieve a response from the AI service at this time. "
+            f"{str(error)}"
+        )
 
-            suggestions = [
-                "What are your operating hours?",
-                "What is your return policy?",
-                "How can I contact support?"
+    def _degraded(self, question: str, cache_key: Any, error: OzwellError) -> Response:
+        """
+        Reply when Ozwell could not answer. While the circuit breaker is
+        open, the closest knowledge base section is used even if the match
+        is weaker than the usual local threshold.
+        """
+        if isinstance(error, OzwellUnavailableError):
+            fallback = self._answer_locally(question, self._get_index(cache_key[0]), threshold=0.0)
+            if fallback is not None:
+                fallback.served_by = "fallback"
+                self.path_counts["fallback"] += 1
+                return fallback
+
+        return self._finish(cache_key, self._service_error_message(error), answered=False)
+
+    def _finish(self, cache_key: Any, answer: str, answered: bool) -> Response:
+        """
+        Build the final Response for an AI answer and cache it if it succeeded.
+        """
+        suggestions = list(self.FAQ_SUGGESTIONS)
+        links = list(self.FAQ_LINKS)
+
+        # Only real answers are cached; errors should be retried next time.
+        if answered:
+            self.cache.set(cache_key, (answer, tuple(links), tuple(suggestions)))
+
+        self.path_counts["llm"] += 1
+        return Response(
+            text=answer,
+            links=links,
+            suggestions=suggestions,
+            served_by="llm"
+        )
+
+    @staticmethod
+    def _unexpected_error(error: Exception) -> Response:
+        """Response used when something outside the AI call goes wrong."""
+        return Response(
+            text=(
+                "I was unable to process your question due to an unexpected error. "
+                f"Details: {str(error)}"
+            ),
+            suggestions=[
+                "You may try asking another question.",
+                "You may also contact customer support directly for assistance."
             ]
+        )
 
-            return Response(
-                text=answer,
-                links=["https://TechCareassistantbot.com/faq", "https://TechCareassistantbo.com/contact"],
-                suggestions=suggestions
-            )
+    def handle(self, question: str) -> Response:
+        """
+        Process an FAQ question.
+
+        The answer comes from the answer cache when possible, then from the
+        knowledge base directly for confident matches, and only otherwise
+        from Ozwell AI. Response.served_by records which path was used.
+
+        Args:
+            question (str): The customer's question.
+
+        Returns:
+            Response: A structured response containing the answer,
+                      helpful links, and suggested follow-up questions.
+        """
+        try:
+            ready, cache_key, system_message = self._prepare(question)
+            if ready is not None:
+                return ready
+
+            try:
+                answer = self.client.complete(
+                    prompt=question,
+                    system_message=system_message,
+                    temperature=0.7,
+                    max_tokens=300
+                )
+                return self._finish(cache_key, answer, answered=True)
+            except OzwellError as service_error:
+                return self._degraded(question, cache_key, service_error)
 
         except Exception as e:
-            error_message = (
-                "I was unable to process your question due to an unexpected error. "
-                f"Details: {str(e)}"
-            )
+            return self._unexpected_error(e)
 
-            return Response(
-                text=error_message,
-                suggestions=[
-                    "You may try asking another question.",
-                    "You may also contact customer support directly for assistance."
-                ]
-            )
+    async def handle_async(self, question: str) -> Response:
+        """
+        Process an FAQ question from asyncio code.
+
+        Works like handle(), but the Ozwell call goes through the shared
+        async client, so identical questions asked at the same time by
+        different sessions are answered by a single upstream request.
+        """
+        try:
+            ready, cache_key, system_message = self._prepare(question)
+            if ready is not None:
+                return ready
+
+            try:
+                answer = await self.async_client.complete(
+                    prompt=question,
+                    system_message=system_message,
+                    temperature=0.7,
+                    max_tokens=300
+                )
+                return self._finish(cache_key, answer, answered=True)
+            except OzwellError as service_error:
+                return self._degraded(question, cache_key, service_error)
+
+        except Exception as e:
+            return self._unexpected_error(e)
+
+    def handle_stream(self, question: str) -> Generator[str, None, Response]:
+        """
+        Process an FAQ question, yielding the answer text as it arrives.
+
+        Cached and local answers are yielded as a single chunk. AI answers
+        are yielded piece by piece while Ozwell is still generating them.
+        The complete Response, with links and suggestions, is the
+        generator's return value (StopIteration.value).
+
+        Args:
+            question (str): The customer's question.
+        """
+        try:
+            ready, cache_key, system_message = self._prepare(question)
+            if ready is not None:
+                yield ready.text
+                return ready
+
+            chunks = []
+            try:
+                for chunk in self.client.stream_complete(
+                    prompt=question,
+                    system_message=system_message,
+                    temperature=0.7,
+                    max_tokens=300
+                ):
+                    chunks.append(chunk)
+                    yield chunk
+                return self._finish(cache_key, "".join(chunks), answered=True)
+            except OzwellError as service_error:
+                if not chunks:
+                    response = self._degraded(question, cache_key, service_error)
+                    yield response.text
+                    return response
+
+                # Keep whatever was already shown and explain why it stopped.
+                message = "\n\n" + self._service_error_message(service_error)
+                yield message
+                return self._finish(cache_key, "".join(chunks) + message, answered=False)
+
+        except Exception as e:
+            response = self._unexpected_error(e)
+            yield response.text
+            return response
@@ -2,11 +2,16 @@
 FeedbackHandler - Handles user feedback.
 """
 
-import json
 import os
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional
 from src.models.response import Response
+from src.services.feedback_analytics import open_feedback_analytics
+from src.services.id_allocator import open_sequence, sequence_path
+from src.services.journal_store import JournalStore, open_journal
+from src.services.rate_limiter import check as check_rate_limit
+from src.services.sqlite_service_layer import SQLiteServiceLayer, get_service_layer
+from src.services.write_behind import write_behind
 
 
 class FeedbackHandler:
@@ -15,36 +20,44 @@ class FeedbackHandler:
     Saves the feedback so it can be reviewed later.
     """
 
-    def __init__(self):
-        # Path to the file where all feedback entries will be stored.
-        self.feedback_file = "data/feedback.json"
-        self._ensure_data_file()
-
-    def _ensure_data_file(self):
+    def __init__(self, store: Optional[JournalStore] = None, services: Optional[SQLiteServiceLayer] = None):
+        # Path to the journal where all feedback entries will be stored.
+        self.feedback_file = "data/feedback.jsonl"
+        if services is None and store is None:
+            services = get_service_layer()
+        self.services = services
+
+        if self.services is not None:
+            # Saved in the shared SQLite database (CHATBOT_DB_PATH).
+            self.store = write_behind(self.services.feedback)
+            self.ids = self.services.sequence("feedback")
+        else:
+            self.store = write_behind(store if store is not None else self._open_store())
+            self.ids = open_sequence(sequence_path(self.store.path), seed=lambda: len(self.store))
+
+        # Rating counts for the dashboard, kept next to the stored feedback.
+        self.analytics = open_feedback_analytics(
+            os.path.join(os.path.dirname(self.store.path), "feedback_stats.json"),
+            self.store
+        )
+
+    def _open_store(self) -> JournalStore:
         """
-        Make sure the feedback storage file exists.
-        If this is the first time feedback is being saved, create the file
-        with an empty list inside it.
+        Open the feedback journal, creating the data folder if needed.
+        Entries from an older feedback.json file are moved into the
+        journal the first time it is opened.
         """
         os.makedirs("data", exist_ok=True)
-        if not os.path.exists(self.feedback_file):
-            with open(self.feedback_file, 'w') as f:
-                json.dump([], f)
+        return open_journal(self.feedback_file, "feedback_id", legacy_path="data/feedback.json")
 
     def _generate_feedback_id(self) -> str:
         """
         Create a simple unique ID for each feedback entry.
-        The ID is based on how many feedback entries already exist.
+        The number comes from a counter file shared by every process.
         Example: FB-00001, FB-00002, etc.
         """
-        try:
-            with open(self.feedback_file, 'r') as f:
-                feedbacks = json.load(f)
-                next_id = len(feedbacks) + 1
-                return f"FB-{next_id:05d}"
-        except Exception:
-            # If there's an issue reading the file, fall back to the first ID.
-            return "FB-00001"
+        next_id = self.ids.next()
+        return f"FB-{next_id:05d}"
 
     def _save_feedback(self, customer_name: str, rating: int, comments: str) -> str:
         """
@@ -63,19 +76,22 @@ class FeedbackHandler:
         }
 
         try:
-            with open(self.feedback_file, 'r') as f:
-                feedbacks = json.load(f)
-
-            feedbacks.append(feedback)
-
-            with open(self.feedback_file, 'w') as f:
-                json.dump(feedbacks, f, indent=2)
-
+            # Only the new entry is written; earlier feedback is never rewritten.
+            self.store.append(feedback)
+            self.analytics.add(feedback)
             return feedback_id
 
         except Exception as e:
             raise Exception(f"Failed to save feedback: {str(e)}")
 
+    def dashboard(self, days: int = 30) -> Dict[str, Any]:
+        """
+        Return the feedback statistics: rating histogram, overall and
+        rolling averages, and entries per day. These are kept up to date
+        on every save, so no feedback is read to produce them.
+        """
+        return self.analytics.report(days=days)
+
     def handle(self, customer_name: str, rating: Optional[int] = None, comments: Optional[str] = None) -> Response:
         """
         Process a feedback submission from a customer.
@@ -92,6 +108,12 @@ class FeedbackHandler:
                 text="The rating should be a number between 1 and 5."
             )
 
+        # Refuse floods of feedback from the same customer before anything is saved.
+        # Invalid submissions above never use up the customer's quota.
+        limited = check_rate_limit("feedback", customer_name)
+        if limited is not None:
+            return limited
+
         # If no rating is provided, we assume a neutral rating.
         if rating is None:
             rating = 3
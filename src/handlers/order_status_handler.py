@@ -3,11 +3,18 @@ OrderStatusHandler - Handles order status inquiries using Ozwell AI.
 """
 
 import os
-import requests
-from typing import Any, Dict, Optional
+import re
+from collections import Counter
+from typing import Any, Dict, Generator, Iterable, List, Optional, Tuple
 from dotenv import load_dotenv
 from src.models.context import Context
 from src.models.response import Response
+from src.services.async_completion import get_async_client
+from src.services.order_templates import is_routine_query, render_status
+from src.services.order_repository import InMemoryOrderRepository, OrderRepository, SQLiteOrderRepository, order_version
+from src.services.ozwell_client import OzwellError, get_client
+from src.services.response_cache import ResponseCache
+from src.services.sqlite_service_layer import SQLiteServiceLayer, get_service_layer
 
 # Load environment variables from the .env file
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
@@ -81,172 +88,485 @@ class OrderStatusHandler:
         }
     }
 
-    def __init__(self):
+    # Order IDs look like ORD-12345.
+    ORDER_ID_PATTERN = re.compile(r"\bORD-\d+\b", re.IGNORECASE)
+
+    # Counts how many replies came from each path (template, cache, llm,
+    # fallback) across all handlers, so the share handled without Ozwell
+    # can be reported.
+    path_counts: Counter = Counter()
+
+    # Ozwell replies are shared by every OrderStatusHandler in the process.
+    _shared_cache: Optional[ResponseCache] = None
+
+    def __init__(
+        self,
+        repository: Optional[OrderRepository] = None,
+        use_templates: bool = True,
+        cache: Optional[ResponseCache] = None,
+        services: Optional[SQLiteServiceLayer] = None
+    ):
         """
         Load the API key and prepare the handler.
         The API key is required to communicate with Ozwell AI.
+
+        Args:
+            repository (OrderRepository, optional): Where orders are looked up.
+                By default, the SQLite database named by ORDERS_DB_PATH is
+                used, then the orders table of the service layer when one is
+                given or CHATBOT_DB_PATH is set (filled with the sample
+                orders while it is empty), otherwise the built-in sample
+                orders.
+            use_templates (bool): Answer plain status questions from local
+                templates instead of asking Ozwell.
+            cache (ResponseCache, optional): Cache for Ozwell replies. By default
+                a cache shared across handlers is created, sized by the
+                ORDER_CACHE_SIZE and ORDER_CACHE_TTL environment variables.
+            services (SQLiteServiceLayer, optional): Shared service layer whose
+                orders table is used.
         """
         self.api_key = os.getenv('OZWELL_API_KEY')
         if not self.api_key:
             raise ValueError("OZWELL_API_KEY is missing from environment variables.")
-        self.ozwell_url = "https://ai.bluehive.com/api/v1/completion"
+        self.client = get_client(self.api_key)
+        self.async_client = get_async_client(self.api_key)
+
+        if repository is None and services is None:
+            services = get_service_layer()
+
+        if repository is None:
+            db_path = os.getenv('ORDERS_DB_PATH')
+            if db_path:
+                # An explicit order database always wins.
+                repository = SQLiteOrderRepository(db_path)
+            elif services is not None:
+                repository = services.orders
+                # A new shared database starts with the sample orders.
+                if not len(repository):
+                    repository.bulk_load(self.ORDERS_DB.values())
+            else:
+                repository = InMemoryOrderRepository(self.ORDERS_DB)
+        self.repository = repository
+        self.use_templates = use_templates
+
+        if cache is None:
+            if OrderStatusHandler._shared_cache is None:
+                OrderStatusHandler._shared_cache = ResponseCache(
+                    max_entries=int(os.getenv('ORDER_CACHE_SIZE', '1024')),
+                    ttl_seconds=float(os.getenv('ORDER_CACHE_TTL', '86400'))
+                )
+            cache = OrderStatusHandler._shared_cache
+        self.cache = cache
+
+        # Replies are tagged with their order IDs, so a change to an order
+        # drops its cached replies straight away.
+        self.repository.add_listener(self.cache.invalidate_tag)
+
+    def _extract_order_ids(self, query: str) -> List[str]:
+        """
+        Find every order ID in the user's message, in the order they appear.
+        A single regular expression pass finds all ORD-XXXXX patterns.
+        """
+        order_ids = (match.upper() for match in self.ORDER_ID_PATTERN.findall(query))
+        return list(dict.fromkeys(order_ids))
 
     def _extract_order_id(self, query: str) -> Optional[str]:
         """
         Try to find an order ID in the user's message.
-        We simply search for a known order ID pattern inside the text.
+        Returns the first one, or None if there is none.
         """
-        query_upper = query.upper()
-        for order_id in self.ORDERS_DB:
-            if order_id in query_upper:
-                return order_id
-        return None
+        order_ids = self._extract_order_ids(query)
+        return order_ids[0] if order_ids else None
 
     def _get_order_info(self, order_id: str) -> Optional[Dict[str, Any]]:
         """
-        Look up an order in the local database.
+        Look up an order in the order repository.
         Returns the order info if found, otherwise None.
         """
-        return self.ORDERS_DB.get(order_id)
+        return self.repository.get(order_id)
+
+    # Guides the AI when it writes an order update.
+    SYSTEM_MESSAGE = (
+        "You are a customer service assistant for TechShop Inc. "
+        "Use the order information provided to give a clear and friendly update. "
+        "Keep the explanation helpful and concise. "
+        "If the order has shipped, include tracking details. "
+        "If it was delivered, acknowledge it. "
+        "If it is still processing or was cancelled, explain it politely."
+    )
+
+    def _lookup(self, query: str) -> Tuple[Optional[Response], List[Dict[str, Any]], List[str]]:
+        """
+        Find the orders a query is about. All of them are fetched from the
+        repository in one batched call.
+
+        Returns:
+            tuple: (error Response, [], []) when no order can be found,
+                   otherwise (None, found orders, IDs that were not found).
+        """
+        # Identify which orders the user is asking about.
+        order_ids = self._extract_order_ids(query)
+
+        if not order_ids:
+            # User didn't provide a recognizable order ID.
+            return Response(
+                text=(
+                    "I couldn't find an order number in your message. "
+                    "Please include the order ID in the format ORD-XXXXX so I can check the status for you."
+                ),
+                suggestions=[
+                    "Check order ORD-12345",
+                    "What is the status of ORD-67890?",
+                    "Track my order ORD-11111"
+                ]
+            ), [], []
+
+        # Retrieve details for the identified orders.
+        found = self.repository.get_many(order_ids)
+        orders = [found[order_id] for order_id in order_ids if order_id in found]
+        missing = [order_id for order_id in order_ids if order_id not in found]
+
+        if not orders:
+            # The order IDs were found in text but not in our database.
+            return Response(
+                text=(
+                    f"I couldn't locate order {', '.join(missing)} in our records. "
+                    "Please verify the number and try again. "
+                    "If the issue continues, our support team can assist you."
+                ),
+                links=["https://techshop.com/contact"],
+                suggestions=[
+                    "Try a different order number",
+                    "Contact customer support"
+                ]
+            ), [], []
+
+        return None, orders, missing
+
+    @staticmethod
+    def _order_context(order_info: Dict[str, Any]) -> str:
+        """Convert order info into a readable context for the AI."""
+        order_context = (
+            f"Order Information:\n"
+            f"- Order ID: {order_info['order_id']}\n"
+            f"- Status: {order_info['status']}\n"
+            f"- Items: {', '.join(order_info['items'])}\n"
+            f"- Total: {order_info['total']}\n"
+            f"- Order Date: {order_info['order_date']}\n"
+        )
+
+        if order_info.get('estimated_delivery'):
+            order_context += f"- Estimated Delivery: {order_info['estimated_delivery']}\n"
+
+        if order_info.get('delivery_date'):
+            order_context += f"- Delivered On: {order_info['delivery_date']}\n"
+
+        if order_info.get('tracking_number'):
+            order_context += f"- Tracking Number: {order_info['tracking_number']}\n"
+            order_context += f"- Carrier: {order_info['carrier']}\n"
+
+        if order_info.get('cancellation_reason'):
+            order_context += f"- Cancellation Reason: {order_info['cancellation_reason']}\n"
+            order_context += f"- Refund Status: {order_info['refund_status']}\n"
+
+        return order_context
+
+    def _build_prompt(self, query: str, orders: List[Dict[str, Any]]) -> str:
+        """Build one AI prompt covering every order in the query."""
+        order_context = "\n".join(self._order_context(order_info) for order_info in orders)
+        subject = "this order" if len(orders) == 1 else "each of these orders"
+        return f"User asked: {query}\n\n{order_context}\n\nGive a friendly explanation about {subject}."
+
+    @staticmethod
+    def _fallback_answer(orders: List[Dict[str, Any]]) -> str:
+        """Plain status lines used when the AI service cannot help."""
+        lines = []
+        for order_info in orders:
+            answer = f"Order {order_info['order_id']} is currently listed as {order_info['status']}."
+            if order_info.get('tracking_number'):
+                answer += f" Tracking number: {order_info['tracking_number']}."
+            lines.append(answer)
+        return "\n".join(lines)
+
+    @staticmethod
+    def _with_missing(answer: str, missing: List[str]) -> str:
+        """Mention any requested orders that could not be found."""
+        if not missing:
+            return answer
+        return (
+            f"{answer}\n\nI couldn't locate {', '.join(missing)} in our records. "
+            "Please verify those numbers and try again."
+        )
+
+    def _query_class(self, query: str) -> str:
+        """
+        Reduce a query to what it asks, without the order IDs. Every plain
+        status question ("where is ...", "track ...") falls in one class,
+        so they share a cached reply.
+        """
+        if is_routine_query(query, self.ORDER_ID_PATTERN):
+            return "status"
+        query = re.sub(r"[^\w\s]", " ", self.ORDER_ID_PATTERN.sub(" ", query).lower())
+        return " ".join(query.split())
+
+    def _cache_key(self, query: str, orders: List[Dict[str, Any]]) -> Tuple:
+        """
+        Key for a cached reply: each order with a hash of its record, plus
+        the query class. Any change to an order gives a different key, even
+        when the change was made outside this process.
+        """
+        versions = tuple((order_info['order_id'], order_version(order_info)) for order_info in orders)
+        return versions, self._query_class(query)
+
+    def _remember(self, cache_key: Tuple, orders: List[Dict[str, Any]], answer: str) -> None:
+        """Cache an Ozwell reply, tagged with the orders it describes."""
+        self.cache.set(cache_key, answer, tags=[order_info['order_id'] for order_info in orders])
+
+    def _render_locally(self, query: str, orders: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        Render the reply from status templates when the query is a plain
+        status lookup. Returns None when the AI is needed, for example when
+        the customer also asks something else about the order.
+        """
+        if not self.use_templates or not is_routine_query(query, self.ORDER_ID_PATTERN):
+            return None
+
+        replies = [render_status(order_info) for order_info in orders]
+        if any(reply is None for reply in replies):
+            return None
+        return "\n\n".join(replies)
+
+    @classmethod
+    def path_stats(cls) -> Dict[str, Any]:
+        """
+        Report how many replies were served by each path.
+
+        Returns:
+            dict: counts per path and the share of replies that did not
+                  need an Ozwell request.
+        """
+        total = sum(cls.path_counts.values())
+        offloaded = total - cls.path_counts["llm"]
+        return {
+            "counts": dict(cls.path_counts),
+            "total": total,
+            "llm_offload_ratio": offloaded / total if total else 0.0
+        }
+
+    def _build_response(self, orders: List[Dict[str, Any]], answer: str, served_by: str) -> Response:
+        """Wrap an answer with the links and suggestions for these orders."""
+        # Prepare suggestions based on what is relevant for these orders.
+        suggestions = []
+        links = []
+        for order_info in orders:
+            if order_info.get('tracking_number'):
+                suggestions.append(f"Track package {order_info['tracking_number']}")
+                links.append(f"https://www.ups.com/track?tracknum={order_info['tracking_number']}")
+
+        suggestions.extend([
+            "Check another order",
+            "Contact customer support"
+        ])
+
+        # Add helpful links.
+        links.append("https://techshop.com/orders")
+
+        self.path_counts[served_by] += 1
+        return Response(
+            text=answer,
+            links=links,
+            suggestions=suggestions[:3],
+            served_by=served_by
+        )
+
+    @staticmethod
+    def _unexpected_error(error: Exception) -> Response:
+        """Catch-all reply for unexpected errors, worded in a friendly manner."""
+        return Response(
+            text=(
+                "Something went wrong while trying to check your order. "
+                f"Here are the details: {str(error)}"
+            ),
+            suggestions=["Try again", "Contact support"]
+        )
 
     def handle(self, query: str) -> Response:
         """
-        Process a user request about the status of an order.
+        Process a user request about the status of one or more orders.
 
         Steps:
-        1. Try to find the order ID in the query.
-        2. Retrieve the order information if it exists.
-        3. Use Ozwell AI to generate a friendly explanation of the order status.
+        1. Find every order ID in the query.
+        2. Retrieve the order information for all of them in one lookup.
+        3. Answer plain status questions from local templates, and use
+           Ozwell AI to write one combined reply only when the customer
+           asks more. Ozwell replies are cached until an order changes.
         4. Provide suggestions and links for follow-up actions.
+
+        Response.served_by records whether the reply came from a
+        template, the reply cache, Ozwell ("llm"), or the plain fallback.
         """
         try:
-            # Identify which order the user is asking about.
-            order_id = self._extract_order_id(query)
-
-            if not order_id:
-                # User didn't provide a recognizable order ID.
-                return Response(
-                    text=(
-                        "I couldn't find an order number in your message. "
-                        "Please include the order ID in the format ORD-XXXXX so I can check the status for you."
-                    ),
-                    suggestions=[
-                        "Check order ORD-12345",
-                        "What is the status of ORD-67890?",
-                        "Track my order ORD-11111"
-                    ]
-                )
+            error_response, orders, missing = self._lookup(query)
+            if error_response is not None:
+                return error_response
 
-            # Retrieve details for the identified order.
-            order_info = self._get_order_info(order_id)
-
-            if not order_info:
-                # The order ID was found in text but not in our database.
-                return Response(
-                    text=(
-                        f"I couldn't locate order {order_id} in our records. "
-                        "Please verify the number and try again. "
-                        "If the issue continues, our support team can assist you."
-                    ),
-                    links=["https://techshop.com/contact"],
-                    suggestions=[
-                        "Try a different order number",
-                        "Contact customer support"
-                    ]
+            answer = self._render_locally(query, orders)
+            if answer is not None:
+                return self._build_response(orders, self._with_missing(answer, missing), "template")
+
+            # Reuse an earlier reply if these orders have not changed since.
+            cache_key = self._cache_key(query, orders)
+            answer = self.cache.get(cache_key)
+            if answer is not None:
+                return self._build_response(orders, self._with_missing(answer, missing), "cache")
+
+            # Call the AI service through the shared pooled client.
+            try:
+                answer = self.client.complete(
+                    prompt=self._build_prompt(query, orders),
+                    system_message=self.SYSTEM_MESSAGE,
+                    temperature=0.7,
+                    max_tokens=250 * len(orders)
                 )
+            except OzwellError:
+                # If the AI call fails or its reply is unreadable, provide a simple fallback.
+                answer = self._with_missing(self._fallback_answer(orders), missing)
+                return self._build_response(orders, answer, "fallback")
 
-            # Build a system message to guide the AI.
-            system_message = (
-                "You are a customer service assistant for TechShop Inc. "
-                "Use the order information provided to give a clear and friendly update. "
-                "Keep the explanation helpful and concise. "
-                "If the order has shipped, include tracking details. "
-                "If it was delivered, acknowledge it. "
-                "If it is still processing or was cancelled, explain it politely."
-            )
-
-            # Convert order info into a readable context for the AI.
-            order_context = (
-                f"Order Information:\n"
-                f"- Order ID: {order_info['order_id']}\n"
-                f"- Status: {order_info['status']}\n"
-                f"- Items: {', '.join(order_info['items'])}\n"
-                f"- Total: {order_info['total']}\n"
-                f"- Order Date: {order_info['order_date']}\n"
-            )
-
-            if order_info.get('estimated_delivery'):
-                order_context += f"- Estimated Delivery: {order_info['estimated_delivery']}\n"
-
-            if order_info.get('delivery_date'):
-                order_context += f"- Delivered On: {order_info['delivery_date']}\n"
+            self._remember(cache_key, orders, answer)
+            return self._build_response(orders, self._with_missing(answer, missing), "llm")
 
-            if order_info.get('tracking_number'):
-                order_context += f"- Tracking Number: {order_info['tracking_number']}\n"
-                order_context += f"- Carrier: {order_info['carrier']}\n"
-
-            if order_info.get('cancellation_reason'):
-                order_context += f"- Cancellation Reason: {order_info['cancellation_reason']}\n"
-                order_context += f"- Refund Status: {order_info['refund_status']}\n"
-
-            # Build the request for Ozwell AI.
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-
-            payload = {
-                "prompt": f"User asked: {query}\n\n{order_context}\n\nGive a friendly explanation about this order.",
-                "systemMessage": system_message,
-                "temperature": 0.7,
-                "maxTokens": 250
-            }
-
-            # Call the AI service.
-            ai_response = requests.post(self.ozwell_url, headers=headers, json=payload)
-
-            if ai_response.ok:
-                # Try to extract the AI-written message.
-                try:
-                    answer = ai_response.json()["choices"][0]["message"]["content"]
-                except Exception:
-                    # If AI response format is unexpected, fall back.
-                    answer = f"Order {order_id} is currently listed as {order_info['status']}."
-                    if order_info.get('tracking_number'):
-                        answer += f" Tracking number: {order_info['tracking_number']}."
+        except Exception as e:
+            return self._unexpected_error(e)
+
+    def handle_many(self, order_ids: Iterable[str]) -> Dict[str, Response]:
+        """
+        Look up many orders at once for integrations that poll statuses.
+
+        All orders are fetched in one batched repository call and every
+        reply is rendered locally, without calling Ozwell.
+
+        Args:
+            order_ids: Order IDs such as "ORD-12345".
+
+        Returns:
+            dict: A Response per requested order ID, in request order.
+        """
+        order_ids = list(dict.fromkeys(order_id.strip().upper() for order_id in order_ids))
+        found = self.repository.get_many(order_ids)
+
+        results: Dict[str, Response] = {}
+        for order_id in order_ids:
+            order_info = found.get(order_id)
+            if order_info is None:
+                results[order_id] = Response(
+                    text=f"I couldn't locate order {order_id} in our records.",
+                    links=["https://techshop.com/contact"]
+                )
+                continue
+
+            answer = render_status(order_info) if self.use_templates else None
+            if answer is not None:
+                results[order_id] = self._build_response([order_info], answer, "template")
             else:
-                # If AI call fails, provide a simple fallback.
-                answer = f"Order {order_id} is currently listed as {order_info['status']}."
-                if order_info.get('tracking_number'):
-                    answer += f" Tracking number: {order_info['tracking_number']}."
+                results[order_id] = self._build_response([order_info], self._fallback_answer([order_info]), "fallback")
 
-            # Prepare suggestions based on what is relevant for this order.
-            suggestions = []
-            if order_info.get('tracking_number'):
-                suggestions.append(f"Track package {order_info['tracking_number']}")
-            suggestions.extend([
-                "Check another order",
-                "Contact customer support"
-            ])
+        return results
 
-            # Add helpful links.
-            links = []
-            if order_info.get('tracking_number'):
-                links.append(f"https://www.ups.com/track?tracknum={order_info['tracking_number']}")
-            links.append("https://techshop.com/orders")
+    async def handle_async(self, query: str) -> Response:
+        """
+        Process an order status request from asyncio code.
 
-            return Response(
-                text=answer,
-                links=links,
-                suggestions=suggestions[:3]
-            )
+        Works like handle(), but the Ozwell call goes through the shared
+        async client, so identical requests in flight at the same time
+        are answered by a single upstream call.
+        """
+        try:
+            error_response, orders, missing = self._lookup(query)
+            if error_response is not None:
+                return error_response
+
+            answer = self._render_locally(query, orders)
+            if answer is not None:
+                return self._build_response(orders, self._with_missing(answer, missing), "template")
+
+            cache_key = self._cache_key(query, orders)
+            answer = self.cache.get(cache_key)
+            if answer is not None:
+                return self._build_response(orders, self._with_missing(answer, missing), "cache")
+
+            try:
+                answer = await self.async_client.complete(
+                    prompt=self._build_prompt(query, orders),
+                    system_message=self.SYSTEM_MESSAGE,
+                    temperature=0.7,
+                    max_tokens=250 * len(orders)
+                )
+            except OzwellError:
+                answer = self._with_missing(self._fallback_answer(orders), missing)
+                return self._build_response(orders, answer, "fallback")
+
+            self._remember(cache_key, orders, answer)
+            return self._build_response(orders, self._with_missing(answer, missing), "llm")
 
         except Exception as e:
-            # Catch unexpected errors and respond in a friendly manner.
-            return Response(
-                text=(
-                    "Something went wrong while trying to check your order. "
-                    f"Here are the details: {str(e)}"
-                ),
-                suggestions=["Try again", "Contact support"]
-            )
+            return self._unexpected_error(e)
+
+    def handle_stream(self, query: str) -> Generator[str, None, Response]:
+        """
+        Process an order status request, yielding the answer text as it arrives.
+
+        The complete Response, with links and suggestions, is the
+        generator's return value (StopIteration.value).
+        """
+        try:
+            error_response, orders, missing = self._lookup(query)
+            if error_response is not None:
+                yield error_response.text
+                return error_response
+
+            answer = self._render_locally(query, orders)
+            if answer is not None:
+                answer = self._with_missing(answer, missing)
+                yield answer
+                return self._build_response(orders, answer, "template")
+
+            cache_key = self._cache_key(query, orders)
+            answer = self.cache.get(cache_key)
+            if answer is not None:
+                answer = self._with_missing(answer, missing)
+                yield answer
+                return self._build_response(orders, answer, "cache")
+
+            chunks = []
+            served_by = "llm"
+            try:
+                for chunk in self.client.stream_complete(
+                    prompt=self._build_prompt(query, orders),
+                    system_message=self.SYSTEM_MESSAGE,
+                    temperature=0.7,
+                    max_tokens=250 * len(orders)
+                ):
+                    chunks.append(chunk)
+                    yield chunk
+            except OzwellError:
+                # Fall back to the plain status lines, after whatever was already shown.
+                fallback = ("\n\n" if chunks else "") + self._fallback_answer(orders)
+                chunks.append(fallback)
+                served_by = "fallback"
+                yield fallback
+
+            if served_by == "llm":
+                self._remember(cache_key, orders, "".join(chunks))
+
+            if missing:
+                note = self._with_missing("", missing)
+                chunks.append(note)
+                yield note
+
+            return self._build_response(orders, "".join(chunks), served_by)
+
+        except Exception as e:
+            response = self._unexpected_error(e)
+            yield response.text
+            return response
@@ -3,89 +3,82 @@ PasswordResetHandler - Handles password reset requests.
 """
 
 import os
-import json
-import hashlib
 from typing import Dict, Optional
 from src.models.context import Context
 from src.models.response import Response
+from src.services.breached_passwords import open_breached_filter
+from src.services.credential_store import CredentialStore, open_credential_store
+from src.services.password_hasher import PasswordHasher, get_password_hasher
+from src.services.rate_limiter import check as check_rate_limit
+from src.services.sqlite_service_layer import SQLiteServiceLayer, get_service_layer
 
 
 class PasswordResetHandler:
     """
-    Manages password reset requests for a single configured user.
-    This version simulates a real password reset system by storing
-    hashed passwords in a local JSON file.
+    Manages password reset requests for any user in the credential store.
+    Password hashes are kept per user in SQLite, so a reset only
+    touches that user's row.
     """
 
-    # The user this handler manages. In a real system,
-    # this would come from a database or authentication service.
+    # The demo user, created with a default password when the store is new.
     USER_NAME = "Ayush Dhoundiyal"
     USER_ID = "ayush.dhoundiyal"
 
-    def __init__(self):
-        """
-        Set up the handler by preparing the password file location.
-        If the file does not already exist, we create it with a default password.
-        """
-        self.password_file = os.path.join(
-            os.path.dirname(__file__),
-            '..',
-            '..',
-            'data',
-            'passwords.json'
-        )
+    def __init__(
+        self,
+        credentials: Optional[CredentialStore] = None,
+        hasher: Optional[PasswordHasher] = None,
+        services: Optional[SQLiteServiceLayer] = None
+    ):
+        """
+        Set up the handler by opening the credential store.
+        If the store is new, users from an older data/passwords.json are
+        imported, or the demo user is created with a default password.
+
+        Args:
+            credentials (CredentialStore, optional): Where password hashes are kept
+                (default data/credentials.db, or the CHATBOT_DB_PATH database).
+            hasher (PasswordHasher, optional): Hashing service (default: the shared one).
+            services (SQLiteServiceLayer, optional): Shared database to keep credentials in.
+        """
+        data_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+        self.password_file = os.path.join(data_dir, 'passwords.json')
+
+        # Hashing is slow on purpose, so it runs in a shared pool of worker processes.
+        self.hasher = hasher or get_password_hasher()
+
+        if credentials is None:
+            if services is None:
+                services = get_service_layer()
+            db_path = services.db_path if services is not None else os.path.join(data_dir, 'credentials.db')
+            credentials = open_credential_store(
+                db_path,
+                legacy_path=self.password_file,
+                names={self.USER_ID: self.USER_NAME}
+            )
+        self.credentials = credentials
 
-        # Make sure the directory exists before writing to it
-        os.makedirs(os.path.dirname(self.password_file), exist_ok=True)
+        if len(self.credentials) == 0:
+            self._add_default_user()
 
-        # Create the file if it does not already exist
-        if not os.path.exists(self.password_file):
-            self._initialize_password_file()
+        # Offline list of breached and common passwords; the check is skipped if none has been built.
+        self.breached_passwords = open_breached_filter(
+            os.getenv('BREACHED_PASSWORDS_PATH') or os.path.join(data_dir, 'breached_passwords.bloom')
+        )
 
-    def _initialize_password_file(self):
+    def _add_default_user(self):
         """
-        Create a new password file with a default password.
-        This only runs when the file does not exist yet.
+        Create the demo user with a default password.
+        This only runs when the store has no users yet.
         """
-        initial_data = {
-            self.USER_ID: self._hash_password("TechShop2025!")
-        }
-        with open(self.password_file, 'w') as f:
-            json.dump(initial_data, f, indent=2)
+        self.credentials.add_user(self.USER_ID, self.USER_NAME, self._hash_password("TechShop2025!"))
 
     def _hash_password(self, password: str) -> str:
         """
-        Convert a plain password into a SHA-256 hash.
+        Convert a plain password into a salted scrypt (or PBKDF2) hash.
         Storing hashes instead of raw passwords is standard security practice.
         """
-        return hashlib.sha256(password.encode()).hexdigest()
-
-    def _load_passwords(self) -> Dict[str, str]:
-        """
-        Load all stored password hashes from the file.
-
-        If the file is missing or corrupted,
-        it is recreated with a default entry.
-        """
-        try:
-            with open(self.password_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            # Recreate the file if it is missing or unreadable
-            self._initialize_password_file()
-            return {self.USER_ID: self._hash_password("TechShop2025!")}
-
-    def _save_passwords(self, passwords: Dict[str, str]) -> bool:
-        """
-        Save updated password hashes back to the file.
-        Returns True if the save was successful.
-        """
-        try:
-            with open(self.password_file, 'w') as f:
-                json.dump(passwords, f, indent=2)
-            return True
-        except Exception:
-            return False
+        return self.hasher.hash(password)
 
     def _validate_password(self, password: str) -> tuple[bool, Optional[str]]:
         """
@@ -104,38 +97,41 @@ class PasswordResetHandler:
         if not any(c.isdigit() for c in password):
             return False, "Your password must include at least one number."
 
-        return True, None
-
-    def reset_password(self, new_password: str) -> Response:
-        """
-        Update the password for the configured user.
-        Runs validation, saves the new password,
-        and returns a human-readable result.
-        """
+        if self.breached_passwords is not None and password in self.breached_passwords:
+            return False, "This password appears in a list of breached or common passwords. Please choose a different one."
 
-        # First, check if the password meets requirements
-        is_valid, error_message = self._validate_password(new_password)
+        return True, None
 
-        if not is_valid:
-            return Response(
-                text=f"Your password could not be updated. {error_message}",
-                suggestions=[
-                    "Try a stronger password.",
-                    "Ensure it contains uppercase letters, lowercase letters, and numbers."
-                ]
-            )
+    def _invalid_password_response(self, error_message: str) -> Response:
+        return Response(
+            text=f"Your password could not be updated. {error_message}",
+            suggestions=[
+                "Try a stronger password.",
+                "Ensure it contains uppercase letters, lowercase letters, and numbers."
+            ]
+        )
 
-        # Load the current password data
-        passwords = self._load_passwords()
+    def _unknown_user_response(self, user_id: str) -> Response:
+        return Response(
+            text=f"We could not find an account with the user ID '{user_id}'.",
+            suggestions=["Check the user ID and try again.", "Contact support"]
+        )
 
-        # Replace the old password hash with the new one
-        passwords[self.USER_ID] = self._hash_password(new_password)
+    def _store_hash(self, user: Dict[str, str], password_hash: str) -> Response:
+        """
+        Save the new hash for one user and describe the result.
+        An old unsalted SHA-256 hash is replaced here, so every user is
+        moved to the new scheme the next time they reset their password.
+        """
+        try:
+            saved = self.credentials.set_password(user["user_id"], password_hash)
+        except Exception:
+            saved = False
 
-        # Attempt to save the updated file
-        if self._save_passwords(passwords):
+        if saved:
             return Response(
                 text=(
-                    f"The password for {self.USER_NAME} has been updated successfully.\n\n"
+                    f"The password for {user['name']} has been updated successfully.\n\n"
                     "Your new password is now securely stored and ready to use."
                 ),
                 links=["https://techshop.com/login"],
@@ -154,15 +150,64 @@ class PasswordResetHandler:
                 suggestions=["Try again", "Contact support"]
             )
 
-    def handle(self) -> Response:
+    def reset_password(self, user_id: str, new_password: str) -> Response:
+        """
+        Update the password for a user.
+        Runs validation, saves the new password,
+        and returns a human-readable result.
+        """
+
+        # Refuse repeated attempts for the same user before doing any work
+        limited = check_rate_limit("password_reset", user_id)
+        if limited is not None:
+            return limited
+
+        # Then check if the password meets requirements
+        is_valid, error_message = self._validate_password(new_password)
+
+        if not is_valid:
+            return self._invalid_password_response(error_message)
+
+        user = self.credentials.get(user_id)
+        if user is None:
+            return self._unknown_user_response(user_id)
+
+        return self._store_hash(user, self._hash_password(new_password))
+
+    def verify_password(self, user_id: str, password: str) -> bool:
+        """
+        Check a password against a user's stored hash.
+        Older unsalted SHA-256 hashes are still accepted. When the password
+        is right but its hash is legacy, or was made with another algorithm
+        or cost than the current one, it is hashed again and saved.
+        """
+        user = self.credentials.get(user_id)
+        if user is None or not self.hasher.verify(password, user["password_hash"]):
+            return False
+
+        if self.hasher.needs_upgrade(user["password_hash"]):
+            try:
+                self.credentials.set_password(
+                    user["user_id"], self._hash_password(password), if_hash=user["password_hash"]
+                )
+            except Exception:
+                # The password was still right; the upgrade is retried on the next check.
+                pass
+        return True
+
+    def handle(self, user_id: Optional[str] = None) -> Response:
         """
         Provide an introduction message explaining whose password
         is being managed and the requirements for creating a new one.
         """
+        user = self.credentials.get(user_id or self.USER_ID)
+        if user is None:
+            return self._unknown_user_response(user_id)
+
         return Response(
             text=(
-                f"Password Reset for {self.USER_NAME}\n\n"
-                f"User ID: {self.USER_ID}\n\n"
+                f"Password Reset for {user['name']}\n\n"
+                f"User ID: {user['user_id']}\n\n"
                 "You will now be asked to create a new password.\n\n"
                 "Password Requirements:\n"
                 "- Minimum of 8 characters\n"
@@ -174,4 +219,4 @@ class PasswordResetHandler:
                 "Enter your new password when prompted.",
                 "Return to the main menu."
             ]
-        )
\ No newline at end of file
+        )
@@ -1,72 +1,120 @@
 """
-TicketHandler - Handles support ticket creation.
+TicketHandler - Handles support ticket creation and ticket status lookups.
 """
 
+import math
 import os
-import json
+import re
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 from src.models.context import Context
 from src.models.response import Response
+from src.services.id_allocator import open_sequence, sequence_path
+from src.services.journal_store import JournalStore, open_journal
+from src.services.rate_limiter import check as check_rate_limit
+from src.services.sqlite_service_layer import SQLiteServiceLayer, get_service_layer
+from src.services.ticket_index import TicketIndex, open_ticket_index
+from src.services.ticket_search import open_ticket_search
+from src.services.write_behind import WriteBehindStore, write_behind
 
 
 class TicketHandler:
     """
-    Handles requests for creating support tickets.
-    Tickets are stored in a local JSON file to simulate
+    Handles requests for creating support tickets and for reading them back.
+    Tickets are stored in a local append-only journal to simulate
     how a real support system might keep records.
     """
 
-    def __init__(self):
+    # Ticket IDs look like TKT-00001.
+    TICKET_ID_PATTERN = re.compile(r"\bTKT-\d+\b", re.IGNORECASE)
+
+    def __init__(self, store: Optional[JournalStore] = None, services: Optional[SQLiteServiceLayer] = None):
         """
-        Prepare the storage file for support tickets.
-        Makes sure the data directory exists and that
-        the JSON file is created if this is the first ticket.
+        Prepare the storage for support tickets.
+        Makes sure the data directory exists and opens the ticket
+        journal. Tickets from an older tickets.json file are moved
+        into the journal the first time it is opened.
+
+        Args:
+            store (JournalStore, optional): Where tickets are saved. By default
+                data/tickets.jsonl, shared by every TicketHandler.
+            services (SQLiteServiceLayer, optional): Save tickets in this SQLite
+                service layer instead. Used by default when CHATBOT_DB_PATH is set.
         """
         self.data_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
-        self.tickets_file = os.path.join(self.data_dir, 'tickets.json')
+        self.tickets_file = os.path.join(self.data_dir, 'tickets.jsonl')
+        if services is None and store is None:
+            services = get_service_layer()
+        self.services = services
+
+        if self.services is not None:
+            self.store = write_behind(self.services.tickets)
+            self.ids = self.services.sequence("tickets")
+            # The tickets table has its own indexes on email and status.
+            self.index: Optional[TicketIndex] = None
+            self.search_index = open_ticket_search(self.services.db_path, self.store)
+            self._index_after_write()
+            return
 
         # Make sure data directory exists
         os.makedirs(self.data_dir, exist_ok=True)
 
-        # If no ticket file exists yet, create an empty one
-        if not os.path.exists(self.tickets_file):
-            with open(self.tickets_file, 'w') as f:
-                json.dump([], f, indent=2)
+        if store is None:
+            store = open_journal(
+                self.tickets_file,
+                "ticket_id",
+                legacy_path=os.path.join(self.data_dir, 'tickets.json')
+            )
+        # With WRITE_BEHIND=1, tickets are queued and saved in groups in the background.
+        self.store = write_behind(store)
+
+        # Ticket numbers continue from the tickets already saved.
+        self.ids = open_sequence(sequence_path(self.store.path), seed=lambda: len(self.store))
+
+        # Customer and status lookups, fed every ticket written to the journal by any process.
+        journal = store.store if isinstance(store, WriteBehindStore) else store
+        self.index = open_ticket_index(journal)
+
+        # Full-text search over subjects and descriptions, kept next to the journal.
+        self.search_index = open_ticket_search(
+            os.path.join(os.path.dirname(self.store.path), 'tickets_search.db'),
+            self.store
+        )
+        self._index_after_write()
+
+    def _index_after_write(self) -> None:
+        """
+        With a write-behind queue, add each group of tickets to the search
+        index once it has been written, in one transaction, instead of on
+        every save.
+        """
+        self.index_on_save = not isinstance(self.store, WriteBehindStore)
+        if not self.index_on_save:
+            self.store.add_listener(self.search_index.add_many)
 
     def _generate_ticket_id(self) -> str:
         """
         Create a unique ticket ID.
-        ID format grows based on how many tickets exist.
+        Numbers keep increasing across restarts and processes.
         Example: TKT-00001, TKT-00002, etc.
         """
-        try:
-            with open(self.tickets_file, 'r') as f:
-                tickets = json.load(f)
-                next_id = len(tickets) + 1
-        except Exception:
-            # If something goes wrong reading the file, fall back to ID 1
-            next_id = 1
-
+        # Numbers come from a shared counter file, so two processes never
+        # hand out the same ID.
+        next_id = self.ids.next()
         return f"TKT-{next_id:05d}"
 
     def _save_ticket(self, ticket: Dict[str, Any]) -> bool:
         """
-        Save the new ticket into the JSON storage file.
+        Append the new ticket to the ticket journal (or table).
+        Only this ticket is written, however many tickets exist.
+        The customer index follows the journal; queued tickets are added
+        to the search index by the write-behind queue once written.
         Returns True if saving was successful.
         """
         try:
-            # Load existing tickets
-            with open(self.tickets_file, 'r') as f:
-                tickets = json.load(f)
-
-            # Add the new ticket to the list
-            tickets.append(ticket)
-
-            # Save updated list
-            with open(self.tickets_file, 'w') as f:
-                json.dump(tickets, f, indent=2)
-
+            self.store.append(ticket)
+            if self.index_on_save:
+                self.search_index.add(ticket)
             return True
 
         except Exception as e:
@@ -74,6 +122,142 @@ class TicketHandler:
             print(f"Error saving ticket: {str(e)}")
             return False
 
+    def get_ticket(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a ticket by its ID (for example TKT-00001).
+        Returns the ticket if found, otherwise None.
+        """
+        return self.store.get(ticket_id.strip().upper())
+
+    def find_tickets(
+        self,
+        customer_email: str,
+        status: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 10
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        List a customer's tickets, newest first, one page at a time.
+
+        Args:
+            customer_email (str): Email the tickets were created with.
+            status (str, optional): Only tickets with this status, e.g. "Open".
+            page (int): Page number, starting at 1.
+            page_size (int): Tickets per page.
+
+        Returns:
+            tuple: (tickets on this page, total matching tickets)
+        """
+        offset = (max(1, page) - 1) * page_size
+        filters = {"customer_email": customer_email}
+        if status:
+            filters["status"] = status
+
+        if self.index is None:
+            # SQLite: served by the indexes on the tickets table.
+            tickets = self.services.tickets.find(limit=page_size, offset=offset, **filters)
+            return tickets, self.services.tickets.count(**filters)
+
+        ticket_ids, total = self.index.for_customer(customer_email, status, offset, page_size)
+        tickets = [self.store.get(ticket_id) for ticket_id in ticket_ids]
+        return [ticket for ticket in tickets if ticket is not None], total
+
+    def search_tickets(self, query: str, limit: int = 10, prefix: bool = False) -> List[Dict[str, Any]]:
+        """
+        Find tickets whose subject or description mention the query words,
+        best match first. Each ticket gets a "score" field.
+
+        Args:
+            query (str): Words to look for, e.g. "refund" or "USB-C".
+            limit (int): Most tickets to return.
+            prefix (bool): Also match words starting with the last query word.
+        """
+        results = []
+        for ticket_id, score in self.search_index.search(query, limit=limit, prefix=prefix):
+            ticket = self.get_ticket(ticket_id)
+            if ticket is not None:
+                results.append(dict(ticket, score=score))
+        return results
+
+    def handle_search(self, query: str, limit: int = 10) -> Response:
+        """
+        List the tickets that best match a search, such as "refund".
+        """
+        tickets = self.search_tickets(query, limit=limit, prefix=True)
+
+        if not tickets:
+            return Response(
+                text=f"No tickets mention \"{query}\".",
+                suggestions=["Show my tickets", "Create a ticket"]
+            )
+
+        lines = [f"Tickets matching \"{query}\", best match first:"]
+        for ticket in tickets:
+            lines.append(f"- {ticket['ticket_id']} [{ticket['status']}] {ticket['subject']} ({ticket['customer_email']})")
+
+        return Response(text="\n".join(lines), suggestions=["Check ticket status", "Show my tickets"])
+
+    def handle_status(self, ticket_id: str) -> Response:
+        """
+        Tell the customer the current status of one ticket.
+        """
+        match = self.TICKET_ID_PATTERN.search(ticket_id)
+        ticket = self.get_ticket(match.group(0)) if match else None
+
+        if ticket is None:
+            return Response(
+                text=(
+                    "I couldn't find that ticket. "
+                    "Please check the ticket ID, which looks like TKT-00001, and try again."
+                ),
+                suggestions=["Show my tickets", "Create a ticket", "Contact support"]
+            )
+
+        message = (
+            f"Ticket Details:\n"
+            f"- Ticket ID: {ticket['ticket_id']}\n"
+            f"- Subject: {ticket['subject']}\n"
+            f"- Status: {ticket['status']}\n"
+            f"- Priority: {ticket.get('priority', 'Medium')}\n"
+            f"- Created: {ticket['created_at']}\n"
+            f"- Last Updated: {ticket.get('updated_at', ticket['created_at'])}"
+        )
+
+        return Response(
+            text=message,
+            links=["https://TechCareassistantbo.com/support"],
+            suggestions=["Show my tickets", "Create another ticket", "Contact support"]
+        )
+
+    def handle_history(
+        self,
+        customer_email: str,
+        status: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 10
+    ) -> Response:
+        """
+        List a customer's tickets, newest first, with an optional status filter.
+        """
+        tickets, total = self.find_tickets(customer_email, status, page, page_size)
+        status_text = f" {status.strip().lower()}" if status else ""
+
+        if total == 0:
+            return Response(
+                text=f"There are no{status_text} tickets for {customer_email}.",
+                suggestions=["Create a ticket", "Contact support"]
+            )
+
+        pages = math.ceil(total / page_size)
+        lines = [f"Showing page {page} of {pages} ({total}{status_text} tickets for {customer_email}):"]
+        for ticket in tickets:
+            lines.append(f"- {ticket['ticket_id']} [{ticket['status']}] {ticket['subject']} ({ticket['created_at']})")
+
+        suggestions = ["Next page"] if page < pages else []
+        suggestions.extend(["Check ticket status", "Create another ticket"])
+
+        return Response(text="\n".join(lines), suggestions=suggestions[:3])
+
     def handle(
         self,
         subject: str,
@@ -86,6 +270,11 @@ class TicketHandler:
         Automatically fills in metadata such as timestamp and status.
         """
 
+        # Refuse floods of tickets from the same customer before anything is saved.
+        limited = check_rate_limit("tickets", customer_email or customer_name)
+        if limited is not None:
+            return limited
+
         try:
             # Generate a new ticket ID
             ticket_id = self._generate_ticket_id()
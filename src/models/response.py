@@ -4,10 +4,16 @@ from typing import List, Optional
 
 class Response:
     # text: reply body; links: optional related URLs; suggestions: follow-ups.
+    # served_by: which path produced the reply (e.g. 'cache', 'local', 'llm').
+    # retry_after: seconds to wait before trying again, set when a request was rate limited.
 
     def __init__(self, text: str = "", links: Optional[List[str]] = None, 
-                 suggestions: Optional[List[str]] = None):
+                 suggestions: Optional[List[str]] = None,
+                 served_by: Optional[str] = None,
+                 retry_after: Optional[float] = None):
         # Initialize a Response with optional links and suggestions.
         self.text: str = text
         self.links: List[str] = links if links is not None else []
         self.suggestions: List[str] = suggestions if suggestions is not None else []
+        self.served_by: Optional[str] = served_by
+        self.retry_after: Optional[float] = retry_after
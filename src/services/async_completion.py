@@ -0,0 +1,137 @@
+"""
+AsyncCompletionClient - Asyncio front end for Ozwell with request coalescing.
+"""
+
+import asyncio
+import threading
+from collections import Counter
+from typing import Any, Dict, Hashable, Optional
+
+from src.services.ozwell_client import OzwellClient, get_client
+from src.services.settings import env_int
+
+
+class AsyncCompletionClient:
+    """
+    Runs Ozwell completions from asyncio code.
+
+    Two things keep the upstream load down during bursts:
+    - a global semaphore caps how many requests are sent at once, and
+    - identical requests that are already in flight (same system message,
+      prompt, temperature and token limit) are coalesced, so a single
+      upstream call answers every caller waiting on it ("singleflight").
+
+    The blocking HTTP call itself runs in a worker thread through the
+    shared pooled OzwellClient, so connections are still reused.
+    """
+
+    def __init__(self, client: OzwellClient, max_concurrency: int = 8):
+        """
+        Args:
+            client (OzwellClient): Pooled client used for the actual requests.
+            max_concurrency (int): Maximum number of upstream calls at once.
+        """
+        self.client = client
+        self.max_concurrency = max(1, max_concurrency)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._counters: Counter = Counter()
+
+    def _bind_loop(self) -> None:
+        """
+        Tie the semaphore and in-flight table to the running event loop.
+        Both are recreated if the client is later used from a new loop
+        (for example by a second asyncio.run call).
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._in_flight = {}
+
+    async def _fetch(self, prompt: str, system_message: str, temperature: float, max_tokens: int) -> str:
+        """Make one upstream call, waiting for a free slot first."""
+        async with self._semaphore:
+            self._counters["upstream_calls"] += 1
+            return await asyncio.to_thread(
+                self.client.complete,
+                prompt=prompt,
+                system_message=system_message,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        """Drop a finished request so the next identical one goes upstream again."""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the error as seen even if every waiter was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+    async def complete(
+        self,
+        prompt: str,
+        system_message: str,
+        temperature: float = 0.7,
+        max_tokens: int = 300
+    ) -> str:
+        """
+        Request a completion, sharing the result with identical concurrent requests.
+
+        Raises:
+            OzwellError: If the upstream request failed. Every coalesced
+                         caller receives the same error.
+        """
+        self._bind_loop()
+        self._counters["requests"] += 1
+        key = (system_message, prompt, temperature, max_tokens)
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(prompt, system_message, temperature, max_tokens))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda finished: self._forget(key, finished))
+        else:
+            self._counters["coalesced"] += 1
+
+        # Shield the shared call so one caller giving up does not cancel it for the others.
+        return await asyncio.shield(task)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Report how many requests were made and how many were coalesced.
+
+        Returns:
+            dict: requests, upstream calls, coalesced requests, requests
+                  currently in flight and the share of requests coalesced.
+        """
+        requests_made = self._counters["requests"]
+        return {
+            "requests": requests_made,
+            "upstream_calls": self._counters["upstream_calls"],
+            "coalesced": self._counters["coalesced"],
+            "in_flight": len(self._in_flight),
+            "coalesced_ratio": self._counters["coalesced"] / requests_made if requests_made else 0.0
+        }
+
+
+_async_clients: Dict[str, AsyncCompletionClient] = {}
+_async_clients_lock = threading.Lock()
+
+
+def get_async_client(api_key: str) -> AsyncCompletionClient:
+    """
+    Return the process-wide async client for an API key.
+    The concurrency limit can be set with OZWELL_MAX_CONCURRENCY.
+    """
+    with _async_clients_lock:
+        client = _async_clients.get(api_key)
+        if client is None:
+            client = AsyncCompletionClient(
+                get_client(api_key),
+                max_concurrency=env_int('OZWELL_MAX_CONCURRENCY', 8)
+            )
+            _async_clients[api_key] = client
+        return client
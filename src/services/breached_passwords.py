@@ -0,0 +1,195 @@
+"""
+BreachedPasswordFilter - Offline check of passwords against a large breached/common password list.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+from typing import BinaryIO, Dict, Iterable, Optional, Tuple
+
+# File layout: magic, then bits (m), hash count (k) and entries (n), then the bit array.
+MAGIC = b"PWBLOOM1"
+_HEADER = struct.Struct("<8sQIQ")
+
+
+def _positions(word: bytes, bits: int, hashes: int) -> Iterable[int]:
+    # Two 64-bit halves of one digest give every position (Kirsch-Mitzenmacher),
+    # so a check costs one hash however many positions are tested.
+    digest = hashlib.blake2b(word, digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return ((h1 + i * h2) % bits for i in range(hashes))
+
+
+def filter_size(entries: int, fp_rate: float) -> Tuple[int, int]:
+    """
+    Bits and hash count for a Bloom filter holding `entries` words with
+    the given false positive rate.
+
+    Returns:
+        tuple: (bits, hashes)
+    """
+    entries = max(1, entries)
+    bits = max(64, math.ceil(-entries * math.log(fp_rate) / math.log(2) ** 2))
+    hashes = max(1, round(bits / entries * math.log(2)))
+    return bits, hashes
+
+
+def _count_lines(wordlist: BinaryIO) -> int:
+    count = sum(1 for line in wordlist if line.strip())
+    wordlist.seek(0)
+    return count
+
+
+def build_filter(wordlist_path: str, output_path: str, fp_rate: float = 0.001) -> Dict[str, float]:
+    """
+    Build a filter file from a plain-text wordlist with one password per line.
+
+    The bit array is written through a memory map of the output file, so
+    building a filter for a very large list needs little memory beyond
+    the operating system's page cache. The file is written under a
+    temporary name and moved into place when complete.
+
+    Returns:
+        dict: Entries, bits, hashes and file size in bytes.
+    """
+    if not 0 < fp_rate < 1:
+        raise ValueError("fp_rate must be between 0 and 1.")
+
+    with open(wordlist_path, 'rb') as wordlist:
+        entries = _count_lines(wordlist)
+        bits, hashes = filter_size(entries, fp_rate)
+        size = _HEADER.size + (bits + 7) // 8
+
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = output_path + ".tmp"
+        with open(temp_path, 'w+b') as f:
+            f.write(_HEADER.pack(MAGIC, bits, hashes, entries))
+            f.truncate(size)
+            with mmap.mmap(f.fileno(), size) as mm:
+                offset = _HEADER.size
+                for line in wordlist:
+                    word = line.rstrip(b"\r\n")
+                    if not word.strip():
+                        continue
+                    for position in _positions(word, bits, hashes):
+                        mm[offset + (position >> 3)] |= 1 << (position & 7)
+                mm.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, output_path)
+
+    return {"entries": entries, "bits": bits, "hashes": hashes, "bytes": size}
+
+
+class BreachedPasswordFilter:
+    """
+    A Bloom filter of breached or common passwords, read through a
+    read-only memory map.
+
+    A check hashes the password once and reads `hashes` bits, so it takes
+    microseconds, and only the pages holding those bits are loaded, so
+    even a filter for 100 million passwords uses a few MB of memory.
+    A password that is in the list is always found; one that is not is
+    wrongly reported with the false positive rate the filter was built for.
+    Passwords are also checked in lower case, so "Password1" is found
+    when the list has "password1"; testing both forms roughly doubles
+    that rate for mixed-case passwords.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Filter file written by build_filter().
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.bits, self.hashes, self.entries = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or not self.bits or not self.hashes or len(self._mm) < _HEADER.size + (self.bits + 7) // 8:
+            self._mm.close()
+            raise ValueError(f"{path} is not a breached password filter.")
+
+    def _contains_word(self, word: bytes) -> bool:
+        mm = self._mm
+        offset = _HEADER.size
+        for position in _positions(word, self.bits, self.hashes):
+            if not mm[offset + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __contains__(self, password: str) -> bool:
+        word = password.encode()
+        if self._contains_word(word):
+            return True
+        lowered = password.lower().encode()
+        return lowered != word and self._contains_word(lowered)
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+_filters: Dict[str, Optional[BreachedPasswordFilter]] = {}
+_filters_lock = threading.Lock()
+
+
+def open_breached_filter(path: str) -> Optional[BreachedPasswordFilter]:
+    """
+    Return the filter in path, shared by every handler, or None if no
+    filter has been built there (the check is then skipped).
+    """
+    path = os.path.abspath(path)
+    with _filters_lock:
+        if path not in _filters:
+            try:
+                _filters[path] = BreachedPasswordFilter(path)
+            except FileNotFoundError:
+                _filters[path] = None
+            except ValueError as e:
+                print(f"Breached password check disabled: {str(e)}", file=sys.stderr)
+                _filters[path] = None
+        return _filters[path]
+
+
+def main():
+    """Build a breached password filter from a wordlist, or check a password against one."""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build or query the offline breached password filter.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="build a filter from a wordlist (one password per line)")
+    build.add_argument("wordlist")
+    build.add_argument("--output", default="data/breached_passwords.bloom",
+                       help="filter file (default data/breached_passwords.bloom)")
+    build.add_argument("--fp-rate", type=float, default=0.001,
+                       help="share of safe passwords wrongly rejected (default 0.001)")
+
+    check = subparsers.add_parser("check", help="check whether a password is in the filter")
+    check.add_argument("password")
+    check.add_argument("--filter", default="data/breached_passwords.bloom")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.perf_counter()
+        info = build_filter(args.wordlist, args.output, args.fp_rate)
+        print(
+            f"{info['entries']} passwords -> {args.output} "
+            f"({info['bytes'] / 1024 / 1024:.1f} MiB, {info['hashes']} hashes) "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+    else:
+        password_filter = BreachedPasswordFilter(args.filter)
+        print("breached" if args.password in password_filter else "not found")
+
+
+if __name__ == "__main__":
+    main()
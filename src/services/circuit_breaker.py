@@ -0,0 +1,167 @@
+"""
+CircuitBreaker - Stops calling a failing dependency and probes for recovery.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+class CircuitBreaker:
+    """
+    Tracks the recent outcomes of calls to a dependency.
+
+    The breaker has three states:
+    - "closed": calls go through and their outcome is recorded.
+    - "open": the recent error or slow-call rate was too high, so calls
+      are refused straight away and callers use their local fallback.
+    - "half_open": after a cool-down a few probe calls are let through.
+      If they succeed the breaker closes again, otherwise it re-opens.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        window_size: int = 50,
+        min_calls: int = 10,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 10.0,
+        slow_call_rate_threshold: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        """
+        Args:
+            window_size (int): Number of recent calls remembered.
+            min_calls (int): Calls needed in the window before the breaker can open.
+            failure_rate_threshold (float): Share of failed calls that opens the breaker.
+            slow_call_seconds (float): Calls slower than this count as slow.
+            slow_call_rate_threshold (float): Share of slow calls that opens the breaker.
+            open_seconds (float): Cool-down before probe calls are allowed.
+            half_open_max_calls (int): Probe calls allowed at the same time.
+        """
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        # Each entry is (succeeded, latency in seconds).
+        self._window: Deque[Tuple[bool, float]] = deque(maxlen=window_size)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._times_opened = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the cool-down ends."""
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def _refresh_state(self) -> None:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._times_opened += 1
+
+    def allow_request(self) -> bool:
+        """
+        Decide whether a call may go ahead.
+        Every allowed call must be followed by record_success or record_failure.
+        """
+        with self._lock:
+            self._refresh_state()
+
+            if self._state == self.CLOSED:
+                return True
+
+            if self._state == self.HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+                self._probes_in_flight += 1
+                return True
+
+            self._rejected += 1
+            return False
+
+    def record_success(self, latency: float) -> None:
+        """Record a call that worked. A successful probe closes the breaker."""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if latency < self.slow_call_seconds:
+                    self._state = self.CLOSED
+                    self._window.clear()
+                else:
+                    self._open()
+                return
+
+            self._window.append((True, latency))
+            self._check_thresholds()
+
+    def record_failure(self, latency: float) -> None:
+        """Record a call that failed. A failed probe re-opens the breaker."""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._open()
+                return
+
+            self._window.append((False, latency))
+            self._check_thresholds()
+
+    def _check_thresholds(self) -> None:
+        if self._state != self.CLOSED or len(self._window) < self.min_calls:
+            return
+
+        calls = len(self._window)
+        failures = sum(1 for succeeded, _ in self._window if not succeeded)
+        slow_calls = sum(1 for _, latency in self._window if latency >= self.slow_call_seconds)
+
+        if failures / calls >= self.failure_rate_threshold or slow_calls / calls >= self.slow_call_rate_threshold:
+            self._open()
+
+    def latency_percentile(self, percentile: float, min_samples: int = 20) -> Optional[float]:
+        """
+        Return a latency percentile (0-100) of recent successful calls,
+        or None when there are not yet enough samples to be meaningful.
+        """
+        with self._lock:
+            latencies = sorted(latency for succeeded, latency in self._window if succeeded)
+
+        if len(latencies) < min_samples:
+            return None
+
+        rank = min(len(latencies) - 1, int(round(percentile / 100 * (len(latencies) - 1))))
+        return latencies[rank]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the breaker state and recent call figures.
+
+        Returns:
+            dict: state, calls in the window, failure rate, how many times
+                  the breaker opened and how many calls it refused.
+        """
+        with self._lock:
+            self._refresh_state()
+            calls = len(self._window)
+            failures = sum(1 for succeeded, _ in self._window if not succeeded)
+            return {
+                "state": self._state,
+                "window_calls": calls,
+                "failure_rate": failures / calls if calls else 0.0,
+                "times_opened": self._times_opened,
+                "rejected": self._rejected
+            }
@@ -0,0 +1,266 @@
+"""
+CredentialStore - Per-user password hashes in SQLite, for any number of users.
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def user_key(user_id: str) -> str:
+    """User IDs are matched without case or surrounding spaces."""
+    return (user_id or "").strip().lower()
+
+
+class CredentialStore:
+    """
+    Keeps one row per user (ID, display name, password hash) in an SQLite
+    table keyed by user ID.
+
+    Looking up or changing a user's password touches only that user's row,
+    and every change is its own transaction, so two resets at the same
+    time never undo each other. SQLite locks the database file, so several
+    processes can share it safely; in WAL mode readers never wait for a
+    writer.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path (str): SQLite database file (created if missing). It may be
+                           the shared CHATBOT_DB_PATH database.
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS credentials ("
+                " user_id TEXT PRIMARY KEY, name TEXT NOT NULL, password_hash TEXT NOT NULL,"
+                " updated_at TEXT NOT NULL) WITHOUT ROWID"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Wait for other processes' writes instead of failing straight away.
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, user_id: str) -> Optional[Dict[str, str]]:
+        """Return a user's record (user_id, name, password_hash, updated_at), or None."""
+        row = self._connection().execute(
+            "SELECT user_id, name, password_hash, updated_at FROM credentials WHERE user_id = ?",
+            (user_key(user_id),)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"user_id": row[0], "name": row[1], "password_hash": row[2], "updated_at": row[3]}
+
+    def add_user(self, user_id: str, name: str, password_hash: str) -> None:
+        """Add a user, or replace the name and hash of an existing one."""
+        self.add_users([(user_id, name, password_hash)])
+
+    def add_users(self, users: Iterable[Tuple[str, str, str]], batch_size: int = 10000) -> int:
+        """
+        Add or replace many users, committing every batch_size rows.
+
+        Args:
+            users: (user ID, name, password hash) tuples.
+
+        Returns:
+            int: Number of users written.
+        """
+        conn = self._connection()
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        sql = (
+            "INSERT INTO credentials (user_id, name, password_hash, updated_at) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT(user_id) DO UPDATE SET name = excluded.name,"
+            " password_hash = excluded.password_hash, updated_at = excluded.updated_at"
+        )
+
+        written = 0
+        batch: List[Tuple[str, str, str, str]] = []
+        for user_id, name, password_hash in users:
+            batch.append((user_key(user_id), name or user_id, password_hash, now))
+            if len(batch) >= batch_size:
+                with conn:
+                    conn.executemany(sql, batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            with conn:
+                conn.executemany(sql, batch)
+            written += len(batch)
+        return written
+
+    def set_password(self, user_id: str, password_hash: str, if_hash: Optional[str] = None) -> bool:
+        """
+        Replace one user's password hash.
+
+        Args:
+            if_hash (str, optional): Only replace the hash if it is still this
+                one, so a rehash never undoes a reset made in the meantime.
+
+        Returns:
+            bool: False if there is no such user (or its hash is not if_hash).
+        """
+        sql = "UPDATE credentials SET password_hash = ?, updated_at = ? WHERE user_id = ?"
+        params = [password_hash, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), user_key(user_id)]
+        if if_hash is not None:
+            sql += " AND password_hash = ?"
+            params.append(if_hash)
+
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(sql, params)
+        return cursor.rowcount == 1
+
+    def __contains__(self, user_id: str) -> bool:
+        return self._connection().execute(
+            "SELECT 1 FROM credentials WHERE user_id = ?", (user_key(user_id),)
+        ).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM credentials").fetchone()[0]
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        for row in self._connection().execute(
+            "SELECT user_id, name, password_hash, updated_at FROM credentials ORDER BY user_id"
+        ):
+            yield {"user_id": row[0], "name": row[1], "password_hash": row[2], "updated_at": row[3]}
+
+    def import_password_file(self, json_path: str, names: Optional[Dict[str, str]] = None) -> int:
+        """
+        Copy users from an old passwords.json ({user ID: hash}) that are not
+        in the store yet. The file itself is left alone.
+
+        Returns:
+            int: Number of users added.
+        """
+        try:
+            with open(json_path, 'r') as f:
+                passwords = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+
+        names = names or {}
+        conn = self._connection()
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with conn:
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO credentials (user_id, name, password_hash, updated_at) VALUES (?, ?, ?, ?)",
+                [(user_key(user_id), names.get(user_id, user_id), password_hash, now)
+                 for user_id, password_hash in passwords.items()]
+            )
+        return cursor.rowcount
+
+    def import_csv(self, csv_path: str, hasher: Optional[Any] = None, batch_size: int = 10000) -> int:
+        """
+        Load users from a CSV file with a header row.
+
+        Columns are user_id, name (optional) and either password_hash, which
+        is stored as it is, or password, which is hashed first with hasher
+        (a PasswordHasher). Plain passwords are hashed a batch at a time
+        across the hasher's worker pool, but at the calibrated cost per
+        hash, so prefer password_hash for millions of users. Rows with
+        neither are skipped and reported on stderr, so nobody ends up
+        with an empty password.
+
+        Returns:
+            int: Number of users written.
+        """
+        skipped: List[int] = []
+
+        def rows() -> Iterator[Tuple[str, str, str]]:
+            with open(csv_path, 'r', newline='') as f:
+                reader = csv.DictReader(f)
+                pending: List[Tuple[str, str, Any]] = []
+                for row in reader:
+                    user_id = (row.get("user_id") or "").strip()
+                    if not user_id:
+                        continue
+                    name = (row.get("name") or "").strip()
+                    password_hash = (row.get("password_hash") or "").strip()
+                    if password_hash:
+                        yield user_id, name, password_hash
+                        continue
+                    password = row.get("password") or ""
+                    if not password.strip():
+                        skipped.append(reader.line_num)
+                        continue
+                    if hasher is None:
+                        raise ValueError("The CSV has plain passwords, so a hasher is needed to import it.")
+                    pending.append((user_id, name, hasher.submit(password)))
+                    if len(pending) >= batch_size:
+                        for pending_id, pending_name, future in pending:
+                            yield pending_id, pending_name, future.result()
+                        pending = []
+                for pending_id, pending_name, future in pending:
+                    yield pending_id, pending_name, future.result()
+
+        written = self.add_users(rows(), batch_size=batch_size)
+        if skipped:
+            lines = ", ".join(str(line) for line in skipped[:10]) + (", ..." if len(skipped) > 10 else "")
+            print(f"Skipped {len(skipped)} rows with no password or password hash (lines {lines}).", file=sys.stderr)
+        return written
+
+
+_stores: Dict[str, CredentialStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_credential_store(db_path: str, legacy_path: Optional[str] = None,
+                          names: Optional[Dict[str, str]] = None) -> CredentialStore:
+    """
+    Return the credential store in db_path, shared by every handler.
+    If it is empty and an old passwords.json exists at legacy_path, its
+    users are imported once.
+    """
+    db_path = os.path.abspath(db_path)
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = CredentialStore(db_path)
+            if legacy_path and len(store) == 0:
+                store.import_password_file(legacy_path, names)
+            _stores[db_path] = store
+        return store
+
+
+def main():
+    """Bulk-load users from a CSV file into a credential store."""
+    import argparse
+    import time
+    from src.services.password_hasher import get_password_hasher
+
+    parser = argparse.ArgumentParser(description="Import users and password hashes from CSV.")
+    parser.add_argument("csv_path", help="CSV with user_id, name and password_hash (or password) columns")
+    parser.add_argument("--db", default=os.getenv('CHATBOT_DB_PATH') or "data/credentials.db",
+                        help="credential database (default CHATBOT_DB_PATH or data/credentials.db)")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    store = CredentialStore(args.db)
+    started = time.perf_counter()
+    with open(args.csv_path, 'r', newline='') as f:
+        header = next(csv.reader(f), [])
+    hasher = get_password_hasher() if "password" in header else None
+    count = store.import_csv(args.csv_path, hasher=hasher, batch_size=args.batch_size)
+    print(f"{count} users imported into {args.db} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
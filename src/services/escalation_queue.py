@@ -0,0 +1,447 @@
+"""
+EscalationQueue - Orders pending escalations and assigns them to human agents.
+"""
+
+import heapq
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, IO, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no fcntl. Only run one process against an escalation store there.
+    fcntl = None
+
+# Customers on higher tiers are served as if they had been waiting this many seconds longer.
+TIER_BOOST_SECONDS = {
+    "standard": 0,
+    "gold": 600,
+    "platinum": 1800
+}
+
+# Reasons mentioning these words are served as if they had been waiting this many seconds longer.
+KEYWORD_BOOST_SECONDS = {
+    "fraud": 1800,
+    "legal": 1800,
+    "urgent": 900,
+    "emergency": 900,
+    "charged": 600,
+    "refund": 600,
+    "cancel": 300,
+    "broken": 300
+}
+
+_WORD_PATTERN = re.compile(r"[a-z]+")
+
+
+def priority_boost(reason: str, tier: str = "standard") -> float:
+    """Seconds of extra waiting time credited to an escalation for its tier and reason."""
+    words = set(_WORD_PATTERN.findall((reason or "").lower()))
+    keyword_boost = max((boost for word, boost in KEYWORD_BOOST_SECONDS.items() if word in words), default=0)
+    return TIER_BOOST_SECONDS.get((tier or "standard").lower(), 0) + keyword_boost
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(rank, len(sorted_values) - 1))]
+
+
+class EscalationQueue:
+    """
+    A priority queue of pending escalations, backed by a binary heap.
+
+    The next escalation is the one with the highest wait time plus boost.
+    Every escalation waits at the same rate, so that order never changes
+    over time, and it equals ordering by arrival time minus boost. That
+    "virtual arrival time" is the heap key, which keeps enqueue and
+    dequeue at O(log n) with no re-sorting as time passes.
+
+    Removing an escalation only marks it; it is skipped when it reaches
+    the top of the heap.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._heap: List[Tuple[float, int, str]] = []
+        # escalation_id -> (escalation, (heap key, counter), arrival time)
+        self._entries: Dict[str, Tuple[Dict[str, Any], Tuple[float, int], float]] = {}
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def enqueue(self, escalation: Dict[str, Any], arrived_at: Optional[float] = None) -> None:
+        """Add an escalation. Its customer_tier and reason set its priority."""
+        escalation_id = escalation["escalation_id"]
+        arrived_at = self._clock() if arrived_at is None else arrived_at
+        key = arrived_at - priority_boost(escalation.get("reason", ""), escalation.get("customer_tier", "standard"))
+
+        with self._lock:
+            self._counter += 1
+            heapq.heappush(self._heap, (key, self._counter, escalation_id))
+            self._entries[escalation_id] = (escalation, (key, self._counter), arrived_at)
+
+    def dequeue(self) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Take the most urgent escalation off the queue.
+
+        Returns:
+            tuple: (escalation, seconds it waited), or None if the queue is empty.
+        """
+        with self._lock:
+            while self._heap:
+                key, counter, escalation_id = heapq.heappop(self._heap)
+                entry = self._entries.get(escalation_id)
+                # Skip entries that were removed or queued again since.
+                if entry is not None and entry[1] == (key, counter):
+                    del self._entries[escalation_id]
+                    return entry[0], self._clock() - entry[2]
+            return None
+
+    def remove(self, escalation_id: str) -> bool:
+        """Withdraw an escalation, e.g. when the customer no longer needs help."""
+        with self._lock:
+            return self._entries.pop(escalation_id, None) is not None
+
+    def position(self, escalation_id: str) -> Optional[int]:
+        """
+        1-based place of an escalation in the queue, or None if it is not queued.
+        This counts the queue, O(n), so it is meant for on-demand lookups only.
+        """
+        with self._lock:
+            entry = self._entries.get(escalation_id)
+            if entry is None:
+                return None
+            return 1 + sum(1 for _, key, _ in self._entries.values() if key < entry[1])
+
+    def waits(self) -> List[float]:
+        """Seconds each queued escalation has waited so far."""
+        now = self._clock()
+        with self._lock:
+            return [now - arrived_at for _, _, arrived_at in self._entries.values()]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class AgentScheduler:
+    """
+    Hands queued escalations to a pool of agents, each of whom can work on
+    a limited number at once.
+
+    Agents are kept in a heap by current load, so the least busy agent
+    with room gets the next escalation in O(log agents). Assigned escalations are saved
+    back to the store with status "Assigned", and the wait each one had
+    is recorded for the staffing report.
+
+    Queue and agent loads live in this process's memory. A scheduler
+    created with dispatching=False never assigns or completes anything,
+    so a second process sharing the store cannot give an agent the same
+    slot twice.
+    """
+
+    def __init__(
+        self,
+        queue: EscalationQueue,
+        agents: Dict[str, int],
+        store: Optional[Any] = None,
+        wait_history: int = 10000,
+        dispatching: bool = True
+    ):
+        """
+        Args:
+            queue (EscalationQueue): Escalations waiting for an agent.
+            agents (dict): Agent name -> how many escalations they can handle at once.
+            store (optional): Where escalations are saved, to record assignments.
+            wait_history (int): How many recent assignment waits to keep for percentiles.
+            dispatching (bool): False if another process assigns escalations for this store.
+        """
+        self.queue = queue
+        self.dispatching = dispatching
+        self.capacity = dict(agents)
+        self.store = store
+        self.active: Dict[str, Dict[str, Dict[str, Any]]] = {name: {} for name in agents}
+        self._agent_heap: List[Tuple[int, str]] = [(0, name) for name in sorted(agents)]
+        heapq.heapify(self._agent_heap)
+        self._assigned_waits: Deque[float] = deque(maxlen=wait_history)
+        self._lock = threading.RLock()
+        self.assigned_total = 0
+        self.completed_total = 0
+
+    def _rebuild_agent_heap(self) -> None:
+        # Caller holds the lock. Agent pools are small, so re-heaping beats tracking entries.
+        self._agent_heap = [(len(self.active[agent]), agent) for agent in self.active]
+        heapq.heapify(self._agent_heap)
+
+    def restore(self, escalations: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Put escalations saved as "Assigned" back on their agents, e.g. after
+        a restart, so they count towards the agent's load and can be completed.
+
+        Returns:
+            list: Escalations whose agent is no longer in the pool.
+        """
+        orphans = []
+        with self._lock:
+            for escalation in escalations:
+                agent = escalation.get("assigned_agent")
+                if agent in self.active:
+                    self.active[agent][escalation["escalation_id"]] = escalation
+                else:
+                    orphans.append(escalation)
+            self._rebuild_agent_heap()
+        return orphans
+
+    def assigned_agent(self, escalation_id: str) -> Optional[str]:
+        """The agent working on an escalation, or None if it is not assigned."""
+        with self._lock:
+            for name, escalations in self.active.items():
+                if escalation_id in escalations:
+                    return name
+        return None
+
+    def _pop_free_agent(self) -> Optional[str]:
+        # Every agent is in the heap exactly once, with their current load.
+        if not self._agent_heap:
+            return None
+        load, name = self._agent_heap[0]
+        if load >= self.capacity[name]:
+            return None
+        heapq.heappop(self._agent_heap)
+        return name
+
+    def dispatch(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Assign queued escalations while any agent has room.
+
+        Returns:
+            list: (agent, escalation) for each assignment made.
+        """
+        assignments = []
+        if not self.dispatching:
+            return assignments
+        with self._lock:
+            while len(self.queue):
+                agent = self._pop_free_agent()
+                if agent is None:
+                    break
+                taken = self.queue.dequeue()
+                if taken is None:
+                    heapq.heappush(self._agent_heap, (len(self.active[agent]), agent))
+                    break
+
+                escalation, waited = taken
+                now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                escalation = dict(escalation, status="Assigned", assigned_agent=agent, updated_at=now)
+                self.active[agent][escalation["escalation_id"]] = escalation
+                heapq.heappush(self._agent_heap, (len(self.active[agent]), agent))
+                self._assigned_waits.append(waited)
+                self.assigned_total += 1
+                assignments.append((agent, escalation))
+
+        for _, escalation in assignments:
+            if self.store is not None:
+                self.store.append(escalation)
+        return assignments
+
+    def complete(self, escalation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Mark an assigned escalation as resolved, freeing its agent.
+        Call dispatch() afterwards to hand the free slot to the next escalation.
+        """
+        if not self.dispatching:
+            return None
+        with self._lock:
+            for name, escalations in self.active.items():
+                escalation = escalations.pop(escalation_id, None)
+                if escalation is not None:
+                    self._rebuild_agent_heap()
+                    self.completed_total += 1
+                    break
+            else:
+                return None
+
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        escalation = dict(escalation, status="Resolved", updated_at=now)
+        if self.store is not None:
+            self.store.append(escalation)
+        return escalation
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Numbers for sizing staff: queue depth, agent utilisation, and
+        percentiles of how long escalations waited for an agent.
+
+        Returns:
+            dict: Queue and agent figures; wait times are in seconds.
+        """
+        queued_waits = sorted(self.queue.waits())
+        with self._lock:
+            assigned_waits = sorted(self._assigned_waits)
+            busy = sum(len(escalations) for escalations in self.active.values())
+            capacity = sum(self.capacity.values())
+            return {
+                "queue_depth": len(queued_waits),
+                "agents": len(self.capacity),
+                "in_progress": busy,
+                "utilisation": round(busy / capacity, 3) if capacity else 0.0,
+                "assigned_total": self.assigned_total,
+                "completed_total": self.completed_total,
+                "queued_wait_p50": round(_percentile(queued_waits, 50), 3),
+                "queued_wait_max": round(queued_waits[-1], 3) if queued_waits else 0.0,
+                "assigned_wait_p50": round(_percentile(assigned_waits, 50), 3),
+                "assigned_wait_p95": round(_percentile(assigned_waits, 95), 3),
+                "assigned_wait_p99": round(_percentile(assigned_waits, 99), 3)
+            }
+
+
+def parse_agents(spec: str) -> Dict[str, int]:
+    """Read an agent list like "Alex:3,Sam:2" (name:capacity, capacity defaults to 1)."""
+    agents = {}
+    for item in spec.split(","):
+        name, _, capacity = item.strip().partition(":")
+        if name:
+            agents[name] = max(1, int(capacity or 1))
+    return agents
+
+
+_schedulers: Dict[int, AgentScheduler] = {}
+_schedulers_lock = threading.Lock()
+# Lock files held for the life of the process by the schedulers that dispatch.
+_dispatch_locks: List[IO[bytes]] = []
+
+
+def _claim_dispatch(path: Optional[str]) -> bool:
+    """
+    Try to become the one process that assigns escalations for the store
+    at path, by locking <name>.scheduler.lock next to it. The lock is
+    released when the process exits.
+    """
+    if fcntl is None or not path:
+        return True
+    lock_file = open(os.path.splitext(path)[0] + ".scheduler.lock", 'a+b')
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _dispatch_locks.append(lock_file)
+    return True
+
+
+def open_escalation_scheduler(store: Any) -> AgentScheduler:
+    """
+    Return the scheduler for an escalation store, shared by every handler.
+
+    On first use the queue is filled with the store's pending escalations,
+    and escalations saved as assigned go back on their agents, so agent
+    load and resolve_escalation() carry over a restart. Assigned
+    escalations whose agent has left the pool are queued again.
+    Agents come from ESCALATION_AGENTS (default "Agent 1:2,Agent 2:2,Agent 3:2").
+
+    Only one process assigns escalations for a store. Other processes
+    sharing it save new escalations as Pending without assigning them;
+    the dispatching process queues those the next time it starts.
+    """
+    with _schedulers_lock:
+        scheduler = _schedulers.get(id(store))
+        if scheduler is None:
+            pending = []
+            assigned = []
+            for escalation in store:
+                if escalation.get("status") == "Pending":
+                    pending.append(escalation)
+                elif escalation.get("status") == "Assigned":
+                    assigned.append(escalation)
+
+            agents = parse_agents(os.getenv('ESCALATION_AGENTS', 'Agent 1:2,Agent 2:2,Agent 3:2'))
+            scheduler = AgentScheduler(
+                EscalationQueue(), agents, store, dispatching=_claim_dispatch(getattr(store, "path", None))
+            )
+            pending.extend(scheduler.restore(assigned))
+
+            for escalation in pending:
+                try:
+                    arrived_at = datetime.strptime(escalation["created_at"], "%Y-%m-%d %H:%M:%S").timestamp()
+                except (KeyError, ValueError):
+                    arrived_at = None
+                scheduler.queue.enqueue(escalation, arrived_at)
+
+            # Agents with room (for example after the pool grew) take queued escalations now.
+            scheduler.dispatch()
+            _schedulers[id(store)] = scheduler
+        return scheduler
+
+
+def simulate(
+    agents: Dict[str, int],
+    arrivals_per_minute: float,
+    handle_minutes: float,
+    minutes: int,
+    seed: int = 1
+) -> Dict[str, Any]:
+    """
+    Simulate a stream of escalations against a pool of agents, in
+    simulated time, and return the scheduler's stats at the end.
+    Useful for deciding how many agents a given load needs.
+    """
+    rng = random.Random(seed)
+    now = [0.0]
+    queue = EscalationQueue(clock=lambda: now[0])
+    scheduler = AgentScheduler(queue, agents)
+    finishing: List[Tuple[float, str]] = []
+    tiers = ["standard"] * 8 + ["gold", "platinum"]
+    reasons = ["question about my order", "urgent: charged twice", "want a refund", "account locked"]
+
+    def start(assignments: List[Tuple[str, Dict[str, Any]]]) -> None:
+        for _, escalation in assignments:
+            done_at = now[0] + rng.expovariate(1 / (handle_minutes * 60))
+            heapq.heappush(finishing, (done_at, escalation["escalation_id"]))
+
+    number = 0
+    next_arrival = rng.expovariate(arrivals_per_minute / 60)
+    while next_arrival < minutes * 60:
+        # Agents finishing before the next arrival take the next queued escalation straight away.
+        while finishing and finishing[0][0] <= next_arrival:
+            now[0], escalation_id = heapq.heappop(finishing)
+            scheduler.complete(escalation_id)
+            start(scheduler.dispatch())
+
+        now[0] = next_arrival
+        number += 1
+        queue.enqueue({
+            "escalation_id": f"ESC-{number:05d}",
+            "reason": rng.choice(reasons),
+            "customer_tier": rng.choice(tiers)
+        })
+        start(scheduler.dispatch())
+        next_arrival += rng.expovariate(arrivals_per_minute / 60)
+
+    return scheduler.stats()
+
+
+def main():
+    """Print the staffing figures for a simulated escalation load."""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Simulate the escalation queue to size agent staffing.")
+    parser.add_argument("--agents", default="Agent 1:2,Agent 2:2,Agent 3:2", help="name:capacity list")
+    parser.add_argument("--arrivals-per-minute", type=float, default=2.0)
+    parser.add_argument("--handle-minutes", type=float, default=2.5, help="average time an agent spends per escalation")
+    parser.add_argument("--minutes", type=int, default=480, help="length of the simulated shift")
+    args = parser.parse_args()
+
+    stats = simulate(parse_agents(args.agents), args.arrivals_per_minute, args.handle_minutes, args.minutes)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
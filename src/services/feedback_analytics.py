@@ -0,0 +1,229 @@
+"""
+FeedbackAnalytics - Running feedback statistics, updated as each entry is saved.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class FeedbackAnalytics:
+    """
+    Keeps the numbers behind the feedback dashboard: how many entries have
+    each rating, the overall average, and how many entries (and rating
+    points) arrived each day, from which rolling averages are computed.
+
+    Adding an entry only updates a few counters. The counters are saved
+    to a small JSON snapshot, at most once per save_interval seconds and
+    when the process exits, so a report never has to read the feedback
+    itself. If the snapshot is missing or does not match the number of
+    stored entries, it is rebuilt from the feedback once.
+    """
+
+    def __init__(self, snapshot_path: str, save_interval: float = 1.0):
+        """
+        Args:
+            snapshot_path (str): Where the counters are saved.
+            save_interval (float): Least number of seconds between snapshot writes.
+        """
+        self.snapshot_path = snapshot_path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        self._dirty = False
+        self._reset()
+
+    def _reset(self) -> None:
+        self.count = 0
+        self.rating_sum = 0
+        self.histogram: Dict[int, int] = {rating: 0 for rating in range(1, 6)}
+        # "YYYY-MM-DD" -> [entries, rating sum]
+        self.per_day: Dict[str, List[int]] = {}
+
+    def add(self, feedback: Dict[str, Any]) -> None:
+        """Count one saved feedback entry."""
+        rating = int(feedback.get("rating") or 3)
+        day = str(feedback.get("created_at") or datetime.now().strftime("%Y-%m-%d"))[:10]
+
+        with self._lock:
+            self.count += 1
+            self.rating_sum += rating
+            self.histogram[rating] = self.histogram.get(rating, 0) + 1
+            totals = self.per_day.setdefault(day, [0, 0])
+            totals[0] += 1
+            totals[1] += rating
+            self._dirty = True
+
+            if time.monotonic() - self._last_save >= self.save_interval:
+                self._save()
+
+    def rebuild(self, feedbacks: Iterable[Dict[str, Any]]) -> None:
+        """Recount everything from the stored feedback."""
+        with self._lock:
+            self._reset()
+        for feedback in feedbacks:
+            self.add(feedback)
+        self.save()
+
+    def _save(self) -> None:
+        # Caller holds the lock.
+        snapshot = {
+            "count": self.count,
+            "rating_sum": self.rating_sum,
+            "histogram": self.histogram,
+            "per_day": self.per_day
+        }
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(temp_path, self.snapshot_path)
+        self._last_save = time.monotonic()
+        self._dirty = False
+
+    def save(self) -> None:
+        """Write the snapshot now if anything changed since the last one."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def load(self) -> bool:
+        """
+        Read the saved snapshot.
+
+        Returns:
+            bool: False if there is no readable snapshot.
+        """
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                snapshot = json.load(f)
+            with self._lock:
+                self.count = snapshot["count"]
+                self.rating_sum = snapshot["rating_sum"]
+                self.histogram = {int(rating): n for rating, n in snapshot["histogram"].items()}
+                self.per_day = snapshot["per_day"]
+                self._dirty = False
+            return True
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            return False
+
+    def rolling_average(self, days: int, today: Optional[date] = None) -> Optional[float]:
+        """Average rating over the last `days` days, including today. None if there was no feedback."""
+        today = today or date.today()
+        entries = rating_sum = 0
+        with self._lock:
+            for offset in range(days):
+                totals = self.per_day.get((today - timedelta(days=offset)).isoformat())
+                if totals:
+                    entries += totals[0]
+                    rating_sum += totals[1]
+        return rating_sum / entries if entries else None
+
+    def report(self, days: int = 30, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Return the dashboard numbers.
+
+        Args:
+            days (int): How many recent days to list in "per_day".
+
+        Returns:
+            dict: total, average, histogram, 7- and 30-day rolling averages,
+                  and entries per day for the last `days` days.
+        """
+        today = today or date.today()
+        with self._lock:
+            recent_days = [(today - timedelta(days=offset)).isoformat() for offset in range(days)]
+            per_day = {day: self.per_day.get(day, [0, 0])[0] for day in reversed(recent_days)}
+            report = {
+                "total": self.count,
+                "average": round(self.rating_sum / self.count, 2) if self.count else None,
+                "histogram": dict(self.histogram),
+                "per_day": per_day
+            }
+
+        for window in (7, 30):
+            average = self.rolling_average(window, today)
+            report[f"average_{window}d"] = round(average, 2) if average is not None else None
+        return report
+
+
+_analytics: Dict[str, FeedbackAnalytics] = {}
+_analytics_lock = threading.Lock()
+
+
+def open_feedback_analytics(snapshot_path: str, store: Any) -> FeedbackAnalytics:
+    """
+    Return the analytics for a feedback store, shared by every handler.
+    The snapshot is loaded, or rebuilt from the store if it is missing or
+    out of date.
+    """
+    snapshot_path = os.path.abspath(snapshot_path)
+    with _analytics_lock:
+        analytics = _analytics.get(snapshot_path)
+        if analytics is None:
+            analytics = FeedbackAnalytics(snapshot_path)
+            if not analytics.load() or analytics.count != len(store):
+                analytics.rebuild(store)
+            _analytics[snapshot_path] = analytics
+        return analytics
+
+
+@atexit.register
+def _save_all() -> None:
+    # Keep the snapshot in step with the feedback written before exit.
+    with _analytics_lock:
+        for analytics in _analytics.values():
+            analytics.save()
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render report() as plain text for the command line."""
+    lines = [
+        f"Feedback entries: {report['total']}",
+        f"Average rating:   {report['average'] if report['average'] is not None else '-'}",
+        f"Last 7 days:      {report['average_7d'] if report['average_7d'] is not None else '-'}",
+        f"Last 30 days:     {report['average_30d'] if report['average_30d'] is not None else '-'}",
+        "",
+        "Ratings:"
+    ]
+    largest = max(report["histogram"].values()) or 1
+    for rating in sorted(report["histogram"]):
+        count = report["histogram"][rating]
+        lines.append(f"  {rating} | {'#' * round(count / largest * 40):<40} {count}")
+
+    lines.append("")
+    lines.append("Entries per day:")
+    for day, count in report["per_day"].items():
+        if count:
+            lines.append(f"  {day}  {count}")
+    return "\n".join(lines)
+
+
+def main():
+    """Print the feedback dashboard from the saved snapshot."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show feedback statistics without reading every entry.")
+    parser.add_argument("snapshot", nargs="?", default="data/feedback_stats.json",
+                        help="snapshot file (default data/feedback_stats.json)")
+    parser.add_argument("--days", type=int, default=30, help="recent days to list (default 30)")
+    parser.add_argument("--json", action="store_true", help="print the numbers as JSON")
+    args = parser.parse_args()
+
+    analytics = FeedbackAnalytics(args.snapshot)
+    if not analytics.load():
+        print(f"No feedback statistics found at {args.snapshot}.")
+        return
+
+    report = analytics.report(days=args.days)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
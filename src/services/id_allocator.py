@@ -0,0 +1,107 @@
+"""
+IdAllocator - Hands out increasing ticket, feedback and escalation numbers
+that stay unique across threads and processes.
+"""
+
+import os
+import threading
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no fcntl. Numbers are then only unique within one process.
+    fcntl = None
+
+
+class SequenceAllocator:
+    """
+    A counter kept in a small text file holding the next free number.
+
+    Each process reserves a block of numbers at a time: it locks the file,
+    reads the counter, writes it back increased by the block size and
+    unlocks. Numbers from the block are then handed out from memory, so
+    most allocations never touch the file. With a block size of 1 there
+    are no gaps; larger blocks skip the unused numbers of a block when a
+    process exits.
+    """
+
+    def __init__(self, path: str, block_size: int = 1, seed: Optional[Callable[[], int]] = None):
+        """
+        Args:
+            path (str): Counter file (created if missing).
+            block_size (int): How many numbers to reserve at once.
+            seed (callable, optional): Returns how many numbers are already
+                used when the counter file does not exist yet, e.g. the
+                number of records saved before the allocator existed.
+        """
+        self.path = path
+        self.block_size = max(1, block_size)
+        self.seed = seed
+        self._next = 0
+        self._limit = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _reserve_block(self) -> None:
+        # Caller holds the thread lock; the file lock covers other processes.
+        with open(self.path, 'a+') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                content = f.read().strip()
+                if content:
+                    start = int(content)
+                else:
+                    start = (self.seed() if self.seed else 0) + 1
+
+                f.seek(0)
+                f.truncate()
+                f.write(str(start + self.block_size))
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+        self._next = start
+        self._limit = start + self.block_size
+
+    def next(self) -> int:
+        """Return the next unused number."""
+        with self._lock:
+            if self._next >= self._limit:
+                self._reserve_block()
+            number = self._next
+            self._next += 1
+            return number
+
+
+_sequences: Dict[str, SequenceAllocator] = {}
+_sequences_lock = threading.Lock()
+
+
+def open_sequence(path: str, seed: Optional[Callable[[], int]] = None) -> SequenceAllocator:
+    """
+    Return the allocator for a counter file, creating it on first use.
+
+    Every handler in the process shares one allocator per file, so a
+    reserved block is not wasted when a new handler is created. The block
+    size comes from the ID_BLOCK_SIZE environment variable (default 1).
+    """
+    path = os.path.abspath(path)
+    with _sequences_lock:
+        sequence = _sequences.get(path)
+        if sequence is None:
+            sequence = SequenceAllocator(path, block_size=int(os.getenv('ID_BLOCK_SIZE', '1')), seed=seed)
+            _sequences[path] = sequence
+        return sequence
+
+
+def sequence_path(journal_path: str) -> str:
+    """Counter file kept next to a journal, e.g. data/tickets.jsonl -> data/tickets.seq."""
+    return os.path.splitext(journal_path)[0] + ".seq"
@@ -0,0 +1,448 @@
+"""
+JournalStore - Append-only JSON Lines storage for tickets, feedback and escalations.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no fcntl. A journal may then only be written by one process.
+    fcntl = None
+
+# When to force written records onto disk:
+# - "always": after every record. Nothing is lost on power failure, but writes are slowest.
+# - "interval": at most once per fsync_interval seconds.
+# - "never": leave it to the operating system.
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+def migrate_json_array(json_path: str, journal_path: str) -> int:
+    """
+    Convert an old JSON array file into a journal, once.
+
+    The journal is written to a temporary file and moved into place, and
+    the old file is renamed to <name>.migrated, so running this again, or
+    after a crash part way through, never imports records twice. Callers
+    sharing the journal between processes hold its lock while calling this.
+
+    Returns:
+        int: Number of records migrated.
+    """
+    if not os.path.exists(json_path) or os.path.exists(journal_path):
+        return 0
+
+    with open(json_path, 'r') as f:
+        content = f.read().strip()
+    records = json.loads(content) if content else []
+
+    temp_path = f"{journal_path}.tmp.{os.getpid()}"
+    with open(temp_path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, journal_path)
+    os.replace(json_path, json_path + ".migrated")
+    return len(records)
+
+
+class JournalStore:
+    """
+    Stores records as one JSON object per line, always appended at the end.
+
+    Saving a record writes only that record, so it costs the same no matter
+    how many records exist, and a crash can at worst leave one incomplete
+    last line, which is dropped the next time the file is opened.
+
+    An in-memory index maps each record's key to where its latest version
+    starts in the file, so lookups read a single line. Saving a record with
+    an existing key replaces it; the old line stays in the file until a
+    background compaction rewrites the journal without superseded lines.
+
+    Several processes may share a journal. Appends and the file swap at the
+    end of a compaction hold a lock on <path>.lock, and before each read or
+    write a process indexes lines other processes appended, or reopens and
+    re-indexes the file if another process compacted it. Without fcntl
+    (Windows) there is no such lock, so only one process may write.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        key_field: str,
+        fsync: str = "interval",
+        fsync_interval: float = 1.0,
+        compact_min_lines: int = 1000,
+        legacy_path: Optional[str] = None
+    ):
+        """
+        Args:
+            path (str): Journal file (created if missing).
+            key_field (str): Record field that identifies a record, e.g. "ticket_id".
+            fsync (str): One of FSYNC_POLICIES.
+            fsync_interval (float): Seconds between syncs for the "interval" policy.
+            compact_min_lines (int): Only compact once the journal has at least this
+                                     many lines and more than half are superseded.
+            legacy_path (str, optional): Old JSON array file to migrate on first use.
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {', '.join(FSYNC_POLICIES)}, not '{fsync}'.")
+
+        self.path = path
+        self.key_field = key_field
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compact_min_lines = compact_min_lines
+
+        self._lock = threading.RLock()
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._lines = 0
+        # Where the indexed part of the file ends.
+        self._end = 0
+        self._last_sync = time.monotonic()
+        self._compacting = False
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self.compactions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The journal itself is swapped out by compaction, so processes lock a file that stays put.
+        self._lock_file = open(path + ".lock", 'a+b') if fcntl is not None else None
+        with self._locked():
+            # Under the lock, so only one process imports the old file.
+            if legacy_path:
+                migrate_json_array(legacy_path, path)
+            self._file = open(path, 'a+b')
+            self._index_from(0)
+            self._drop_unfinished_line()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the thread lock and the lock shared with other processes."""
+        with self._lock:
+            if self._lock_file is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if self._lock_file is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _index_from(self, offset: int) -> None:
+        """Index the complete lines from offset to the end of the file. Caller holds the lock."""
+        self._file.seek(offset)
+        for line in self._file:
+            length = len(line)
+            if not line.endswith(b"\n"):
+                # Unfinished last record, from a crash or a write still in progress.
+                break
+            try:
+                record = json.loads(line)
+                key = str(record[self.key_field])
+                self._index.pop(key, None)
+                self._index[key] = (offset, length)
+                self._lines += 1
+            except (ValueError, KeyError, TypeError):
+                pass
+            else:
+                for callback in self._listeners:
+                    callback(record)
+            offset += length
+        self._end = offset
+
+    def _drop_unfinished_line(self) -> None:
+        # Caller holds the process lock, so no other process is writing this line.
+        if self._end < os.fstat(self._file.fileno()).st_size:
+            self._file.truncate(self._end)
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        Call callback with every record in the journal, then with every
+        record saved from now on: at once for this process's saves, and
+        on the next read or write for other processes' saves. A record
+        may be passed again after another process compacts the journal.
+        """
+        with self._lock:
+            self._refresh()
+            for key in self._index:
+                callback(self.get(key))
+            self._listeners.append(callback)
+
+    def refresh(self) -> None:
+        """Pick up records other processes saved since the last read or write."""
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self) -> None:
+        """
+        Catch up with other processes. Caller holds the lock.
+
+        If the file at path is no longer the one this process has open,
+        another process compacted it, so it is reopened and indexed again.
+        Otherwise only lines appended since the last check are indexed.
+        """
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        opened = os.fstat(self._file.fileno())
+        if (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino):
+            self._file.close()
+            self._file = open(self.path, 'a+b')
+            self._index = {}
+            self._lines = 0
+            self._index_from(0)
+        elif current.st_size > self._end:
+            self._index_from(self._end)
+
+    def _sync(self, force: bool = False) -> None:
+        # Caller holds the lock.
+        self._file.flush()
+        if self.fsync == "never" and not force:
+            return
+        now = time.monotonic()
+        if force or self.fsync == "always" or now - self._last_sync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_sync = now
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Save a record, replacing any earlier record with the same key."""
+        line = (json.dumps(record) + "\n").encode()
+        key = str(record[self.key_field])
+
+        with self._locked():
+            self._refresh()
+            self._drop_unfinished_line()
+            offset = self._end
+            self._file.seek(offset)
+            self._file.write(line)
+            self._sync()
+            # Re-inserting keeps the index in the order records were last saved.
+            self._index.pop(key, None)
+            self._index[key] = (offset, len(line))
+            self._lines += 1
+            self._end = offset + len(line)
+            for callback in self._listeners:
+                callback(record)
+
+        self._maybe_compact()
+
+    def append_many(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Save several records with a single write and at most one sync.
+
+        Returns:
+            int: Number of records saved.
+        """
+        lines = [(json.dumps(record) + "\n").encode() for record in records]
+        keys = [str(record[self.key_field]) for record in records]
+
+        with self._locked():
+            self._refresh()
+            self._drop_unfinished_line()
+            offset = self._end
+            self._file.seek(offset)
+            self._file.write(b"".join(lines))
+            self._sync()
+            for key, line in zip(keys, lines):
+                self._index.pop(key, None)
+                self._index[key] = (offset, len(line))
+                offset += len(line)
+            self._lines += len(lines)
+            self._end = offset
+            for record in records:
+                for callback in self._listeners:
+                    callback(record)
+
+        self._maybe_compact()
+        return len(lines)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the latest record with this key, or None."""
+        with self._lock:
+            self._refresh()
+            location = self._index.get(key)
+            if location is None:
+                return None
+            offset, length = location
+            return json.loads(os.pread(self._file.fileno(), length, offset))
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return key in self._index
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+    def keys(self) -> List[str]:
+        """Keys of all records, in the order they were last saved."""
+        with self._lock:
+            self._refresh()
+            return list(self._index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the latest version of every record, in the order they were last saved."""
+        for key in self.keys():
+            record = self.get(key)
+            if record is not None:
+                yield record
+
+    def flush(self) -> None:
+        """Force everything written so far onto disk."""
+        with self._lock:
+            self._sync(force=True)
+
+    def close(self) -> None:
+        """Sync and close the journal file."""
+        with self._lock:
+            self._sync(force=True)
+            self._file.close()
+            if self._lock_file is not None:
+                self._lock_file.close()
+
+    def _maybe_compact(self) -> None:
+        """Start a background compaction when most lines are superseded."""
+        with self._lock:
+            if self._compacting or self._lines < self.compact_min_lines:
+                return
+            if len(self._index) * 2 > self._lines:
+                return
+            self._compacting = True
+        threading.Thread(target=self.compact, name="journal-compaction", daemon=True).start()
+
+    def compact(self) -> None:
+        """
+        Rewrite the journal with only the latest version of each record.
+
+        The live records are copied while new records keep being appended,
+        by this process or others. Only the final step, copying anything
+        appended meanwhile and swapping the files, holds the lock. If
+        another process compacted the journal in the meantime, this copy
+        is thrown away.
+        """
+        temp_path = f"{self.path}.compact.{os.getpid()}"
+        source = None
+        try:
+            with self._locked():
+                self._refresh()
+                snapshot = sorted(self._index.items(), key=lambda item: item[1][0])
+                snapshot_end = self._end
+                # A handle of its own, as a refresh may reopen self._file while copying.
+                source = open(self.path, 'rb')
+                copied = os.fstat(source.fileno())
+
+            new_index: Dict[str, Tuple[int, int]] = {}
+            with open(temp_path, 'wb') as out:
+                for key, (offset, length) in snapshot:
+                    new_index[key] = (out.tell(), length)
+                    out.write(os.pread(source.fileno(), length, offset))
+
+                with self._locked():
+                    self._refresh()
+                    opened = os.fstat(self._file.fileno())
+                    if (opened.st_dev, opened.st_ino) != (copied.st_dev, copied.st_ino):
+                        return
+
+                    # Records that changed after the snapshot point past its end.
+                    tail_start = out.tell()
+                    tail = os.pread(self._file.fileno(), self._end - snapshot_end, snapshot_end)
+                    out.write(tail)
+                    out.flush()
+                    os.fsync(out.fileno())
+
+                    for key, (offset, length) in self._index.items():
+                        if offset >= snapshot_end:
+                            new_index[key] = (tail_start + offset - snapshot_end, length)
+
+                    os.replace(temp_path, self.path)
+                    self._file.close()
+                    self._file = open(self.path, 'a+b')
+                    # Order keys by position, the order they were last saved in.
+                    self._index = dict(sorted(new_index.items(), key=lambda item: item[1][0]))
+                    self._lines = len(snapshot) + tail.count(b"\n")
+                    self._end = tail_start + len(tail)
+                    self.compactions += 1
+        finally:
+            if source is not None:
+                source.close()
+            with self._lock:
+                self._compacting = False
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: Live records, lines in the file, compactions run and fsync policy.
+        """
+        with self._lock:
+            return {
+                "records": len(self._index),
+                "lines": self._lines,
+                "compactions": self.compactions,
+                "fsync": self.fsync
+            }
+
+
+_journals: Dict[str, JournalStore] = {}
+_journals_lock = threading.Lock()
+
+
+def open_journal(path: str, key_field: str, legacy_path: Optional[str] = None) -> JournalStore:
+    """
+    Return the journal for a file, opening it on first use.
+
+    Every handler writing to the same file shares one JournalStore, so they
+    share its index. The fsync policy comes from the JOURNAL_FSYNC and
+    JOURNAL_FSYNC_INTERVAL environment variables.
+    """
+    path = os.path.abspath(path)
+    with _journals_lock:
+        journal = _journals.get(path)
+        if journal is None:
+            journal = JournalStore(
+                path,
+                key_field,
+                fsync=os.getenv('JOURNAL_FSYNC', 'interval'),
+                fsync_interval=float(os.getenv('JOURNAL_FSYNC_INTERVAL', '1.0')),
+                legacy_path=legacy_path
+            )
+            _journals[path] = journal
+        return journal
+
+
+def main():
+    """Migrate the old tickets.json, feedback.json and escalations.json files in one go."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Move JSON array data files into append-only journals.")
+    parser.add_argument("data_dir", nargs="?", default="data", help="folder holding the data files (default data)")
+    args = parser.parse_args()
+
+    for name in ("tickets", "feedback", "escalations"):
+        json_path = os.path.join(args.data_dir, f"{name}.json")
+        journal_path = os.path.join(args.data_dir, f"{name}.jsonl")
+        count = 0
+        if os.path.exists(json_path):
+            # Take the journal's lock, in case the chatbot is opening it at the same time.
+            with open(journal_path + ".lock", 'a+b') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                count = migrate_json_array(json_path, journal_path)
+        if count or os.path.exists(json_path + ".migrated"):
+            print(f"{name}: {count} records moved to {journal_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+KnowledgeBaseIndex - Splits a knowledge base into sections and ranks them with BM25.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# Words that carry no meaning for matching a question to a topic.
+STOP_WORDS = frozenset("""
+a about after all also am an and any are as at be been before being but by
+can could did do does doing for from get got had has have how i if in into is
+it its just me my no not of on or our please should so than that the their
+them then there these they this to too us was we were what when where which
+who why will with would you your yours
+""".split())
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word: str) -> str:
+    """
+    Very small suffix stripper so that "shipping", "ships" and "shipped"
+    all match "ship". It is not a full stemmer, just enough for FAQ text.
+    """
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            word = word[:-len(suffix)]
+            # "shipp" -> "ship", "stopp" -> "stop"
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in "aeiouls":
+                word = word[:-1]
+            break
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase, stemmed terms with stop words removed.
+    """
+    return [
+        _stem(token)
+        for token in _TOKEN_PATTERN.findall(text.lower())
+        if token not in STOP_WORDS
+    ]
+
+
+class KBSection:
+    """
+    One topic of the knowledge base, such as "Return Policy",
+    with the bullet points listed under it.
+    """
+
+    def __init__(self, title: str, entries: List[str]):
+        self.title: str = title
+        self.entries: List[str] = entries
+
+    def to_text(self) -> str:
+        """Render the section the same way it appears in the knowledge base."""
+        lines = [f"{self.title}:"]
+        lines.extend(f"- {entry}" for entry in self.entries)
+        return "\n".join(lines)
+
+
+def parse_sections(knowledge_base: str) -> Tuple[str, List[KBSection]]:
+    """
+    Split a knowledge base string into its header and sections.
+
+    A line ending with ":" starts a new section, and lines starting with
+    "-" are entries of the current section. Any other line that appears
+    before the first section (such as "Company Name: ...") is kept as
+    the header.
+
+    Returns:
+        tuple: (header text, list of KBSection)
+    """
+    header_lines: List[str] = []
+    sections: List[KBSection] = []
+
+    for raw_line in knowledge_base.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        if line.startswith("-"):
+            entry = line.lstrip("-").strip()
+            if sections:
+                sections[-1].entries.append(entry)
+            else:
+                header_lines.append(entry)
+        elif line.endswith(":"):
+            sections.append(KBSection(line[:-1].strip(), []))
+        elif sections:
+            sections[-1].entries.append(line)
+        else:
+            header_lines.append(line)
+
+    return "\n".join(header_lines), sections
+
+
+class KnowledgeBaseIndex:
+    """
+    Inverted index over knowledge base sections, ranked with BM25.
+
+    The index is built once, and each search only touches the postings
+    of the terms in the question, so the cost of a lookup does not grow
+    with the number of sections that share no words with it.
+    """
+
+    # Title words describe the whole section, so they count more than
+    # words that appear in a single bullet point.
+    TITLE_WEIGHT = 3
+
+    def __init__(self, knowledge_base: str, k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            knowledge_base (str): Knowledge base text in the FAQHandler format.
+            k1 (float): BM25 term frequency saturation.
+            b (float): BM25 document length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        self.header, self.sections = parse_sections(knowledge_base)
+
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._doc_lengths: List[int] = []
+        self._doc_terms: List[frozenset] = []
+
+        for doc_id, section in enumerate(self.sections):
+            terms = tokenize(section.title) * self.TITLE_WEIGHT
+            for entry in section.entries:
+                terms.extend(tokenize(entry))
+
+            self._doc_lengths.append(len(terms))
+            self._doc_terms.append(frozenset(terms))
+            for term, frequency in Counter(terms).items():
+                self._postings[term].append((doc_id, frequency))
+
+        total_length = sum(self._doc_lengths)
+        self._avg_length = total_length / len(self._doc_lengths) if self._doc_lengths else 0.0
+
+    def _idf(self, term: str) -> float:
+        """Inverse document frequency for a term (BM25 variant, never negative)."""
+        doc_count = len(self.sections)
+        doc_frequency = len(self._postings.get(term, ()))
+        return math.log(1 + (doc_count - doc_frequency + 0.5) / (doc_frequency + 0.5))
+
+    def score(self, query: str) -> List[Tuple[int, float]]:
+        """
+        Score every section that shares at least one term with the query.
+
+        Returns:
+            list: (section index, score) pairs, best match first.
+        """
+        scores: Dict[int, float] = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+
+            idf = self._idf(term)
+            for doc_id, frequency in postings:
+                length_ratio = self._doc_lengths[doc_id] / self._avg_length if self._avg_length else 1.0
+                denominator = frequency + self.k1 * (1 - self.b + self.b * length_ratio)
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / denominator
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+    def search(self, query: str, top_k: int = 3) -> List[KBSection]:
+        """
+        Return the most relevant sections for a query.
+
+        Args:
+            query (str): The customer's question.
+            top_k (int): Maximum number of sections to return.
+
+        Returns:
+            list: Matching KBSection objects, best match first.
+        """
+        return [self.sections[doc_id] for doc_id, _ in self.score(query)[:top_k]]
+
+    def best_match(self, query: str, full_coverage: bool = False) -> Tuple[Optional[KBSection], float]:
+        """
+        Find the single section that answers a query and how sure we are.
+
+        The confidence combines two things:
+        - coverage: the share of the question's terms found in the section,
+          so a question with words the knowledge base never mentions
+          ("Do you ship to Canada?") is not answered from it, and
+        - margin: how far the best section is ahead of the runner-up,
+          so questions that touch several topics are left to the AI.
+
+        Args:
+            query (str): The customer's question.
+            full_coverage (bool): Give zero confidence unless the section
+                                  contains every term of the question.
+
+        Returns:
+            tuple: (best KBSection or None, confidence between 0.0 and 1.0)
+        """
+        query_terms = set(tokenize(query))
+        ranked = self.score(query)
+        if not query_terms or not ranked:
+            return None, 0.0
+
+        best_id, best_score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+
+        coverage = len(query_terms & self._doc_terms[best_id]) / len(query_terms)
+        if full_coverage and coverage < 1.0:
+            return self.sections[best_id], 0.0
+        margin = best_score / (best_score + runner_up)
+        return self.sections[best_id], coverage * margin
+
+    def titles(self) -> List[str]:
+        """Return the titles of every section, in knowledge base order."""
+        return [section.title for section in self.sections]
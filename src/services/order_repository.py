@@ -0,0 +1,188 @@
+"""
+OrderRepository - Storage for customer orders, looked up by order ID.
+"""
+
+import abc
+import hashlib
+import json
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+def order_version(order: Dict[str, Any]) -> str:
+    """
+    Short hash of an order record. It changes whenever any field of the
+    order changes, so it can be used in cache keys.
+    """
+    data = json.dumps(order, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()[:16]
+
+
+class OrderRepository(abc.ABC):
+    """
+    Interface for order storage used by OrderStatusHandler.
+    Every lookup is by key, so the cost does not depend on how many
+    orders are stored.
+
+    Listeners registered with add_listener() are called with the order ID
+    each time an order is added or replaced through the repository.
+    """
+
+    def __init__(self):
+        self._listeners: List[Callable[[str], Any]] = []
+
+    def add_listener(self, listener: Callable[[str], Any]) -> None:
+        """Call listener(order_id) whenever an order changes. Added once only."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def _notify(self, order_ids: Iterable[str]) -> None:
+        if not self._listeners:
+            return
+        for order_id in order_ids:
+            for listener in self._listeners:
+                listener(order_id)
+
+    @abc.abstractmethod
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Return the order with this ID, or None if it does not exist."""
+
+    def get_many(self, order_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Return the orders that exist among the given IDs, keyed by ID."""
+        orders = {}
+        for order_id in order_ids:
+            order = self.get(order_id)
+            if order is not None:
+                orders[order_id] = order
+        return orders
+
+    @abc.abstractmethod
+    def upsert(self, order: Dict[str, Any]) -> None:
+        """Add an order, or replace it if an order with the same ID exists."""
+
+    def bulk_load(self, orders: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add or replace many orders at once.
+
+        Returns:
+            int: Number of orders loaded.
+        """
+        count = 0
+        for order in orders:
+            self.upsert(order)
+            count += 1
+        return count
+
+
+class InMemoryOrderRepository(OrderRepository):
+    """
+    Keeps orders in a dictionary keyed by order ID.
+    """
+
+    def __init__(self, orders: Optional[Dict[str, Dict[str, Any]]] = None):
+        super().__init__()
+        self._orders: Dict[str, Dict[str, Any]] = {}
+
+        if orders:
+            self.bulk_load(orders.values())
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        return self._orders.get(order_id)
+
+    def upsert(self, order: Dict[str, Any]) -> None:
+        self._orders[order["order_id"]] = order
+        self._notify([order["order_id"]])
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+
+class SQLiteOrderRepository(OrderRepository):
+    """
+    Stores orders in a SQLite database.
+
+    order_id is the primary key, so lookups stay fast with millions of
+    orders. The full order record is kept as JSON, because orders have
+    different fields depending on their status. Each thread gets its own
+    connection.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path (str): Path to the SQLite database file (created if missing).
+        """
+        super().__init__()
+        self.db_path = db_path
+        self._local = threading.local()
+
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS orders ("
+                " order_id TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Wait for other processes' writes instead of failing straight away.
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT data FROM orders WHERE order_id = ?", (order_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    def get_many(self, order_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        order_ids = list(dict.fromkeys(order_ids))
+        orders: Dict[str, Dict[str, Any]] = {}
+
+        # SQLite limits the number of parameters in one statement.
+        for start in range(0, len(order_ids), 500):
+            chunk = order_ids[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = self._connection().execute(
+                f"SELECT order_id, data FROM orders WHERE order_id IN ({placeholders})", chunk
+            )
+            for order_id, data in rows:
+                orders[order_id] = json.loads(data)
+        return orders
+
+    @staticmethod
+    def _row(order: Dict[str, Any]) -> tuple:
+        return (order["order_id"], json.dumps(order))
+
+    def upsert(self, order: Dict[str, Any]) -> None:
+        with self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO orders (order_id, data) VALUES (?, ?)", self._row(order))
+        self._notify([order["order_id"]])
+
+    def bulk_load(self, orders: Iterable[Dict[str, Any]], batch_size: int = 10000) -> int:
+        """Load orders in large transactions, which is far faster than one by one."""
+        conn = self._connection()
+        count = 0
+        batch = []
+        for order in orders:
+            batch.append(self._row(order))
+            if len(batch) >= batch_size:
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO orders (order_id, data) VALUES (?, ?)", batch)
+                self._notify(row[0] for row in batch)
+                count += len(batch)
+                batch = []
+
+        if batch:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO orders (order_id, data) VALUES (?, ?)", batch)
+            self._notify(row[0] for row in batch)
+            count += len(batch)
+        return count
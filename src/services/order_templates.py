@@ -0,0 +1,90 @@
+"""
+OrderTemplates - Renders routine order status replies locally, without the AI.
+"""
+
+import re
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
+
+# One reply per order status. Fields in braces come from the order record.
+_TEMPLATE_SOURCES = {
+    "Shipped": (
+        "Good news! Your order {order_id} ({items}) has shipped with {carrier}. "
+        "The tracking number is {tracking_number}, and it is expected to arrive by {estimated_delivery}."
+    ),
+    "Processing": (
+        "Your order {order_id} ({items}) is currently being processed. "
+        "It was placed on {order_date} and is expected to arrive by {estimated_delivery}. "
+        "We will share tracking details as soon as it ships."
+    ),
+    "Delivered": (
+        "Your order {order_id} ({items}) was delivered on {delivery_date}. "
+        "We hope you enjoy your purchase!"
+    ),
+    "Cancelled": (
+        "Your order {order_id} ({items}) was cancelled on {cancellation_date} "
+        "(reason: {cancellation_reason}). Refund status: {refund_status}."
+    ),
+    "Out for Delivery": (
+        "Your order {order_id} ({items}) is out for delivery with {carrier} "
+        "and is expected to arrive {estimated_delivery}. Tracking number: {tracking_number}."
+    ),
+}
+
+
+def _compile(source: str) -> Tuple[str, List[str]]:
+    """Parse a template once and remember which fields it needs."""
+    fields = [field for _, field, _, _ in Formatter().parse(source) if field]
+    return source, fields
+
+
+# Parsed when the module is imported, so rendering is a single format call.
+STATUS_TEMPLATES: Dict[str, Tuple[str, List[str]]] = {
+    status.lower(): _compile(source) for status, source in _TEMPLATE_SOURCES.items()
+}
+
+# Words that only ask "what is the status of this order" (or of several
+# orders, "ORD-1 and ORD-2"), in any phrasing. If a question contains
+# anything else, it needs the AI.
+_ROUTINE_WORDS = frozenset("""
+a about all also and any are arrive arriving at both can check could current delivery
+details do does each eta find for get hello hey hi how i id ids in info information is
+it its know latest let look lookup me my number numbers of on or order orders package
+packages please plus progress s see shipment shipments show status statuses tell thank
+thanks the their them these they this those track tracking up update want what whats
+when where will with would you
+""".split())
+
+_WORD_PATTERN = re.compile(r"[a-z]+")
+
+
+def is_routine_query(query: str, order_id_pattern: "re.Pattern[str]") -> bool:
+    """
+    Return True if the query only asks for an order's status.
+
+    Order IDs are removed first; every remaining word must be one of the
+    common status-lookup words ("where is my order", "track ...", ...).
+    """
+    remainder = order_id_pattern.sub(" ", query).lower()
+    return all(word in _ROUTINE_WORDS for word in _WORD_PATTERN.findall(remainder))
+
+
+def render_status(order: Dict[str, Any]) -> Optional[str]:
+    """
+    Render the status reply for an order.
+
+    Returns:
+        str: The reply, or None if the status has no template or the
+             order is missing a field the template needs.
+    """
+    template = STATUS_TEMPLATES.get(str(order.get("status", "")).lower())
+    if template is None:
+        return None
+
+    source, fields = template
+    values = dict(order)
+    values["items"] = ", ".join(order.get("items") or [])
+
+    if any(not values.get(field) for field in fields):
+        return None
+    return source.format_map(values)
@@ -0,0 +1,414 @@
+"""
+OzwellClient - Shared, pooled HTTP client for the Ozwell completion API.
+"""
+
+import os
+import random
+import threading
+import json
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
+
+from src.services.circuit_breaker import CircuitBreaker
+from src.services.settings import env_float, env_int
+
+
+class OzwellError(Exception):
+    """
+    Raised when Ozwell does not return a usable completion.
+    status_code is set when the service answered with an HTTP error.
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class OzwellResponseError(OzwellError):
+    """Raised when Ozwell answered, but the body could not be interpreted."""
+
+
+class OzwellUnavailableError(OzwellError):
+    """Raised without calling Ozwell while the circuit breaker is open."""
+
+
+class OzwellClient:
+    """
+    Sends completion requests to Ozwell over a pooled keep-alive session.
+
+    Every handler shares one client, so the TCP and TLS handshake is paid
+    once per connection instead of once per message. Each call has a
+    connect and read deadline, and rate-limit or server errors are retried
+    a bounded number of times with jittered exponential backoff.
+
+    A circuit breaker watches the outcome of every call. While Ozwell is
+    failing, calls are refused immediately with OzwellUnavailableError so
+    handlers can answer from their local fallbacks instead of waiting.
+    With hedging enabled, a completion that is slower than the recent
+    95th percentile gets a second, parallel request and the first reply wins.
+    """
+
+    DEFAULT_URL = "https://ai.bluehive.com/api/v1/completion"
+
+    # Status codes that usually mean "try again shortly".
+    RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(
+        self,
+        api_key: str,
+        url: Optional[str] = None,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 30.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        pool_size: int = 10,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge: bool = False
+    ):
+        """
+        Args:
+            api_key (str): Ozwell API key.
+            url (str, optional): Completion endpoint. Defaults to OZWELL_URL
+                                 or the public Ozwell endpoint.
+            connect_timeout (float): Seconds allowed to open a connection.
+            read_timeout (float): Seconds allowed between bytes of the reply.
+            max_retries (int): Extra attempts after the first one.
+            backoff_base (float): First backoff delay in seconds.
+            backoff_max (float): Upper bound for a single backoff delay.
+            pool_size (int): Connections kept alive for reuse.
+            breaker (CircuitBreaker, optional): Breaker guarding the endpoint.
+            hedge (bool): Send a second request when a completion is slow.
+        """
+        self.api_key = api_key
+        self.url = url or os.getenv('OZWELL_URL', self.DEFAULT_URL)
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        })
+
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+
+        self._lock = threading.Lock()
+        self._counters: Counter = Counter()
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Work out how long to wait before the next attempt.
+        Uses "full jitter" so that many clients retrying at once spread out,
+        and honours a numeric Retry-After header when Ozwell sends one.
+        """
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def post(self, payload: Dict[str, Any], stream: bool = False) -> requests.Response:
+        """
+        Send a raw request to the completion endpoint with retries.
+        Retries only happen before any of the reply has been read, so a
+        streamed answer is never repeated.
+
+        Returns:
+            requests.Response: A successful (2xx) response.
+
+        Raises:
+            OzwellError: If every attempt failed.
+            OzwellUnavailableError: If the circuit breaker is open.
+        """
+        self._count("calls")
+
+        if not self.breaker.allow_request():
+            self._count("short_circuited")
+            raise OzwellUnavailableError("The AI service is temporarily unavailable.")
+
+        started = time.monotonic()
+        succeeded = False
+        try:
+            response = self._post_with_retries(payload, stream)
+            succeeded = True
+        except OzwellError as error:
+            # Only outages count against the breaker, not client errors such as a bad key.
+            succeeded = error.status_code is not None and error.status_code not in self.RETRY_STATUS_CODES
+            raise
+        finally:
+            # Recorded whatever was raised, or a half-open breaker would keep
+            # its probe slot taken and refuse every later call.
+            if succeeded:
+                self.breaker.record_success(time.monotonic() - started)
+            else:
+                self.breaker.record_failure(time.monotonic() - started)
+
+        return response
+
+    def _post_with_retries(self, payload: Dict[str, Any], stream: bool) -> requests.Response:
+        """Try the request up to max_retries + 1 times, backing off between attempts."""
+        for attempt in range(self.max_retries + 1):
+            self._count("attempts")
+            retry_after = None
+
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = OzwellError(f"Could not reach the AI service: {str(e)}")
+            except requests.RequestException as e:
+                # Redirect loops, bad URLs and broken bodies will not go away on a retry.
+                self._count("failures")
+                raise OzwellError(f"The request to the AI service failed: {str(e)}")
+            else:
+                if response.ok:
+                    return response
+
+                error = OzwellError(
+                    f"The service returned status code {response.status_code}.",
+                    status_code=response.status_code
+                )
+                retry_after = response.headers.get("Retry-After")
+                response.close()
+
+                if response.status_code not in self.RETRY_STATUS_CODES:
+                    break
+
+            if attempt < self.max_retries:
+                self._count("retries")
+                time.sleep(self._backoff_delay(attempt, retry_after))
+
+        self._count("failures")
+        raise error
+
+    def _complete_once(self, payload: Dict[str, Any]) -> str:
+        """Send one completion request and return the generated text."""
+        response = self.post(payload)
+        try:
+            return response.json()["choices"][0]["message"]["content"]
+        except Exception as parsing_error:
+            raise OzwellResponseError(str(parsing_error), status_code=response.status_code)
+
+    def _complete_hedged(self, payload: Dict[str, Any]) -> str:
+        """
+        Send the request, and if it is still running after the recent
+        95th percentile latency, send one more copy and use whichever
+        reply arrives first.
+        """
+        hedge_delay = self.breaker.latency_percentile(95)
+        if hedge_delay is None:
+            # Not enough history yet to know what "slow" means.
+            return self._complete_once(payload)
+
+        with self._lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ozwell-hedge")
+            pool = self._hedge_pool
+
+        pending = {pool.submit(self._complete_once, payload)}
+        done, pending = wait(pending, timeout=hedge_delay)
+
+        if not done:
+            self._count("hedges_sent")
+            hedge = pool.submit(self._complete_once, payload)
+            pending.add(hedge)
+            first_error: Optional[OzwellError] = None
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        result = future.result()
+                    except OzwellError as error:
+                        first_error = first_error or error
+                        continue
+                    if future is hedge:
+                        self._count("hedges_won")
+                    # The slower request is left to finish in the background.
+                    return result
+            raise first_error
+
+        return done.pop().result()
+
+    def complete(
+        self,
+        prompt: str,
+        system_message: str,
+        temperature: float = 0.7,
+        max_tokens: int = 300
+    ) -> str:
+        """
+        Request a completion and return the generated text.
+
+        Raises:
+            OzwellError: If the request failed.
+            OzwellResponseError: If the reply could not be parsed.
+            OzwellUnavailableError: If the circuit breaker is open.
+        """
+        payload = {
+            "prompt": prompt,
+            "systemMessage": system_message,
+            "temperature": temperature,
+            "maxTokens": max_tokens
+        }
+
+        if self.hedge:
+            return self._complete_hedged(payload)
+        return self._complete_once(payload)
+
+    @staticmethod
+    def _chunk_text(event: Dict[str, Any]) -> str:
+        """
+        Pull the new text out of one streamed event.
+        Supports incremental "delta" events as well as events that carry
+        a "text" or full "message" field.
+        """
+        choice = event["choices"][0]
+        for field in ("delta", "message"):
+            if isinstance(choice.get(field), dict):
+                return choice[field].get("content") or ""
+        return choice.get("text") or ""
+
+    def stream_complete(
+        self,
+        prompt: str,
+        system_message: str,
+        temperature: float = 0.7,
+        max_tokens: int = 300
+    ) -> Iterator[str]:
+        """
+        Request a completion and yield the text as it is generated.
+
+        The request asks Ozwell to stream server-sent events
+        ("data: {...}" lines ending with "data: [DONE]"). If the service
+        answers with a plain JSON body instead, the whole answer is
+        yielded as one chunk, so callers work either way.
+
+        Raises:
+            OzwellError: If the request failed or the stream broke off.
+            OzwellResponseError: If an event could not be parsed.
+        """
+        payload = {
+            "prompt": prompt,
+            "systemMessage": system_message,
+            "temperature": temperature,
+            "maxTokens": max_tokens,
+            "stream": True
+        }
+
+        response = self.post(payload, stream=True)
+        try:
+            if "text/event-stream" not in response.headers.get("Content-Type", ""):
+                try:
+                    yield response.json()["choices"][0]["message"]["content"]
+                except Exception as parsing_error:
+                    raise OzwellResponseError(str(parsing_error), status_code=response.status_code)
+                return
+
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+
+                try:
+                    text = self._chunk_text(json.loads(data))
+                except Exception as parsing_error:
+                    raise OzwellResponseError(str(parsing_error), status_code=response.status_code)
+                if text:
+                    yield text
+
+        except requests.RequestException as e:
+            raise OzwellError(f"The connection to the AI service was interrupted: {str(e)}")
+        finally:
+            response.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Report request counters and how often pooled connections were reused.
+
+        Returns:
+            dict: calls, attempts, retries, failures, connections opened,
+                  requests sent over them and the connection reuse ratio.
+        """
+        connections_opened = 0
+        requests_sent = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                connections_opened += pool.num_connections
+                requests_sent += pool.num_requests
+
+        with self._lock:
+            return {
+                "calls": self._counters["calls"],
+                "attempts": self._counters["attempts"],
+                "retries": self._counters["retries"],
+                "failures": self._counters["failures"],
+                "short_circuited": self._counters["short_circuited"],
+                "hedges_sent": self._counters["hedges_sent"],
+                "hedges_won": self._counters["hedges_won"],
+                "connections_opened": connections_opened,
+                "requests_sent": requests_sent,
+                "connection_reuse_ratio": (
+                    (requests_sent - connections_opened) / requests_sent if requests_sent else 0.0
+                ),
+                "breaker": self.breaker.stats()
+            }
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        self.session.close()
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False)
+
+
+_clients: Dict[str, OzwellClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key: str) -> OzwellClient:
+    """
+    Return the process-wide client for an API key, creating it on first use.
+    Timeouts and retries can be tuned with OZWELL_CONNECT_TIMEOUT,
+    OZWELL_READ_TIMEOUT and OZWELL_MAX_RETRIES, the circuit breaker with
+    OZWELL_BREAKER_FAILURE_RATE and OZWELL_BREAKER_OPEN_SECONDS, and
+    hedged requests are turned on with OZWELL_HEDGE=1.
+    """
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = OzwellClient(
+                api_key,
+                connect_timeout=env_float('OZWELL_CONNECT_TIMEOUT', 3.05),
+                read_timeout=env_float('OZWELL_READ_TIMEOUT', 30.0),
+                max_retries=env_int('OZWELL_MAX_RETRIES', 2),
+                breaker=CircuitBreaker(
+                    failure_rate_threshold=env_float('OZWELL_BREAKER_FAILURE_RATE', 0.5),
+                    open_seconds=env_float('OZWELL_BREAKER_OPEN_SECONDS', 30.0)
+                ),
+                hedge=os.getenv('OZWELL_HEDGE', '0') == '1'
+            )
+            _clients[api_key] = client
+        return client
@@ -0,0 +1,251 @@
+"""
+PasswordHasher - Salted, deliberately slow password hashing run in a pool of worker processes.
+"""
+
+import asyncio
+import atexit
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+
+# Supported key derivation functions. The cost is log2(N) for scrypt
+# and the iteration count for PBKDF2.
+ALGORITHMS = ("scrypt", "pbkdf2_sha256")
+
+# Calibration never goes below these costs, however slow the machine is.
+MIN_COST = {"scrypt": 14, "pbkdf2_sha256": 100000}
+
+# scrypt needs 128 * r * N bytes per hash, so N = 2^17 already takes 128 MiB
+# in every worker process.
+MAX_SCRYPT_LOG2_N = 17
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _derive(algorithm: str, password: str, salt: bytes, cost: int) -> bytes:
+    if algorithm == "scrypt":
+        n = 1 << cost
+        return hashlib.scrypt(
+            password.encode(), salt=salt, n=n, r=SCRYPT_R, p=SCRYPT_P,
+            maxmem=256 * SCRYPT_R * n + (1 << 20), dklen=KEY_BYTES
+        )
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, cost, dklen=KEY_BYTES)
+
+
+def _encode_hash(algorithm: str, password: str, salt: bytes, cost: int) -> str:
+    # Runs in a worker process. Stored as "algorithm$cost$salt$key".
+    return f"{algorithm}${cost}${_b64(salt)}${_b64(_derive(algorithm, password, salt, cost))}"
+
+
+def is_legacy_hash(stored: str) -> bool:
+    """True for the old unsalted SHA-256 hex digests."""
+    return "$" not in stored and len(stored) == 64
+
+
+def _verify(password: str, stored: str) -> bool:
+    # Runs in a worker process.
+    if is_legacy_hash(stored):
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+    try:
+        algorithm, cost, salt, key = stored.split("$")
+        if algorithm not in ALGORITHMS:
+            return False
+        return hmac.compare_digest(_derive(algorithm, password, _unb64(salt), int(cost)), _unb64(key))
+    except ValueError:
+        return False
+
+
+def calibrate(algorithm: str = "scrypt", target_ms: float = 100.0) -> int:
+    """
+    Find the cost that makes one hash take about target_ms on this machine.
+
+    scrypt's N is doubled until a hash takes at least target_ms (or the
+    memory cap is reached), then whichever of the last two costs is nearer
+    target_ms is kept, so the time stays within a factor of sqrt(2) of it
+    instead of overshooting by up to 2x. PBKDF2's iteration count is
+    scaled from one timed run. Neither goes below MIN_COST.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"algorithm must be one of {', '.join(ALGORITHMS)}, not '{algorithm}'.")
+    salt = os.urandom(SALT_BYTES)
+
+    if algorithm == "scrypt":
+        cost = MIN_COST["scrypt"]
+        previous_ms: Optional[float] = None
+        while True:
+            started = time.perf_counter()
+            _derive(algorithm, "calibration", salt, cost)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= target_ms:
+                # Compare the overshoot with the previous cost's undershoot.
+                if previous_ms is not None and target_ms / previous_ms < elapsed_ms / target_ms:
+                    cost -= 1
+                return cost
+            if cost >= MAX_SCRYPT_LOG2_N:
+                return cost
+            previous_ms = elapsed_ms
+            cost += 1
+
+    sample = 20000
+    started = time.perf_counter()
+    _derive(algorithm, "calibration", salt, sample)
+    elapsed_ms = max((time.perf_counter() - started) * 1000, 0.001)
+    return max(MIN_COST[algorithm], int(sample * target_ms / elapsed_ms))
+
+
+def _worker_context() -> multiprocessing.context.BaseContext:
+    """Start workers from a clean forkserver where available, otherwise by spawning them."""
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+class PasswordHasher:
+    """
+    Hashes and checks passwords with a salted, memory-hard (scrypt) or
+    slow (PBKDF2) key derivation function.
+
+    The work runs in a pool of worker processes, so a slow hash never
+    blocks the calling thread's other work or an asyncio event loop, and
+    many resets at once spread across every core instead of queuing on
+    one. With workers=0 hashes are computed in the calling thread.
+    """
+
+    def __init__(
+        self,
+        algorithm: str = "scrypt",
+        cost: Optional[int] = None,
+        workers: Optional[int] = None,
+        target_ms: float = 100.0
+    ):
+        """
+        Args:
+            algorithm (str): One of ALGORITHMS.
+            cost (int, optional): Work factor. If not given, calibrate() picks
+                                  one that takes about target_ms per hash.
+            workers (int, optional): Worker processes (default: one per CPU).
+            target_ms (float): Time one hash should take when calibrating.
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"algorithm must be one of {', '.join(ALGORITHMS)}, not '{algorithm}'.")
+
+        self.algorithm = algorithm
+        self.cost = cost if cost is not None else calibrate(algorithm, target_ms)
+        self.workers = (os.cpu_count() or 1) if workers is None else max(0, workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def _run(self, fn, *args) -> Future:
+        if self.workers == 0:
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        with self._pool_lock:
+            if self._pool is None:
+                # Started on first use, so importing this module stays cheap. Workers
+                # are never forked from this process, whose other threads (write-behind,
+                # compaction, hedging) may hold locks a forked child would inherit.
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_worker_context())
+            return self._pool.submit(fn, *args)
+
+    def submit(self, password: str) -> Future:
+        """Start hashing a password with a new random salt. The future holds the stored form."""
+        return self._run(_encode_hash, self.algorithm, password, os.urandom(SALT_BYTES), self.cost)
+
+    def hash(self, password: str) -> str:
+        """Hash a password, waiting for the result."""
+        return self.submit(password).result()
+
+    async def hash_async(self, password: str) -> str:
+        """Hash a password from asyncio code without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(password))
+
+    def verify(self, password: str, stored: str) -> bool:
+        """Check a password against a stored hash, including legacy SHA-256 ones."""
+        return self._run(_verify, password, stored).result()
+
+    def needs_upgrade(self, stored: str) -> bool:
+        """True if a stored hash is legacy or uses another algorithm or cost than the current one."""
+        return not stored.startswith(f"{self.algorithm}${self.cost}$")
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+_hasher: Optional[PasswordHasher] = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """
+    Return the hasher shared by every handler in this process.
+
+    Configured by PASSWORD_HASH_ALGORITHM (default scrypt),
+    PASSWORD_HASH_COST (skips calibration), PASSWORD_HASH_TARGET_MS
+    (default 100) and PASSWORD_HASH_WORKERS (default one per CPU).
+    """
+    global _hasher
+    with _hasher_lock:
+        if _hasher is None:
+            cost = os.getenv('PASSWORD_HASH_COST')
+            workers = os.getenv('PASSWORD_HASH_WORKERS')
+            _hasher = PasswordHasher(
+                algorithm=os.getenv('PASSWORD_HASH_ALGORITHM', 'scrypt'),
+                cost=int(cost) if cost else None,
+                workers=int(workers) if workers else None,
+                target_ms=float(os.getenv('PASSWORD_HASH_TARGET_MS', '100'))
+            )
+        return _hasher
+
+
+@atexit.register
+def _shutdown() -> None:
+    with _hasher_lock:
+        if _hasher is not None:
+            _hasher.shutdown()
+
+
+def main():
+    """Print the cost to use on this machine, for PASSWORD_HASH_COST."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Calibrate password hashing cost for this machine.")
+    parser.add_argument("--algorithm", choices=ALGORITHMS, default="scrypt")
+    parser.add_argument("--target-ms", type=float, default=100.0, help="time one hash should take (default 100)")
+    args = parser.parse_args()
+
+    cost = calibrate(args.algorithm, args.target_ms)
+    salt = os.urandom(SALT_BYTES)
+    started = time.perf_counter()
+    _derive(args.algorithm, "calibration", salt, cost)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"PASSWORD_HASH_ALGORITHM={args.algorithm}")
+    print(f"PASSWORD_HASH_COST={cost}  # {elapsed_ms:.0f} ms per hash")
+
+
+if __name__ == "__main__":
+    main()
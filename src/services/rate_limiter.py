@@ -0,0 +1,177 @@
+"""
+RateLimiter - Per-key token buckets that reject bursts of requests before they reach storage or Ozwell.
+"""
+
+import math
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.models.response import Response
+from src.services.settings import env_int
+
+# Default limits per handler: (requests per minute, burst).
+DEFAULT_LIMITS = {
+    "password_reset": (5.0, 5),
+    "tickets": (10.0, 10),
+    "escalations": (5.0, 3),
+    "feedback": (10.0, 5)
+}
+
+
+class RateLimiter:
+    """
+    One token bucket per key (user ID, phone number, name...).
+
+    A bucket holds up to `burst` tokens and refills at `per_minute` tokens
+    a minute; each request takes one token and is refused when there is
+    none. A bucket is just [tokens, last refill time], kept in an LRU
+    ordered dict, so checking a key is O(1) and each active key costs a
+    few dozen bytes. A bucket left alone long enough to refill completely
+    is the same as a new one, so idle keys are dropped as they come up at
+    the old end of the dict, and at most max_keys are kept at once.
+    """
+
+    def __init__(
+        self,
+        per_minute: float,
+        burst: int,
+        max_keys: int = 100000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            per_minute (float): Sustained requests allowed per key per minute.
+            burst (int): Requests a key may make at once after being idle.
+            max_keys (int): Most keys tracked at once; the least recently used go first.
+        """
+        self.rate = per_minute / 60
+        self.burst = max(1, burst)
+        self.max_keys = max(1, max_keys)
+        self._clock = clock
+        # Seconds after which an untouched bucket is full again.
+        self._idle_after = self.burst / self.rate if self.rate > 0 else float("inf")
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.allowed = 0
+        self.limited = 0
+
+    def _evict_idle(self, now: float) -> None:
+        # Caller holds the lock. The oldest entries were touched longest ago.
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket[1] < self._idle_after and len(self._buckets) <= self.max_keys:
+                break
+            del self._buckets[key]
+
+    def allow(self, key: str) -> Tuple[bool, float]:
+        """
+        Take a token for key if there is one.
+
+        Returns:
+            tuple: (allowed, seconds until the next token if not allowed)
+        """
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(self.burst), now]
+                self._buckets[key] = bucket
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+                self._buckets.move_to_end(key)
+            self._evict_idle(now)
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                self.allowed += 1
+                return True, 0.0
+
+            self.limited += 1
+            retry_after = (1 - bucket[0]) / self.rate if self.rate > 0 else float("inf")
+            return False, retry_after
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns:
+            dict: Keys tracked, requests allowed and requests limited.
+        """
+        with self._lock:
+            return {"keys": len(self._buckets), "allowed": self.allowed, "limited": self.limited}
+
+
+def limited_response(retry_after: float) -> Response:
+    """The reply given instead of handling a rate-limited request."""
+    seconds = max(1, round(retry_after))
+    return Response(
+        text=(
+            "We have received too many requests from you in a short time. "
+            f"Please try again in {seconds} second{'s' if seconds != 1 else ''}."
+        ),
+        suggestions=["Wait a moment and try again.", "Return to the main menu."],
+        served_by="rate_limit",
+        retry_after=retry_after
+    )
+
+
+_limiters: Dict[str, Optional[RateLimiter]] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str) -> Optional[RateLimiter]:
+    """
+    Return the limiter for a handler ("password_reset", "tickets",
+    "escalations" or "feedback"), shared by every instance of it, or None
+    if it is not limited.
+
+    RATE_LIMIT_<NAME> overrides the default as "per_minute" or
+    "per_minute:burst" (e.g. RATE_LIMIT_TICKETS=20:5), or turns it off
+    with 0. RATE_LIMIT=0 turns every limit off. A setting that cannot be
+    read is reported on stderr and the default is used instead.
+    """
+    with _limiters_lock:
+        if name not in _limiters:
+            per_minute, burst = DEFAULT_LIMITS.get(name, (0.0, 0))
+            variable = f"RATE_LIMIT_{name.upper()}"
+            setting = os.getenv(variable)
+            if setting:
+                try:
+                    rate, _, burst_setting = setting.partition(":")
+                    rate_value = float(rate)
+                    if not math.isfinite(rate_value):
+                        raise ValueError(rate)
+                    burst_value = int(burst_setting) if burst_setting else max(1, round(rate_value))
+                    per_minute, burst = rate_value, burst_value
+                except (ValueError, OverflowError):
+                    print(f"Ignoring {variable}={setting!r}: expected per_minute or per_minute:burst.",
+                          file=sys.stderr)
+
+            max_keys = env_int('RATE_LIMIT_MAX_KEYS', 100000)
+
+            if os.getenv('RATE_LIMIT', '1') == '0' or per_minute <= 0:
+                _limiters[name] = None
+            else:
+                _limiters[name] = RateLimiter(per_minute, burst, max_keys=max_keys)
+        return _limiters[name]
+
+
+def check(name: str, key: str) -> Optional[Response]:
+    """
+    Take a token from the named limiter for key.
+
+    Returns:
+        Response: The rate-limited reply, or None if the request may go ahead.
+    """
+    limiter = get_rate_limiter(name)
+    if limiter is None:
+        return None
+    allowed, retry_after = limiter.allow((key or "").strip().lower())
+    return None if allowed else limited_response(retry_after)
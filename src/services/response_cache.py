@@ -0,0 +1,141 @@
+"""
+ResponseCache - Bounded in-process cache for chatbot answers.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+
+
+class ResponseCache:
+    """
+    A small LRU cache with a time-to-live for each entry.
+
+    Entries are kept in least-recently-used order, so when the cache is
+    full the oldest unused answer is dropped first. Hit and miss counters
+    are kept so we can see how much work the cache is saving.
+
+    Entries can carry tags (for example the order IDs an answer is about),
+    so every entry for a tag can be dropped at once when its data changes.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0):
+        """
+        Args:
+            max_entries (int): Maximum number of answers kept in memory.
+            ttl_seconds (float): How long an answer stays valid. Zero or less
+                                 means entries never expire.
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self._entry_tags: Dict[Hashable, tuple] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the cached value for a key, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at and expires_at < time.monotonic():
+                # The answer is too old, so treat it as a miss.
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _remove(self, key: Hashable) -> None:
+        # Caller holds the lock.
+        self._entries.pop(key, None)
+        for tag in self._entry_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[Hashable] = ()) -> None:
+        """
+        Store a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key: Cache key.
+            value: Value to store.
+            tags (iterable, optional): Tags that invalidate_tag() can later
+                                       use to drop this entry.
+        """
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else 0.0
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entry_tags:
+                self._remove(key)
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            if tags:
+                self._entry_tags[key] = tags
+                for tag in tags:
+                    self._tags.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a single entry if it exists."""
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_tag(self, tag: Hashable) -> int:
+        """
+        Remove every entry stored with this tag.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        with self._lock:
+            keys = list(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        """Remove every entry. Counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._entry_tags.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return a snapshot of the cache counters.
+
+        Returns:
+            dict: size, hits, misses, evictions and the hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
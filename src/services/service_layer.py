@@ -18,6 +18,10 @@ class ServiceLayer:
         # Look up the status of an order by its ID and return details if found.
         pass
 
+    def get_orders(self, order_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        # Look up several orders at once. Returns the ones found, keyed by order ID.
+        pass
+
     def create_ticket(self, user_id: str, issue: str) -> Dict[str, Any]:
         # Create a support ticket for the given user and issue description.
         pass
@@ -0,0 +1,54 @@
+"""
+Settings - Reads numeric settings from environment variables, falling back to the default on a bad value.
+"""
+
+import math
+import os
+import sys
+
+
+def env_float(name: str, default: float) -> float:
+    """
+    Read a number from an environment variable.
+
+    Args:
+        name (str): Variable name, e.g. FAQ_CACHE_TTL.
+        default (float): Used when the variable is unset or blank, or cannot
+            be read as a finite number (reported on stderr).
+
+    Returns:
+        float: The setting.
+    """
+    setting = os.getenv(name)
+    if setting is None or not setting.strip():
+        return default
+    try:
+        value = float(setting)
+    except ValueError:
+        value = math.nan
+    if not math.isfinite(value):
+        print(f"Ignoring {name}={setting!r}: expected a number.", file=sys.stderr)
+        return default
+    return value
+
+
+def env_int(name: str, default: int) -> int:
+    """
+    Read a whole number from an environment variable.
+
+    Args:
+        name (str): Variable name, e.g. FAQ_CACHE_SIZE.
+        default (int): Used when the variable is unset or blank, or cannot
+            be read as a whole number (reported on stderr).
+
+    Returns:
+        int: The setting.
+    """
+    setting = os.getenv(name)
+    if setting is None or not setting.strip():
+        return default
+    try:
+        return int(setting)
+    except ValueError:
+        print(f"Ignoring {name}={setting!r}: expected a whole number.", file=sys.stderr)
+        return default
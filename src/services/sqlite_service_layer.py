@@ -0,0 +1,339 @@
+"""
+SQLiteServiceLayer - ServiceLayer backed by a single SQLite database, shared by every handler.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.services.id_allocator import SequenceAllocator
+from src.services.kb_index import KnowledgeBaseIndex
+from src.services.order_repository import SQLiteOrderRepository
+from src.services.service_layer import ServiceLayer
+
+
+class SQLiteRecordTable:
+    """
+    A table of records with the same interface as JournalStore
+    (append, get, len, iteration), so handlers can use either.
+
+    The full record is kept as JSON, and the fields listed in
+    indexed_fields are copied into their own indexed columns so records
+    can be found by them without scanning the table.
+    """
+
+    def __init__(self, layer: "SQLiteServiceLayer", table: str, key_field: str, indexed_fields: Sequence[str]):
+        self.layer = layer
+        self.table = table
+        self.key_field = key_field
+        self.indexed_fields = list(indexed_fields)
+        self.path = layer.db_path
+
+        columns = "".join(f", {field} TEXT" for field in self.indexed_fields)
+        with layer._connection() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                f" {key_field} TEXT PRIMARY KEY{columns},"
+                f" data TEXT NOT NULL)"
+            )
+            for field in self.indexed_fields:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{field} ON {table} ({field})")
+
+        # Built once; sqlite3 keeps each connection's compiled statements
+        # in its statement cache, so these are only prepared once.
+        placeholders = ", ".join("?" for _ in range(len(self.indexed_fields) + 2))
+        column_names = ", ".join([key_field] + self.indexed_fields + ["data"])
+        self._insert_sql = f"INSERT OR REPLACE INTO {table} ({column_names}) VALUES ({placeholders})"
+        self._get_sql = f"SELECT data FROM {table} WHERE {key_field} = ?"
+        self._count_sql = f"SELECT COUNT(*) FROM {table}"
+
+    @staticmethod
+    def _index_value(value: Any) -> Optional[str]:
+        # Indexed values are matched without case or surrounding spaces.
+        return None if value is None else str(value).strip().lower()
+
+    def _row(self, record: Dict[str, Any]) -> tuple:
+        indexed = [self._index_value(record.get(field)) for field in self.indexed_fields]
+        return (str(record[self.key_field]), *indexed, json.dumps(record))
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Save a record, replacing any earlier record with the same key."""
+        with self.layer._connection() as conn:
+            conn.execute(self._insert_sql, self._row(record))
+
+    def append_many(self, records: Iterable[Dict[str, Any]], batch_size: int = 1000) -> int:
+        """
+        Save many records, committing once per batch instead of once per record.
+
+        Returns:
+            int: Number of records saved.
+        """
+        conn = self.layer._connection()
+        count = 0
+        batch = []
+        for record in records:
+            batch.append(self._row(record))
+            if len(batch) >= batch_size:
+                with conn:
+                    conn.executemany(self._insert_sql, batch)
+                count += len(batch)
+                batch = []
+
+        if batch:
+            with conn:
+                conn.executemany(self._insert_sql, batch)
+            count += len(batch)
+        return count
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the record with this key, or None."""
+        row = self.layer._connection().execute(self._get_sql, (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _where(self, filters: Dict[str, Any]) -> Tuple[str, List[Optional[str]]]:
+        unknown = set(filters) - set(self.indexed_fields)
+        if unknown:
+            raise ValueError(f"Cannot search {self.table} by {', '.join(sorted(unknown))}.")
+        where = " AND ".join(f"{field} = ?" for field in filters) or "1"
+        return where, [self._index_value(value) for value in filters.values()]
+
+    def find(self, limit: int = 100, offset: int = 0, **filters: Any) -> List[Dict[str, Any]]:
+        """
+        Return records whose indexed fields match, newest first.
+
+        Example: tickets.find(customer_email="a@example.com", status="Open")
+        """
+        where, values = self._where(filters)
+        order = "created_at DESC, " if "created_at" in self.indexed_fields else ""
+        rows = self.layer._connection().execute(
+            f"SELECT data FROM {self.table} WHERE {where} ORDER BY {order}rowid DESC LIMIT ? OFFSET ?",
+            (*values, limit, offset)
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def count(self, **filters: Any) -> int:
+        """Number of records whose indexed fields match."""
+        where, values = self._where(filters)
+        return self.layer._connection().execute(
+            f"SELECT COUNT(*) FROM {self.table} WHERE {where}", values
+        ).fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return self.layer._connection().execute(self._count_sql).fetchone()[0]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        rows = self.layer._connection().execute(f"SELECT data FROM {self.table} ORDER BY rowid")
+        for (data,) in rows:
+            yield json.loads(data)
+
+
+class SQLiteSequence(SequenceAllocator):
+    """
+    SequenceAllocator that keeps its counter in the database's sequences
+    table instead of a counter file. SQLite's write lock makes reserving
+    a block safe across processes.
+    """
+
+    def __init__(self, layer: "SQLiteServiceLayer", name: str, block_size: int = 1, seed=None):
+        super().__init__(layer.db_path, block_size=block_size, seed=seed)
+        self.layer = layer
+        self.name = name
+
+    def _reserve_block(self) -> None:
+        conn = self.layer._connection()
+        with conn:
+            # BEGIN IMMEDIATE takes the write lock before reading the counter.
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT value FROM sequences WHERE name = ?", (self.name,)).fetchone()
+            start = row[0] if row else (self.seed() if self.seed else 0) + 1
+            conn.execute(
+                "INSERT OR REPLACE INTO sequences (name, value) VALUES (?, ?)",
+                (self.name, start + self.block_size)
+            )
+
+        self._next = start
+        self._limit = start + self.block_size
+
+
+class SQLiteServiceLayer(ServiceLayer):
+    """
+    Stores tickets, feedback, escalations and orders in one SQLite database.
+
+    The database runs in WAL mode, so readers never wait for writers and
+    many handlers and processes can use it at once. Each thread gets its
+    own connection. Every write is a single small transaction; nothing
+    rewrites whole files.
+    """
+
+    def __init__(self, db_path: str, knowledge_base: str = ""):
+        """
+        Args:
+            db_path (str): Path to the SQLite database file (created if missing).
+            knowledge_base (str, optional): FAQ knowledge base text for kb_search().
+        """
+        super().__init__()
+        self.db_path = db_path
+        self.knowledge_base = knowledge_base
+        self._local = threading.local()
+        self._kb_index: Optional[KnowledgeBaseIndex] = None
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS sequences (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+        self.tickets = SQLiteRecordTable(self, "tickets", "ticket_id", ["customer_email", "status", "created_at"])
+        self.feedback = SQLiteRecordTable(self, "feedback", "feedback_id", ["customer_name", "rating", "created_at"])
+        self.escalations = SQLiteRecordTable(self, "escalations", "escalation_id", ["phone_number", "status", "created_at"])
+        self.orders = SQLiteOrderRepository(db_path)
+
+        self._sequences: Dict[str, SQLiteSequence] = {}
+        self._sequences_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            # Sync less often; WAL mode keeps the database consistent after a crash.
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def sequence(self, name: str) -> SQLiteSequence:
+        """
+        Return the ID allocator for a table ("tickets", "feedback" or
+        "escalations"). It continues from the records already stored.
+        """
+        with self._sequences_lock:
+            sequence = self._sequences.get(name)
+            if sequence is None:
+                table = getattr(self, name)
+                sequence = SQLiteSequence(
+                    self,
+                    name,
+                    block_size=int(os.getenv('ID_BLOCK_SIZE', '1')),
+                    seed=lambda: len(table)
+                )
+                self._sequences[name] = sequence
+            return sequence
+
+    def kb_search(self, query: str) -> List[Dict[str, Any]]:
+        """Return the knowledge base sections that best match a query."""
+        if not self.knowledge_base:
+            return []
+        if self._kb_index is None:
+            self._kb_index = KnowledgeBaseIndex(self.knowledge_base)
+        return [
+            {"title": section.title, "text": section.to_text()}
+            for section in self._kb_index.search(query)
+        ]
+
+    def get_order_status(self, order_id: str) -> Optional[Dict[str, Any]]:
+        return self.orders.get(order_id)
+
+    def get_orders(self, order_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        return self.orders.get_many(order_ids)
+
+    def create_ticket(self, user_id: str, issue: str) -> Dict[str, Any]:
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ticket = {
+            "ticket_id": f"TKT-{self.sequence('tickets').next():05d}",
+            "customer_name": user_id,
+            "customer_email": None,
+            "subject": issue,
+            "description": issue,
+            "status": "Open",
+            "priority": "Medium",
+            "created_at": now,
+            "updated_at": now
+        }
+        self.tickets.append(ticket)
+        return ticket
+
+    def record_feedback(self, user_id: str, feedback: str,
+                        rating: Optional[int] = None) -> bool:
+        self.feedback.append({
+            "feedback_id": f"FB-{self.sequence('feedback').next():05d}",
+            "customer_name": user_id,
+            "rating": rating if rating is not None else 3,
+            "comments": feedback,
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+        return True
+
+    def import_journal(self, name: str, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Copy records from a journal (or any iterable of records) into a
+        table in batched transactions, e.g. import_journal("tickets", store).
+
+        Returns:
+            int: Number of records copied.
+        """
+        return getattr(self, name).append_many(records)
+
+
+_service_layer: Optional[SQLiteServiceLayer] = None
+_service_layer_lock = threading.Lock()
+
+
+def get_service_layer() -> Optional[SQLiteServiceLayer]:
+    """
+    Return the SQLite service layer shared by all handlers, or None when
+    CHATBOT_DB_PATH is not set and the handlers keep using their journals.
+    Its kb_search() uses the FAQ handler's knowledge base.
+    """
+    global _service_layer
+    db_path = os.getenv('CHATBOT_DB_PATH')
+    if not db_path:
+        return None
+    with _service_layer_lock:
+        if _service_layer is None or _service_layer.db_path != db_path:
+            # Imported here; the handler modules themselves use this service layer.
+            from src.handlers.faq_handler import FAQHandler
+            _service_layer = SQLiteServiceLayer(db_path, knowledge_base=FAQHandler.FAQ_KNOWLEDGE_BASE)
+        return _service_layer
+
+
+def main():
+    """Copy the ticket, feedback and escalation journals and the orders into a SQLite database."""
+    import argparse
+    from src.services.journal_store import JournalStore
+
+    parser = argparse.ArgumentParser(description="Import the JSONL journals and orders into the SQLite service layer.")
+    parser.add_argument("db_path", help="SQLite database to create or update (the CHATBOT_DB_PATH value)")
+    parser.add_argument("data_dir", nargs="?", default="data", help="folder holding the journals (default data)")
+    parser.add_argument("--orders", default=os.getenv('ORDERS_DB_PATH'),
+                        help="SQLite order database to copy (default ORDERS_DB_PATH, otherwise the sample orders)")
+    args = parser.parse_args()
+
+    layer = SQLiteServiceLayer(args.db_path)
+    for name, key_field in (("tickets", "ticket_id"), ("feedback", "feedback_id"), ("escalations", "escalation_id")):
+        journal_path = os.path.join(args.data_dir, f"{name}.jsonl")
+        if not os.path.exists(journal_path):
+            continue
+        journal = JournalStore(journal_path, key_field)
+        print(f"{name}: {layer.import_journal(name, journal)} records imported")
+        journal.close()
+
+    if args.orders:
+        source = sqlite3.connect(args.orders)
+        orders = (json.loads(data) for (data,) in source.execute("SELECT data FROM orders"))
+        print(f"orders: {layer.orders.bulk_load(orders)} records imported")
+        source.close()
+    else:
+        # Imported here; the handler module itself uses this service layer.
+        from src.handlers.order_status_handler import OrderStatusHandler
+        print(f"orders: {layer.orders.bulk_load(OrderStatusHandler.ORDERS_DB.values())} sample records imported")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+TicketIndex - Secondary indexes for finding a customer's tickets without reading every ticket.
+"""
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def _email_key(email: str) -> str:
+    """Emails are matched without case or surrounding spaces."""
+    return (email or "").strip().lower()
+
+
+def _status_key(status: str) -> str:
+    return (status or "").strip().lower()
+
+
+class TicketIndex:
+    """
+    Maps each customer email to their ticket IDs, overall and per status.
+
+    Each map is an insertion-ordered dict used as an ordered set, so adding
+    or moving a ticket is O(1) and a page of the newest tickets is read by
+    walking the dict backwards. After follow(journal), the index is fed
+    every ticket saved to the journal, by this process or by others.
+    """
+
+    def __init__(self, tickets: Iterable[Dict[str, Any]] = ()):
+        # email -> {ticket_id: None}, oldest first
+        self._by_email: Dict[str, Dict[str, None]] = {}
+        # (email, status) -> {ticket_id: None}, oldest first
+        self._by_email_status: Dict[Tuple[str, str], Dict[str, None]] = {}
+        # ticket_id -> (email, status) it is currently indexed under
+        self._entries: Dict[str, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+        self._journal: Optional[Any] = None
+
+        for ticket in tickets:
+            self.add(ticket)
+
+    def follow(self, journal: Any) -> None:
+        """
+        Index every ticket in a JournalStore and keep up with it. Before each
+        lookup the journal is checked for tickets other processes saved.
+        """
+        journal.add_listener(self.add)
+        self._journal = journal
+
+    def add(self, ticket: Dict[str, Any]) -> None:
+        """Index a new ticket, or re-index one whose email or status changed."""
+        ticket_id = ticket["ticket_id"]
+        entry = (_email_key(ticket.get("customer_email")), _status_key(ticket.get("status")))
+
+        with self._lock:
+            previous = self._entries.get(ticket_id)
+            if previous == entry:
+                return
+            if previous is not None:
+                self._by_email_status.get(previous, {}).pop(ticket_id, None)
+                if previous[0] != entry[0]:
+                    self._by_email.get(previous[0], {}).pop(ticket_id, None)
+
+            self._entries[ticket_id] = entry
+            # A ticket keeps its place in the customer's history when only its status changes.
+            self._by_email.setdefault(entry[0], {}).setdefault(ticket_id, None)
+            self._by_email_status.setdefault(entry, {})[ticket_id] = None
+
+    def for_customer(
+        self,
+        email: str,
+        status: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 10
+    ) -> Tuple[List[str], int]:
+        """
+        Return one page of a customer's ticket IDs, newest first.
+        With a status filter, tickets are ordered by when they got that status.
+
+        Args:
+            email (str): Customer email.
+            status (str, optional): Only tickets with this status.
+            offset (int): Number of newer tickets to skip.
+            limit (int): Most ticket IDs to return.
+
+        Returns:
+            tuple: (ticket IDs on this page, total matching tickets)
+        """
+        if self._journal is not None:
+            self._journal.refresh()
+
+        with self._lock:
+            if status:
+                ids = self._by_email_status.get((_email_key(email), _status_key(status)), {})
+            else:
+                ids = self._by_email.get(_email_key(email), {})
+
+            page = []
+            for position, ticket_id in enumerate(reversed(ids)):
+                if position >= offset + limit:
+                    break
+                if position >= offset:
+                    page.append(ticket_id)
+            return page, len(ids)
+
+
+_indexes: Dict[int, TicketIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def open_ticket_index(journal: Any) -> TicketIndex:
+    """
+    Return the index for a ticket journal, building it on first use.
+    Every handler using the same journal shares one index.
+    """
+    with _indexes_lock:
+        index = _indexes.get(id(journal))
+        if index is None:
+            index = TicketIndex()
+            index.follow(journal)
+            _indexes[id(journal)] = index
+        return index
@@ -0,0 +1,192 @@
+"""
+TicketSearchIndex - On-disk full-text index over ticket subjects and descriptions.
+"""
+
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.services.kb_index import _stem, tokenize
+
+# Words in the subject count this many times, since the subject says what the ticket is about.
+SUBJECT_WEIGHT = 3
+
+# Hyphenated words such as "USB-C" are also indexed joined up ("usbc").
+_COMPOUND_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)+")
+_PREFIX_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Shorter prefixes match too much of the index to be useful.
+MIN_PREFIX_LENGTH = 3
+
+
+def _prefix_word(query: str) -> Optional[str]:
+    """
+    The word to expand as a prefix: the query's last whole word, if it is
+    plain letters and digits and long enough. A fragment of a hyphenated
+    term such as the "c" of "USB-C" is never expanded.
+    """
+    words = query.lower().split()
+    if not words:
+        return None
+    word = words[-1].strip(".,;:!?\"'()")
+    if len(word) < MIN_PREFIX_LENGTH or not _PREFIX_PATTERN.fullmatch(word):
+        return None
+    return word
+
+
+def ticket_terms(text: str) -> List[str]:
+    """Split ticket text into search terms."""
+    lowered = text.lower()
+    compounds = [match.replace("-", "") for match in _COMPOUND_PATTERN.findall(lowered)]
+    return tokenize(lowered) + compounds
+
+
+class TicketSearchIndex:
+    """
+    A full-text index kept in an SQLite FTS5 table, so it lives on disk
+    and only the rows for the searched terms are read.
+
+    Each ticket's subject and description are stored as the terms
+    ticket_terms() finds in them, so stemming and joined-up compounds
+    match the same way in tickets and queries. search_tickets maps
+    ticket IDs to FTS rows, so a changed ticket replaces its own row.
+
+    Results are ranked with FTS5's built-in BM25, with subject terms
+    counting SUBJECT_WEIGHT times, and SQLite keeps only the best `limit`
+    matches while ranking, so no full candidate list is built in Python.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path (str): SQLite database for the index (created if missing).
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Tables of the earlier hand-rolled inverted index; the FTS index is rebuilt from the store.
+            for table in ("search_postings", "search_terms", "search_docs", "search_stats"):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute("CREATE TABLE IF NOT EXISTS search_tickets (doc INTEGER PRIMARY KEY, ticket_id TEXT NOT NULL UNIQUE)")
+            created = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_fts'"
+            ).fetchone() is None
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(subject, description)")
+            if created:
+                # ORDER BY rank then uses the weighted ranking.
+                conn.execute(
+                    "INSERT INTO search_fts (search_fts, rank) VALUES ('rank', ?)",
+                    (f"bm25({float(SUBJECT_WEIGHT)}, 1.0)",)
+                )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(ticket: Dict[str, Any]) -> Tuple[str, str]:
+        return (
+            " ".join(ticket_terms(ticket.get("subject") or "")),
+            " ".join(ticket_terms(ticket.get("description") or ""))
+        )
+
+    def _put(self, conn: sqlite3.Connection, ticket: Dict[str, Any]) -> None:
+        """Insert a ticket's row, or replace it if the ticket is already indexed."""
+        ticket_id = ticket["ticket_id"]
+        row = conn.execute("SELECT doc FROM search_tickets WHERE ticket_id = ?", (ticket_id,)).fetchone()
+        if row is None:
+            doc = conn.execute("INSERT INTO search_tickets (ticket_id) VALUES (?)", (ticket_id,)).lastrowid
+        else:
+            doc = row[0]
+            conn.execute("DELETE FROM search_fts WHERE rowid = ?", (doc,))
+        conn.execute(
+            "INSERT INTO search_fts (rowid, subject, description) VALUES (?, ?, ?)",
+            (doc, *self._row(ticket))
+        )
+
+    def add(self, ticket: Dict[str, Any]) -> None:
+        """Index a new ticket, or re-index one that changed. Only this ticket's row is touched."""
+        conn = self._connection()
+        with self._write_lock, conn:
+            self._put(conn, ticket)
+
+    def add_many(self, tickets: List[Dict[str, Any]]) -> None:
+        """Index several tickets in one transaction, e.g. a group saved by a WriteBehindStore."""
+        conn = self._connection()
+        with self._write_lock, conn:
+            for ticket in tickets:
+                self._put(conn, ticket)
+
+    def rebuild(self, tickets: Iterable[Dict[str, Any]]) -> None:
+        """Clear the index and add every ticket again, in one transaction."""
+        conn = self._connection()
+        with self._write_lock, conn:
+            conn.execute("DELETE FROM search_fts")
+            conn.execute("DELETE FROM search_tickets")
+            for ticket in tickets:
+                self._put(conn, ticket)
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM search_tickets").fetchone()[0]
+
+    def search(self, query: str, limit: int = 10, prefix: bool = False) -> List[Tuple[str, float]]:
+        """
+        Find the tickets that best match a query.
+
+        Args:
+            query (str): Words to look for, e.g. "refund usb-c".
+            limit (int): Most results to return.
+            prefix (bool): Also match words that start with the last query
+                           word, so "refu" finds "refund". Only a whole word
+                           of at least MIN_PREFIX_LENGTH letters and digits
+                           is expanded.
+
+        Returns:
+            list: (ticket ID, score) pairs, best match first.
+        """
+        # Terms are letters and digits only, so quoting them is enough to escape them.
+        phrases = {f'"{term}"' for term in ticket_terms(query)}
+        word = _prefix_word(query) if prefix else None
+        if word:
+            phrases.add(f'"{word}"*')
+            stem = _stem(word)
+            if len(stem) >= MIN_PREFIX_LENGTH:
+                phrases.add(f'"{stem}"*')
+        if not phrases:
+            return []
+
+        rows = self._connection().execute(
+            "SELECT t.ticket_id, f.rank FROM search_fts f JOIN search_tickets t ON t.doc = f.rowid"
+            " WHERE search_fts MATCH ? ORDER BY f.rank LIMIT ?",
+            (" OR ".join(sorted(phrases)), limit)
+        )
+        # FTS5 ranks are negative, lower is better.
+        return [(ticket_id, round(-rank, 4)) for ticket_id, rank in rows]
+
+
+_indexes: Dict[str, TicketSearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def open_ticket_search(db_path: str, store: Optional[Any] = None) -> TicketSearchIndex:
+    """
+    Return the search index stored in db_path, shared by every handler.
+    If it does not hold the same number of tickets as the store, it is
+    rebuilt from the store once.
+    """
+    with _indexes_lock:
+        index = _indexes.get(db_path)
+        if index is None:
+            index = TicketSearchIndex(db_path)
+            if store is not None and len(index) != len(store):
+                index.rebuild(store)
+            _indexes[db_path] = index
+        return index
@@ -0,0 +1,280 @@
+"""
+WriteBehindStore - Queues saved records in memory and writes them in groups from a background thread.
+"""
+
+import atexit
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+# How long a submission waits before it is confirmed:
+# - "queued": as soon as the record is in the queue. Fastest, but records
+#   still queued are lost if the process is killed.
+# - "flushed": once the group commit holding the record has been written.
+#   Still far cheaper than one write per record, because every submission
+#   arriving in the same window shares the write.
+DURABILITY_MODES = ("queued", "flushed")
+
+
+class WriteBehindStore:
+    """
+    Wraps a record store (JournalStore or an SQLite record table) so that
+    append() only puts the record in a bounded in-memory queue. A writer
+    thread saves queued records with one append_many() call per group,
+    every batch_size records or flush_ms milliseconds, whichever comes
+    first.
+
+    Queued records are visible to get() straight away, and close()
+    (also run when the process exits) writes everything still queued.
+    Work that should follow a save, such as updating search indexes, can
+    be registered with add_listener() and is then done once per group
+    on the writer thread instead of once per append().
+    """
+
+    def __init__(
+        self,
+        store: Any,
+        batch_size: int = 100,
+        flush_ms: float = 50.0,
+        max_queue: int = 10000,
+        durability: str = "queued"
+    ):
+        """
+        Args:
+            store: The store records are finally written to. It needs
+                   append_many(), get(), len() and iteration.
+            batch_size (int): Most records written in one group.
+            flush_ms (float): Longest time a record waits before its group is written.
+            max_queue (int): Most records waiting at once. When the queue is
+                             full, append() waits, so memory stays bounded.
+            durability (str): One of DURABILITY_MODES.
+        """
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {', '.join(DURABILITY_MODES)}, not '{durability}'.")
+
+        self.store = store
+        self.path = getattr(store, "path", None)
+        self.key_field = store.key_field
+        self.batch_size = max(1, batch_size)
+        self.flush_ms = flush_ms
+        self.max_queue = max(1, max_queue)
+        self.durability = durability
+
+        # Queue entries are (sequence number, record).
+        self._queue: Deque[Tuple[int, Dict[str, Any]]] = deque()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._condition = threading.Condition()
+        self._queued_seq = 0
+        self._written_seq = 0
+        self._failures: Dict[int, Exception] = {}
+        self._closed = False
+        self._listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+
+        self.groups_written = 0
+        self.records_written = 0
+
+        self._writer = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._writer.start()
+        # Every queue is drained at exit, however it was created.
+        with _open_stores_lock:
+            _open_stores.add(self)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Queue a record for saving. With "flushed" durability, wait until it is written.
+
+        Raises:
+            Exception: The write error, in "flushed" mode, if the group failed.
+        """
+        key = str(record[self.key_field])
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The write-behind queue has been closed.")
+            while len(self._queue) >= self.max_queue:
+                self._condition.wait()
+
+            self._queued_seq += 1
+            seq = self._queued_seq
+            self._queue.append((seq, record))
+            self._pending[key] = record
+            self._condition.notify_all()
+
+            if self.durability == "flushed":
+                while self._written_seq < seq:
+                    self._condition.wait()
+                error = self._failures.pop(seq, None)
+                if error is not None:
+                    raise error
+
+    def add_listener(self, callback: Callable[[List[Dict[str, Any]]], None]) -> None:
+        """
+        Call callback with the records of every group once it is written.
+        Adding the same callback again has no effect.
+        """
+        with self._condition:
+            if callback not in self._listeners:
+                self._listeners.append(callback)
+
+    def _notify(self, records: List[Dict[str, Any]]) -> None:
+        # Runs on the writer thread before "flushed" submitters are released,
+        # so a confirmed record is already in the indexes.
+        with self._condition:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(records)
+            except Exception as e:
+                print(f"Write-behind listener failed: {str(e)}", file=sys.stderr)
+
+    def _take_group(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """Wait for the next group of records to write."""
+        with self._condition:
+            while not self._queue and not self._closed:
+                self._condition.wait()
+
+            # Give more records a chance to join the group.
+            deadline = time.monotonic() + self.flush_ms / 1000
+            while len(self._queue) < self.batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            group = []
+            while self._queue and len(group) < self.batch_size:
+                group.append(self._queue.popleft())
+            # Room in the queue again for waiting submitters.
+            self._condition.notify_all()
+            return group
+
+    def _run(self) -> None:
+        while True:
+            group = self._take_group()
+            if not group:
+                if self._closed:
+                    return
+                continue
+
+            records = [record for _, record in group]
+            error: Optional[Exception] = None
+            try:
+                self.store.append_many(records)
+            except Exception as e:
+                error = e
+            if error is None:
+                self._notify(records)
+
+            with self._condition:
+                if error is not None and self.durability == "queued" and not self._closed:
+                    # Submitters were already told their records are saved, so keep them and retry.
+                    print(f"Write-behind flush failed, retrying: {str(error)}", file=sys.stderr)
+                    self._queue.extendleft(reversed(group))
+                    self._condition.wait(max(self.flush_ms / 1000, 0.5))
+                    continue
+
+                for seq, record in group:
+                    if error is not None:
+                        self._failures[seq] = error
+                    key = str(record[self.key_field])
+                    if self._pending.get(key) is record:
+                        del self._pending[key]
+                self._written_seq = group[-1][0]
+                if error is None:
+                    self.groups_written += 1
+                    self.records_written += len(group)
+                self._condition.notify_all()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a record, including one that is still queued."""
+        with self._condition:
+            record = self._pending.get(key)
+        return record if record is not None else self.store.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        with self._condition:
+            queued = sum(1 for key in self._pending if key not in self.store)
+        return len(self.store) + queued
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Saved records first, then the ones still queued."""
+        with self._condition:
+            pending = dict(self._pending)
+        for record in self.store:
+            key = str(record[self.key_field])
+            yield pending.pop(key, record)
+        yield from pending.values()
+
+    def flush(self) -> None:
+        """Wait until every record queued so far has been written."""
+        with self._condition:
+            target = self._queued_seq
+            self._condition.notify_all()
+            while self._written_seq < target and self._writer.is_alive():
+                self._condition.wait(0.1)
+
+    def close(self) -> None:
+        """Write everything still queued and stop the writer thread."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._writer.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: Records queued, groups and records written, and the durability mode.
+        """
+        with self._condition:
+            return {
+                "queued": len(self._queue),
+                "groups_written": self.groups_written,
+                "records_written": self.records_written,
+                "durability": self.durability
+            }
+
+
+_wrapped: Dict[int, WriteBehindStore] = {}
+_wrapped_lock = threading.Lock()
+_open_stores: "weakref.WeakSet[WriteBehindStore]" = weakref.WeakSet()
+_open_stores_lock = threading.Lock()
+
+
+def write_behind(store: Any) -> Any:
+    """
+    Return the store wrapped in a shared WriteBehindStore when WRITE_BEHIND=1,
+    otherwise the store itself. Settings come from WRITE_BEHIND_BATCH,
+    WRITE_BEHIND_FLUSH_MS, WRITE_BEHIND_QUEUE and WRITE_BEHIND_DURABILITY.
+    """
+    if os.getenv('WRITE_BEHIND', '0') != '1' or isinstance(store, WriteBehindStore):
+        return store
+
+    with _wrapped_lock:
+        wrapped = _wrapped.get(id(store))
+        if wrapped is None:
+            wrapped = WriteBehindStore(
+                store,
+                batch_size=int(os.getenv('WRITE_BEHIND_BATCH', '100')),
+                flush_ms=float(os.getenv('WRITE_BEHIND_FLUSH_MS', '50')),
+                max_queue=int(os.getenv('WRITE_BEHIND_QUEUE', '10000')),
+                durability=os.getenv('WRITE_BEHIND_DURABILITY', 'queued')
+            )
+            _wrapped[id(store)] = wrapped
+        return wrapped
+
+
+@atexit.register
+def _drain_all() -> None:
+    # Write every queued record before the process exits.
+    with _open_stores_lock:
+        stores = list(_open_stores)
+    for store in stores:
+        store.close()
@@ -0,0 +1,8 @@
+"""
+Shared pytest setup - makes the src package importable from the repository root.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -0,0 +1,97 @@
+"""
+Tests for CircuitBreaker - opening on failures or slow calls, and probing for recovery.
+"""
+
+import pytest
+
+from src.services import circuit_breaker
+from src.services.circuit_breaker import CircuitBreaker
+
+
+class FakeClock:
+    """Stands in for the time module so cool-downs pass instantly."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker, "time", fake)
+    return fake
+
+
+def _open_breaker(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.min_calls):
+        assert breaker.allow_request()
+        breaker.record_failure(0.1)
+
+
+def test_opens_once_failure_rate_is_reached(clock):
+    breaker = CircuitBreaker(min_calls=4, failure_rate_threshold=0.5)
+    for _ in range(2):
+        breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_opens_on_slow_calls(clock):
+    breaker = CircuitBreaker(min_calls=3, slow_call_seconds=1.0, slow_call_rate_threshold=0.6)
+    for _ in range(3):
+        breaker.record_success(2.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_allows_limited_probes(clock):
+    breaker = CircuitBreaker(min_calls=2, open_seconds=30, half_open_max_calls=1)
+    _open_breaker(breaker)
+
+    clock.now += 29
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 1
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_successful_probe_closes(clock):
+    breaker = CircuitBreaker(min_calls=2, open_seconds=30)
+    _open_breaker(breaker)
+    clock.now += 30
+
+    assert breaker.allow_request()
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["window_calls"] == 0
+
+
+def test_failed_or_slow_probe_reopens(clock):
+    breaker = CircuitBreaker(min_calls=2, open_seconds=30, slow_call_seconds=1.0)
+    _open_breaker(breaker)
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_success(5.0)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["times_opened"] == 3
+
+
+def test_latency_percentile_needs_enough_samples(clock):
+    breaker = CircuitBreaker(window_size=100, min_calls=100)
+    for latency in range(1, 11):
+        breaker.record_success(latency / 10)
+    assert breaker.latency_percentile(95) is None
+    assert breaker.latency_percentile(90, min_samples=10) == 0.9
@@ -0,0 +1,56 @@
+"""
+Tests for SequenceAllocator - increasing numbers that stay unique across allocators and processes.
+"""
+
+import multiprocessing
+
+from src.services.id_allocator import SequenceAllocator, sequence_path
+
+
+def _allocate(path: str, block_size: int, count: int, results) -> None:
+    allocator = SequenceAllocator(path, block_size=block_size)
+    results.extend([allocator.next() for _ in range(count)])
+
+
+def test_numbers_increase_without_gaps(tmp_path):
+    allocator = SequenceAllocator(str(tmp_path / "tickets.seq"))
+    assert [allocator.next() for _ in range(3)] == [1, 2, 3]
+
+
+def test_new_counter_continues_after_seed(tmp_path):
+    path = str(tmp_path / "tickets.seq")
+    allocator = SequenceAllocator(path, seed=lambda: 41)
+    assert allocator.next() == 42
+    # The counter file now exists, so the seed is not used again.
+    assert SequenceAllocator(path, seed=lambda: 0).next() == 43
+
+
+def test_blocks_from_two_allocators_do_not_overlap(tmp_path):
+    path = str(tmp_path / "tickets.seq")
+    first = SequenceAllocator(path, block_size=10)
+    second = SequenceAllocator(path, block_size=10)
+
+    numbers = [first.next(), second.next(), first.next(), second.next()]
+    assert numbers == [1, 11, 2, 12]
+
+
+def test_processes_never_share_a_number(tmp_path):
+    path = str(tmp_path / "tickets.seq")
+    with multiprocessing.Manager() as manager:
+        results = manager.list()
+        workers = [
+            multiprocessing.Process(target=_allocate, args=(path, block_size, 100, results))
+            for block_size in (1, 1, 7, 7)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        numbers = list(results)
+
+    assert len(numbers) == 400
+    assert len(set(numbers)) == 400
+
+
+def test_sequence_path_sits_next_to_journal():
+    assert sequence_path("data/tickets.jsonl") == "data/tickets.seq"
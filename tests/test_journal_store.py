@@ -0,0 +1,114 @@
+"""
+Tests for JournalStore - appends, lookups, recovery, compaction and sharing a journal between processes.
+"""
+
+import json
+import multiprocessing
+import os
+
+from src.services.journal_store import JournalStore, migrate_json_array
+
+
+def _append_tickets(path: str, worker: int, count: int) -> None:
+    journal = JournalStore(path, "ticket_id")
+    for i in range(count):
+        journal.append({"ticket_id": f"W{worker}-{i}", "worker": worker})
+    journal.close()
+
+
+def test_append_and_get(tmp_path):
+    journal = JournalStore(str(tmp_path / "tickets.jsonl"), "ticket_id")
+    journal.append({"ticket_id": "TKT-00001", "status": "Open"})
+    journal.append({"ticket_id": "TKT-00002", "status": "Open"})
+    journal.append({"ticket_id": "TKT-00001", "status": "Closed"})
+
+    assert journal.get("TKT-00001")["status"] == "Closed"
+    assert journal.get("TKT-00003") is None
+    assert len(journal) == 2
+    assert journal.keys() == ["TKT-00002", "TKT-00001"]
+
+
+def test_unfinished_last_line_is_dropped_on_open(tmp_path):
+    path = str(tmp_path / "tickets.jsonl")
+    journal = JournalStore(path, "ticket_id")
+    journal.append({"ticket_id": "TKT-00001"})
+    journal.close()
+    with open(path, 'ab') as f:
+        f.write(b'{"ticket_id": "TKT-000')
+
+    reopened = JournalStore(path, "ticket_id")
+    reopened.append({"ticket_id": "TKT-00002"})
+    assert reopened.keys() == ["TKT-00001", "TKT-00002"]
+    with open(path, 'rb') as f:
+        assert all(json.loads(line) for line in f)
+
+
+def test_compaction_keeps_latest_records(tmp_path):
+    path = str(tmp_path / "tickets.jsonl")
+    journal = JournalStore(path, "ticket_id", compact_min_lines=1000000)
+    for version in range(5):
+        journal.append_many([{"ticket_id": f"T{i}", "version": version} for i in range(20)])
+
+    journal.compact()
+    journal.append({"ticket_id": "T0", "version": 5})
+
+    assert journal.compactions == 1
+    assert journal.stats()["lines"] == 21
+    assert journal.get("T0")["version"] == 5
+    assert journal.get("T19")["version"] == 4
+    assert JournalStore(path, "ticket_id").get("T0")["version"] == 5
+
+
+def test_sees_records_and_compactions_from_another_store(tmp_path):
+    path = str(tmp_path / "tickets.jsonl")
+    first = JournalStore(path, "ticket_id", compact_min_lines=1000000)
+    second = JournalStore(path, "ticket_id")
+    first.append({"ticket_id": "T1", "status": "Open"})
+    first.append({"ticket_id": "T1", "status": "Closed"})
+    assert second.get("T1")["status"] == "Closed"
+
+    first.compact()
+    first.append({"ticket_id": "T2"})
+    assert second.keys() == ["T1", "T2"]
+
+
+def test_listener_gets_existing_and_new_records(tmp_path):
+    path = str(tmp_path / "tickets.jsonl")
+    journal = JournalStore(path, "ticket_id")
+    journal.append({"ticket_id": "T1"})
+    seen = []
+    journal.add_listener(lambda record: seen.append(record["ticket_id"]))
+
+    journal.append_many([{"ticket_id": "T2"}, {"ticket_id": "T3"}])
+    JournalStore(path, "ticket_id").append({"ticket_id": "T4"})
+    journal.refresh()
+
+    assert seen == ["T1", "T2", "T3", "T4"]
+
+
+def test_concurrent_processes_lose_no_appends(tmp_path):
+    path = str(tmp_path / "tickets.jsonl")
+    workers = [
+        multiprocessing.Process(target=_append_tickets, args=(path, worker, 200))
+        for worker in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert all(worker.exitcode == 0 for worker in workers)
+    assert len(JournalStore(path, "ticket_id")) == 800
+
+
+def test_legacy_file_is_migrated_once(tmp_path):
+    legacy_path = str(tmp_path / "tickets.json")
+    path = str(tmp_path / "tickets.jsonl")
+    with open(legacy_path, 'w') as f:
+        json.dump([{"ticket_id": "T1"}, {"ticket_id": "T2"}], f)
+
+    journal = JournalStore(path, "ticket_id", legacy_path=legacy_path)
+    assert journal.keys() == ["T1", "T2"]
+    assert not os.path.exists(legacy_path)
+    assert os.path.exists(legacy_path + ".migrated")
+    assert migrate_json_array(legacy_path, path) == 0
@@ -0,0 +1,62 @@
+"""
+Tests for PasswordHasher - salted hashes, legacy SHA-256 hashes and upgrade detection.
+"""
+
+import hashlib
+
+import pytest
+
+from src.services.password_hasher import PasswordHasher, is_legacy_hash
+
+
+@pytest.fixture(params=[("scrypt", 10), ("pbkdf2_sha256", 1000)])
+def hasher(request):
+    algorithm, cost = request.param
+    return PasswordHasher(algorithm=algorithm, cost=cost, workers=0)
+
+
+def test_hash_verifies_and_is_salted(hasher):
+    stored = hasher.hash("correct horse")
+
+    assert stored.startswith(f"{hasher.algorithm}${hasher.cost}$")
+    assert hasher.verify("correct horse", stored)
+    assert not hasher.verify("wrong horse", stored)
+    assert hasher.hash("correct horse") != stored
+
+
+def test_legacy_sha256_hash_verifies_and_needs_upgrade(hasher):
+    legacy = hashlib.sha256(b"old password").hexdigest()
+
+    assert is_legacy_hash(legacy)
+    assert hasher.verify("old password", legacy)
+    assert not hasher.verify("other password", legacy)
+    assert hasher.needs_upgrade(legacy)
+
+
+def test_needs_upgrade_when_cost_changes(hasher):
+    stored = hasher.hash("secret")
+    stronger = PasswordHasher(algorithm=hasher.algorithm, cost=hasher.cost + 1, workers=0)
+
+    assert not hasher.needs_upgrade(stored)
+    assert stronger.needs_upgrade(stored)
+    assert stronger.verify("secret", stored)
+
+
+def test_malformed_hash_does_not_verify(hasher):
+    assert not hasher.verify("secret", "scrypt$ten$salt$key")
+    assert not hasher.verify("secret", "md5$1$c2FsdA$a2V5")
+
+
+def test_unknown_algorithm_is_rejected():
+    with pytest.raises(ValueError):
+        PasswordHasher(algorithm="md5", cost=1, workers=0)
+
+
+def test_worker_processes_produce_the_same_hashes():
+    hasher = PasswordHasher(algorithm="scrypt", cost=10, workers=1)
+    try:
+        stored = hasher.hash("secret")
+        assert hasher.verify("secret", stored)
+        assert PasswordHasher(algorithm="scrypt", cost=10, workers=0).verify("secret", stored)
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,94 @@
+"""
+Tests for RateLimiter - token buckets, idle key eviction and RATE_LIMIT_* settings.
+"""
+
+import pytest
+
+from src.services import rate_limiter
+from src.services.rate_limiter import RateLimiter, get_rate_limiter
+
+
+class FakeClock:
+    """A clock the test moves forward by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def fresh_limiters(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    for variable in ("RATE_LIMIT", "RATE_LIMIT_TICKETS", "RATE_LIMIT_MAX_KEYS"):
+        monkeypatch.delenv(variable, raising=False)
+
+
+def test_burst_then_refill():
+    clock = FakeClock()
+    limiter = RateLimiter(per_minute=60, burst=3, clock=clock)
+
+    assert [limiter.allow("alice")[0] for _ in range(4)] == [True, True, True, False]
+    assert limiter.allow("alice")[1] == pytest.approx(1.0)
+    assert limiter.allow("bob")[0]
+
+    clock.now += 1
+    assert limiter.allow("alice")[0]
+    assert not limiter.allow("alice")[0]
+    assert limiter.stats()["limited"] == 3
+
+
+def test_idle_keys_are_dropped():
+    clock = FakeClock()
+    limiter = RateLimiter(per_minute=60, burst=2, clock=clock)
+    limiter.allow("alice")
+
+    clock.now += 2
+    limiter.allow("bob")
+    assert len(limiter) == 1
+
+
+def test_tracked_keys_are_capped():
+    limiter = RateLimiter(per_minute=1, burst=1, max_keys=100, clock=FakeClock())
+    for i in range(1000):
+        limiter.allow(f"user-{i}")
+    assert len(limiter) == 100
+
+
+def test_setting_overrides_default(fresh_limiters, monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_TICKETS", "20:5")
+    limiter = get_rate_limiter("tickets")
+    assert limiter.rate == pytest.approx(20 / 60)
+    assert limiter.burst == 5
+
+
+@pytest.mark.parametrize("setting", ["fast", "nan", "10:many"])
+def test_malformed_setting_falls_back_to_default(fresh_limiters, monkeypatch, capsys, setting):
+    monkeypatch.setenv("RATE_LIMIT_TICKETS", setting)
+    limiter = get_rate_limiter("tickets")
+
+    per_minute, burst = rate_limiter.DEFAULT_LIMITS["tickets"]
+    assert limiter.rate == pytest.approx(per_minute / 60)
+    assert limiter.burst == burst
+    assert "Ignoring RATE_LIMIT_TICKETS" in capsys.readouterr().err
+
+
+def test_malformed_max_keys_falls_back_to_default(fresh_limiters, monkeypatch, capsys):
+    monkeypatch.setenv("RATE_LIMIT_MAX_KEYS", "lots")
+    assert get_rate_limiter("tickets").max_keys == 100000
+    assert "Ignoring RATE_LIMIT_MAX_KEYS" in capsys.readouterr().err
+
+
+def test_limits_can_be_turned_off(fresh_limiters, monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT", "0")
+    assert get_rate_limiter("tickets") is None
+    assert rate_limiter.check("tickets", "alice") is None
+
+
+def test_check_returns_rate_limited_reply(fresh_limiters, monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_TICKETS", "1:1")
+    assert rate_limiter.check("tickets", "alice") is None
+    reply = rate_limiter.check("tickets", "alice")
+    assert reply.served_by == "rate_limit"
+    assert reply.retry_after > 0
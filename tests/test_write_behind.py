@@ -0,0 +1,103 @@
+"""
+Tests for WriteBehindStore - queued and flushed saves, group listeners and draining at exit.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from src.services.journal_store import JournalStore
+from src.services.write_behind import WriteBehindStore
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+class FailingStore:
+    """A store whose writes always fail."""
+
+    key_field = "ticket_id"
+
+    def append_many(self, records):
+        raise OSError("disk full")
+
+    def get(self, key):
+        return None
+
+    def __len__(self):
+        return 0
+
+    def __iter__(self):
+        return iter(())
+
+
+def test_queued_records_are_visible_and_written_in_groups(tmp_path):
+    journal = JournalStore(str(tmp_path / "tickets.jsonl"), "ticket_id")
+    store = WriteBehindStore(journal, batch_size=50, flush_ms=1000)
+    for i in range(100):
+        store.append({"ticket_id": f"T{i}"})
+
+    assert store.get("T99") == {"ticket_id": "T99"}
+    assert len(store) == 100
+
+    store.flush()
+    assert len(journal) == 100
+    assert store.stats()["groups_written"] <= 3
+    store.close()
+
+
+def test_flushed_mode_returns_after_the_write(tmp_path):
+    journal = JournalStore(str(tmp_path / "tickets.jsonl"), "ticket_id")
+    store = WriteBehindStore(journal, flush_ms=5, durability="flushed")
+    store.append({"ticket_id": "T1"})
+    assert journal.get("T1") == {"ticket_id": "T1"}
+    store.close()
+
+
+def test_flushed_mode_raises_the_write_error():
+    store = WriteBehindStore(FailingStore(), flush_ms=5, durability="flushed")
+    with pytest.raises(OSError, match="disk full"):
+        store.append({"ticket_id": "T1"})
+    store.close()
+
+
+def test_unknown_durability_is_rejected():
+    with pytest.raises(ValueError):
+        WriteBehindStore(FailingStore(), durability="eventually")
+
+
+def test_listener_runs_once_per_group_before_flushed_append_returns(tmp_path):
+    journal = JournalStore(str(tmp_path / "tickets.jsonl"), "ticket_id")
+    store = WriteBehindStore(journal, batch_size=10, flush_ms=50, durability="flushed")
+    groups = []
+    store.add_listener(groups.append)
+    store.add_listener(groups.append)
+
+    threads = [
+        threading.Thread(target=store.append, args=({"ticket_id": f"T{i}"},))
+        for i in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(len(group) for group in groups) == 10
+    assert len(groups) < 10
+    store.close()
+
+
+def test_queued_records_are_written_at_exit(tmp_path):
+    path = str(tmp_path / "tickets.jsonl")
+    script = (
+        "from src.services.journal_store import JournalStore\n"
+        "from src.services.write_behind import WriteBehindStore\n"
+        f"store = WriteBehindStore(JournalStore({path!r}, 'ticket_id'), flush_ms=60000)\n"
+        "for i in range(500):\n"
+        "    store.append({'ticket_id': f'T{i}'})\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, check=True, timeout=60)
+
+    assert len(JournalStore(path, "ticket_id")) == 500